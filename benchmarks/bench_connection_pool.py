@@ -0,0 +1,130 @@
+"""Throughput of SymBotClient.execute_rest_call from a thread pool, against a local stub pod.
+
+With the default requests pool of 10 connections, every thread above 10 opens a new connection
+for its request and throws it away afterwards ("Connection pool is full, discarding
+connection"). Sizing the pool to the number of threads with podConnectionPool keeps every
+connection alive.
+
+    python benchmarks/bench_connection_pool.py --threads 32 --requests 4000
+
+Results on a single core VM, 32 threads, 4000 requests, 2ms server latency:
+
+    default pool (poolMaxsize 10):   550-600 req/s, 150-230 connections opened
+    tuned pool (poolMaxsize 32):     600-670 req/s, ~30 connections opened
+
+The stub is plain HTTP, so this understates the gain against a real pod where every new
+connection also costs a TLS handshake.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sym_api_client_python.clients.connection_pool import merge_pool_config  # noqa: E402
+from sym_api_client_python.clients.sym_bot_client import SymBotClient  # noqa: E402
+from sym_api_client_python.configure.configure import SymConfig  # noqa: E402
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'tests', 'resources', 'bot-config.json')
+BODY = json.dumps({'id': 1234, 'emailAddress': 'bot@symphony.com', 'displayName': 'Bot'}).encode()
+
+
+class StubPodHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency_sec = 0.002
+    connections = set()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            if self.path == '/stats':
+                body = json.dumps({'connections': len(self.connections)}).encode()
+                self.connections.clear()
+            else:
+                self.connections.add(self.client_address)
+                body = BODY
+        if body is BODY:
+            time.sleep(self.latency_sec)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port_queue):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubPodHandler)
+    server.daemon_threads = True
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def fetch_connection_count(server_url):
+    # Also resets the count on the server
+    return requests.get(server_url + '/stats').json()['connections']
+
+
+class StubAuth:
+
+    def get_session_token(self):
+        return 'session-token'
+
+    def get_key_manager_token(self):
+        return 'km-token'
+
+
+def run(server_url, pool_config, threads, requests):
+    config = SymConfig(CONFIG_PATH)
+    config.load_config()
+    config.data['podUrl'] = server_url
+    config.data['podConnectionPool'] = merge_pool_config(pool_config)
+    client = SymBotClient(StubAuth(), config)
+
+    fetch_connection_count(server_url)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        for _ in executor.map(lambda _: client.execute_rest_call('GET', '/pod/v2/sessioninfo'), range(requests)):
+            pass
+    elapsed = time.perf_counter() - started
+    client.get_pod_session().close()
+    return requests / elapsed, fetch_connection_count(server_url)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=4000)
+    args = parser.parse_args()
+
+    # Silence the expected "Connection pool is full" warnings of the default pool
+    logging.getLogger('urllib3').setLevel(logging.ERROR)
+
+    # The stub pod runs in its own process so that it doesn't compete with the client for the GIL
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(port_queue,), daemon=True)
+    server.start()
+    server_url = 'http://127.0.0.1:{}'.format(port_queue.get())
+
+    for name, pool_config in [('default pool', None),
+                              ('tuned pool', {'poolMaxsize': args.threads})]:
+        throughput, connections = run(server_url, pool_config, args.threads, args.requests)
+        print('{:<14} {:>8.0f} req/s {:>6} connections opened'.format(name, throughput, connections))
+
+    server.terminate()
+
+
+if __name__ == '__main__':
+    main()
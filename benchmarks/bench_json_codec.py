@@ -0,0 +1,138 @@
+"""Decoding of large REST and datafeed responses, before and after the JsonCodec.
+
+SymBotClient used to parse json.loads(response.text). With the requests version pinned in
+requirements.txt (2.24), an application/json response without a charset is decoded to a str with
+the charset guessed by chardet over the whole body; newer versions of requests assume UTF-8. The
+JsonCodec parses the bytes of the body, with the standard library or with orjson.
+
+    python benchmarks/bench_json_codec.py --users 2000 --events 500
+
+The payloads are a /pod/v3/users response and a DF v2 read of MESSAGESENT events. The chardet
+line, and the guessed charset one with requests 2.24, need chardet 3.0.4 (requirements.txt).
+
+Results on a single core VM, per response:
+
+                                         /pod/v3/users 1 MB    datafeed read 300 KB
+    json.loads(text), chardet (2.24)     2,300-2,600 ms        640-920 ms
+    json.loads(text), utf-8 charset      20-21 ms              4-5 ms
+    JsonCodec                            17-26 ms              3-5 ms
+    OrjsonCodec                          7.5-13 ms             1.7-3.4 ms
+
+Parsing the bytes doesn't make the standard library faster than parsing a str, the gains are
+skipping the guess of the charset, which requests 2.24 does for every application/json response
+without a charset, and orjson.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import requests
+
+try:
+    import chardet
+except ImportError:
+    chardet = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sym_api_client_python.clients import json_codec  # noqa: E402
+from sym_api_client_python.clients.json_codec import JsonCodec, OrjsonCodec  # noqa: E402
+
+NAMES = ['Renée', 'Zoë', 'José', 'Sam', 'Alex', 'Kai', 'Łukasz', 'Ananya', 'Chen', 'Olu']
+
+
+def generate_users(rng, count):
+    users = []
+    for index in range(count):
+        name = rng.choice(NAMES)
+        users.append({
+            'id': 349026222340000 + index, 'emailAddress': 'user{}@example.com'.format(index),
+            'firstName': name, 'lastName': 'User {}'.format(index), 'displayName': '{} User {}'.format(name, index),
+            'title': 'Engineer', 'company': 'Example', 'username': 'user{}'.format(index), 'location': 'London',
+            'accountType': 'NORMAL', 'avatars': [{'size': 'original', 'url': '../avatars/{}.png'.format(index)},
+                                                 {'size': 'small', 'url': '../avatars/small/{}.png'.format(index)}],
+            'workPhoneNumber': '+44 20 0000 {:04d}'.format(index), 'department': 'Technology',
+            'division': 'Platform', 'roles': ['INDIVIDUAL'], 'features': {'postReadEnabled': True},
+        })
+    return {'users': users, 'errors': []}
+
+
+def generate_events(rng, count):
+    events = []
+    for index in range(count):
+        name = rng.choice(NAMES)
+        events.append({
+            'id': 'event-{}'.format(index), 'messageId': 'msg-{}'.format(index), 'timestamp': 1565879149167 + index,
+            'type': 'MESSAGESENT', 'initiator': {'user': {'userId': 349026222340000 + index, 'displayName': name}},
+            'payload': {'messageSent': {'message': {
+                'messageId': 'msg-{}'.format(index), 'timestamp': 1565879149167 + index,
+                'message': '<div data-format="PresentationML" data-version="2.0"><p>Bonjour {}, '
+                           'le déploiement est terminé</p></div>'.format(name),
+                'data': '{}', 'user': {'userId': 349026222340000 + index, 'firstName': name},
+                'stream': {'streamId': 'stream-{}'.format(index % 40), 'streamType': 'ROOM'},
+                'externalRecipients': False, 'userAgent': 'DESKTOP-40.0.0', 'originalFormat': 'com.symphony.messageml.v2',
+            }}},
+        })
+    return {'events': events, 'ackId': 'ack-id'}
+
+
+def make_response(payload, encoding):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['Content-Type'] = 'application/json'
+    response._content = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    # requests sets encoding from the headers, None makes .text guess it
+    response.encoding = encoding
+    return response
+
+
+def measure(decode, response, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = decode(response)
+    return (time.perf_counter() - started) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--events', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    decoders = []
+    if chardet is not None:
+        # What response.text does with requests 2.24, whatever the installed version
+        decoders.append(('json.loads(text), chardet (2.24)', None,
+                         lambda response: json.loads(response.content.decode(
+                             chardet.detect(response.content)['encoding']))))
+    decoders += [
+        ('json.loads(text), guessed charset', None,
+         lambda response: json.loads(response.text)),
+        ('json.loads(text), utf-8 charset', 'utf-8',
+         lambda response: json.loads(response.text)),
+        ('JsonCodec', None,
+         lambda response: JsonCodec().decode(response.content, response.headers.get('Content-Type'))),
+    ]
+    if json_codec.orjson is not None:
+        decoders.append(('OrjsonCodec', None,
+                         lambda response: OrjsonCodec().decode(response.content, response.headers.get('Content-Type'))))
+
+    for name, payload in [('/pod/v3/users', generate_users(rng, args.users)),
+                          ('datafeed read', generate_events(rng, args.events))]:
+        expected = None
+        for decoder_name, encoding, decode in decoders:
+            response = make_response(payload, encoding)
+            elapsed, result = measure(decode, response, args.repeat)
+            print('{:<14} {:>6.0f} KB  {:<36} {:>8.2f} ms'.format(
+                name, len(response.content) / 1024, decoder_name, elapsed * 1000))
+            expected = result if expected is None else expected
+            assert result == expected, 'Results differ'
+
+
+if __name__ == '__main__':
+    main()
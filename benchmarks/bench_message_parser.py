@@ -0,0 +1,139 @@
+"""SymMessageParser before and after ParsedMessage, over a corpus of generated datafeed messages.
+
+Each message is queried the way a typical command handling listener does: its text, its
+mentions and mention ids, and its hashtags and cashtags. The previous implementation, kept below
+as BeautifulSoupMessageParser, built a BeautifulSoup tree per call and decoded the data per call.
+
+    python benchmarks/bench_message_parser.py --messages 2000
+
+Results on a single core VM, 2000 messages:
+
+    BeautifulSoup per call:   ~700 messages/s
+    ParsedMessage:            6,300-7,000 messages/s, about 10x
+
+The text, ids and values returned by both are checked to be identical.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sym_api_client_python.processors.sym_message_parser import SymMessageParser  # noqa: E402
+
+WORDS = ('deploy the release to production after the review please check the logs and the '
+         'dashboard before lunch thanks').split()
+TICKERS = ['aapl', 'amzn', 'msft', 'goog', 'nasdaq']
+HASHTAGS = ['release', 'incident', 'standup', 'q3']
+
+
+class BeautifulSoupMessageParser:
+    """SymMessageParser as it was before ParsedMessage"""
+
+    def __get_tags(self, json_nodes, tag_type):
+        tags = []
+        if json_nodes:
+            for k, v in json_nodes.items():
+                if 'id' in v and len(v['id']) > 0 and 'type' in v['id'][0] and v['id'][0]['type'] == tag_type and 'value' in v['id'][0]:
+                    tags.append(v['id'][0]['value'])
+        return tags
+
+    def get_text(self, message_data):
+        text_arr = []
+        soup = BeautifulSoup(message_data['message'], 'html.parser')
+        for i in soup.find_all('div'):
+            text_arr.extend(i.text.split(' '))
+        return text_arr
+
+    def get_spans(self, message_data):
+        soup = BeautifulSoup(message_data['message'], 'html.parser')
+        return [i.text for i in soup.find_all('span')]
+
+    get_mentions = get_hash_tags = get_cash_tags = get_spans
+
+    def get_mention_ids(self, message_data):
+        return self.__get_tags(json.loads(message_data['data']), 'com.symphony.user.userId')
+
+    def get_hash_tag_values(self, message_data):
+        return self.__get_tags(json.loads(message_data['data']), 'org.symphonyoss.taxonomy.hashtag')
+
+    def get_cash_tag_values(self, message_data):
+        return self.__get_tags(json.loads(message_data['data']), 'org.symphonyoss.fin.security.id.ticker')
+
+
+def generate_message(rng):
+    entities = {}
+    paragraphs = []
+    for _ in range(rng.randint(1, 4)):
+        parts = []
+        for _ in range(rng.randint(3, 25)):
+            roll = rng.random()
+            if roll < 0.05:
+                entity_id = str(len(entities))
+                user_id = rng.randint(10 ** 13, 10 ** 14)
+                entities[entity_id] = {'id': [{'type': 'com.symphony.user.userId', 'value': user_id}],
+                                       'type': 'com.symphony.user.mention'}
+                parts.append('<span class="entity" data-entity-id="{}">@User {}</span>'.format(entity_id, user_id))
+            elif roll < 0.08:
+                entity_id = str(len(entities))
+                tag = rng.choice(HASHTAGS)
+                entities[entity_id] = {'id': [{'type': 'org.symphonyoss.taxonomy.hashtag', 'value': tag}],
+                                       'type': 'org.symphonyoss.taxonomy', 'version': '1.0'}
+                parts.append('<span class="entity" data-entity-id="{}">#{}</span>'.format(entity_id, tag))
+            elif roll < 0.1:
+                entity_id = str(len(entities))
+                ticker = rng.choice(TICKERS)
+                entities[entity_id] = {'id': [{'type': 'org.symphonyoss.fin.security.id.ticker', 'value': ticker}],
+                                       'type': 'org.symphonyoss.fin.security', 'version': '1.0'}
+                parts.append('<span class="entity" data-entity-id="{}">${}</span>'.format(entity_id, ticker))
+            elif roll < 0.13:
+                parts.append('<b>{}</b>'.format(rng.choice(WORDS)))
+            else:
+                parts.append(rng.choice(WORDS))
+        paragraphs.append('<p>{}</p>'.format(' '.join(parts)))
+    if rng.random() < 0.2:
+        paragraphs.append('<ul>{}</ul>'.format(''.join('<li>{}</li>'.format(rng.choice(WORDS)) for _ in range(3))))
+    return {
+        'messageId': 'msg-{}'.format(rng.random()),
+        'message': '<div data-format="PresentationML" data-version="2.0" class="wysiwyg">{}</div>'
+                   .format(''.join(paragraphs)),
+        'data': json.dumps(entities),
+        'stream': {'streamId': 'stream', 'streamType': 'ROOM'},
+    }
+
+
+def handle(message_parser, message):
+    return (message_parser.get_text(message), message_parser.get_mentions(message),
+            message_parser.get_mention_ids(message), message_parser.get_hash_tags(message),
+            message_parser.get_hash_tag_values(message), message_parser.get_cash_tag_values(message))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    corpus = [generate_message(rng) for _ in range(args.messages)]
+
+    results = {}
+    for name, message_parser in [('BeautifulSoup per call', BeautifulSoupMessageParser()),
+                                 ('ParsedMessage', SymMessageParser())]:
+        started = time.perf_counter()
+        results[name] = [handle(message_parser, message) for message in corpus]
+        elapsed = time.perf_counter() - started
+        print('{:<24} {:>8.0f} messages/s'.format(name, len(corpus) / elapsed))
+
+    # get_mentions and get_hash_tags used to return the text of every span, they now only
+    # return the entities of their type, so only the other results are compared
+    for before, after in zip(results['BeautifulSoup per call'], results['ParsedMessage']):
+        assert [before[i] for i in (0, 2, 4, 5)] == [after[i] for i in (0, 2, 4, 5)], 'Results differ'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""Memory and throughput of attachment uploads against a local stub agent.
+
+    python benchmarks/bench_upload.py --size-mb 100
+
+A file of size-mb is sent by send_msg_with_attachments and its async version. The file is
+passed as an opened file, as a BytesIO already in memory, and as an async iterator. The peak is
+the memory allocated by Python while the upload is in progress, the BytesIO itself excluded.
+The "before" row is the MultipartEncoder that send_msg_with_attachment built before. Throughput
+is measured with tracemalloc on, which slows every run down.
+
+Results on a single core VM, one 100MB attachment:
+
+    before, BytesIO (sync):     peak   0.1 MB   140-160 MB/s
+    file (sync):                peak   0.1 MB   160-200 MB/s
+    BytesIO (sync):             peak   0.1 MB   190-215 MB/s
+    file (async, chunked):      peak   0.3 MB   140-170 MB/s
+    async iterator (chunked):   peak   0.3 MB   620-750 MB/s
+
+Memory stays flat whatever the size of the attachment. The async iterator yields chunks that
+are already in memory, so it shows the cost of the upload without reading a file.
+"""
+import argparse
+import asyncio
+import io
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sym_api_client_python.clients.sym_bot_client import SymBotClient  # noqa: E402
+from sym_api_client_python.configure.configure import SymConfig  # noqa: E402
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'tests', 'resources', 'bot-config.json')
+MESSAGE = '<messageML>Attached</messageML>'
+CHUNK = b'\0' * 65536
+
+
+class StubAgentHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        if self.headers.get('Transfer-Encoding') == 'chunked':
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                self._discard(size + 2)
+                if size == 0:
+                    break
+        else:
+            self._discard(int(self.headers['Content-Length']))
+        body = b'{"messageId": "msg-id"}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _discard(self, size):
+        while size > 0:
+            size -= len(self.rfile.read(min(size, 1 << 20)))
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port_queue):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubAgentHandler)
+    server.daemon_threads = True
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+class StubAuth:
+
+    def get_session_token(self):
+        return 'session-token'
+
+    def get_key_manager_token(self):
+        return 'km-token'
+
+
+def send_before(bot_client, stream_id, attachment):
+    # The multipart form send_msg_with_attachment built before
+    data = MultipartEncoder(fields={'message': MESSAGE, 'attachment': ('file.bin', attachment, 'file')})
+    return bot_client.execute_rest_call('POST', '/agent/v4/stream/{}/message/create'.format(stream_id),
+                                        data=data, headers={'Content-Type': data.content_type})
+
+
+async def iter_chunks(size):
+    for _ in range(size // len(CHUNK)):
+        yield CHUNK
+
+
+def measure(name, size, upload):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = upload()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert result == {'messageId': 'msg-id'}, result
+    print('{:<28} peak {:>5.1f} MB {:>6.0f} MB/s'.format(name + ':', peak / 1e6, size / 1e6 / elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size-mb', type=int, default=100)
+    args = parser.parse_args()
+    size = args.size_mb * 1024 * 1024
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(port_queue,), daemon=True)
+    server.start()
+
+    config = SymConfig(CONFIG_PATH)
+    config.load_config()
+    config.data['agentUrl'] = 'http://127.0.0.1:{}'.format(port_queue.get())
+    bot_client = SymBotClient(StubAuth(), config)
+    message_client = bot_client.get_message_client()
+    loop = asyncio.get_event_loop()
+
+    with tempfile.NamedTemporaryFile(suffix='.bin') as file:
+        for _ in range(size // len(CHUNK)):
+            file.write(CHUNK)
+        file.flush()
+        in_memory = io.BytesIO(CHUNK * (size // len(CHUNK)))
+
+        def rewound(attachment):
+            attachment.seek(0)
+            return attachment
+
+        measure('before, BytesIO (sync)', size, lambda: send_before(bot_client, 's', rewound(in_memory)))
+        measure('file (sync)', size, lambda: message_client.send_msg_with_attachments(
+            's', MESSAGE, [('file.bin', rewound(file))]))
+        measure('BytesIO (sync)', size, lambda: message_client.send_msg_with_attachments(
+            's', MESSAGE, [('file.bin', rewound(in_memory))]))
+        measure('file (async, chunked)', size, lambda: loop.run_until_complete(
+            message_client.send_msg_with_attachments_async('s', MESSAGE, [('file.bin', rewound(file))])))
+        measure('async iterator (chunked)', size, lambda: loop.run_until_complete(
+            message_client.send_msg_with_attachments_async('s', MESSAGE, [('file.bin', iter_chunks(size))])))
+
+    loop.run_until_complete(bot_client.close_async_sessions())
+    server.terminate()
+
+
+if __name__ == '__main__':
+    main()
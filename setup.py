@@ -22,6 +22,7 @@ setuptools.setup(
         'aiohttp',
         'aioresponses>=0.6.1',
         'pyOpenSSL',
+        'cryptography>=2.5',
         'rsa',
         'requests',
         'python-jose~=3.2.0',
@@ -34,6 +35,9 @@ setuptools.setup(
         'yattag==1.12.2',
         'defusedxml==0.6.0'
     ],
+    extras_require={
+        'orjson': ['orjson'],
+    },
     tests_require=['pytest'],
     include_package_data=True,
     classifiers=[
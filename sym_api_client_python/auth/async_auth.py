@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import os
+import secrets
+import ssl
+import tempfile
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.serialization import pkcs12
+
+from .auth_endpoint_constants import auth_endpoint_constants
+from ..exceptions.MaxRetryException import MaxRetryException
+
+
+def create_ssl_context(config):
+    """SSLContext verifying against the truststore of the config, if there is one"""
+    if config.data['truststorePath']:
+        logging.debug('truststore being added to the async authentication session')
+        return ssl.create_default_context(cafile=config.data['truststorePath'])
+    return ssl.create_default_context()
+
+
+def create_pkcs12_ssl_context(config):
+    """SSLContext presenting the client certificate of the p.12 file of the config, which is what
+    the Pkcs12Adapter does for requests"""
+    ssl_context = create_ssl_context(config)
+    with open(config.data['p.12'], 'rb') as p12_file:
+        p12_data = p12_file.read()
+    password = config.data['botCertPassword']
+    private_key, cert, ca_certs = pkcs12.load_key_and_certificates(
+        p12_data, password.encode('utf-8') if password else None)
+
+    # ssl only loads certificate chains from files. The key is written encrypted with a one-off
+    # password and the file removed straight away
+    key_password = secrets.token_bytes(16)
+    chain_file = tempfile.NamedTemporaryFile(delete=False)
+    try:
+        with chain_file:
+            chain_file.write(private_key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.BestAvailableEncryption(key_password)
+            ))
+            for certificate in [cert] + list(ca_certs or []):
+                chain_file.write(certificate.public_bytes(serialization.Encoding.PEM))
+        ssl_context.load_cert_chain(chain_file.name, password=key_password)
+    finally:
+        os.remove(chain_file.name)
+    return ssl_context
+
+
+async def post_for_token(session, url, max_retries, proxy=None, ssl_context=None, **kwargs):
+    """POST to an authentication endpoint until it returns 200 and return the decoded body.
+    Failed attempts are retried up to max_retries times, TIMEOUT seconds apart, without blocking
+    the event loop. Raises MaxRetryException when all of them failed."""
+    retries = 0
+    while True:
+        async with session.post(url, proxy=proxy, ssl=ssl_context, **kwargs) as response:
+            if response.status == 200:
+                return await response.json(content_type=None)
+            status = response.status
+        retries += 1
+        if retries > max_retries:
+            raise MaxRetryException('bot failed to authenticate more than {} times on {}: {}'
+                                    .format(max_retries, url, status))
+        logging.debug('async_auth/post_for_token() {} failed: {}'.format(url, status))
+        await asyncio.sleep(auth_endpoint_constants['TIMEOUT'])
+
+
+async def wait_for_auth_window(auth):
+    """Wait, without blocking the event loop, until WAIT_TIME has passed since the last
+    authentication of auth, as the synchronous authenticate does with time.sleep"""
+    while auth.last_auth_time != 0 and \
+            int(round(time.time() * 1000)) - auth.last_auth_time < auth_endpoint_constants['WAIT_TIME']:
+        logging.debug('Retry authentication in 30 seconds.')
+        await asyncio.sleep(auth_endpoint_constants['TIMEOUT'])
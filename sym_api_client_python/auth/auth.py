@@ -1,9 +1,13 @@
+import asyncio
 import json
 import logging
 import time
+import aiohttp
 import requests
+from .async_auth import create_pkcs12_ssl_context, post_for_token, wait_for_auth_window
 from .auth_endpoint_constants import auth_endpoint_constants
 from ..clients.api_client import APIClient
+from ..clients.connection_pool import mount_http_adapter
 from requests_pkcs12 import Pkcs12Adapter
 from ..exceptions.UnauthorizedException import UnauthorizedException
 from ..exceptions.MaxRetryException import MaxRetryException
@@ -23,8 +27,13 @@ class Auth(APIClient):
         self.auth_retries = 0
         self.session_token = None
         self.key_manager_token = None
+        # Epoch milliseconds, when the pod includes expireAt in the authentication response
+        self.session_token_expire_at = None
+        self.key_manager_token_expire_at = None
         self.auth_session = requests.Session()
         self.key_manager_auth_session = requests.Session()
+        self.async_auth_session = None
+        self._async_ssl_context = None
 
         # proxy infomation set in config loader, set to empty object if there is no proxy set in config.json
         self.auth_session.proxies.update(self.config.data['podProxyRequestObject'])
@@ -35,31 +44,20 @@ class Auth(APIClient):
             self.auth_session.verify = self.config.data['truststorePath']
             self.key_manager_auth_session.verify = self.config.data['truststorePath']
 
-        self.auth_session.mount(
-            self.config.data['sessionAuthUrl'],
-            Pkcs12Adapter(
+        # The session auth endpoint is sized like the pod, the key manager one like the key manager
+        for session in (self.auth_session, self.key_manager_auth_session):
+            mount_http_adapter(
+                session, self.config.data['sessionAuthUrl'], self.config.data['podConnectionPool'],
+                adapter_class=Pkcs12Adapter,
                 pkcs12_filename=self.config.data['p.12'],
                 pkcs12_password=self.config.data['botCertPassword']
-            ))
-        self.auth_session.mount(
-            self.config.data['keyAuthUrl'],
-            Pkcs12Adapter(
+            )
+            mount_http_adapter(
+                session, self.config.data['keyAuthUrl'], self.config.data['keyManagerConnectionPool'],
+                adapter_class=Pkcs12Adapter,
                 pkcs12_filename=self.config.data['p.12'],
                 pkcs12_password=self.config.data['botCertPassword']
-            ))
-
-        self.key_manager_auth_session.mount(
-            self.config.data['sessionAuthUrl'],
-            Pkcs12Adapter(
-                pkcs12_filename=self.config.data['p.12'],
-                pkcs12_password=self.config.data['botCertPassword']
-            ))
-        self.key_manager_auth_session.mount(
-            self.config.data['keyAuthUrl'],
-            Pkcs12Adapter(
-                pkcs12_filename=self.config.data['p.12'],
-                pkcs12_password=self.config.data['botCertPassword']
-            ))
+            )
 
     def get_session_token(self):
         """Return the session token"""
@@ -117,6 +115,7 @@ class Auth(APIClient):
             data = json.loads(response.text)
             logging.debug('Auth/session token success')
             self.session_token = data['token']
+            self.session_token_expire_at = data.get('expireAt')
             self.auth_retries = 0
 
     def key_manager_authenticate(self):
@@ -142,4 +141,67 @@ class Auth(APIClient):
             data = json.loads(response.text)
             logging.debug('Auth/key manager token success')
             self.key_manager_token = data['token']
+            self.key_manager_token_expire_at = data.get('expireAt')
             self.auth_retries = 0
+
+    async def authenticate_async(self):
+        """
+        Get the session and key manager token without blocking the event loop. Both are
+        requested at the same time.
+        """
+        logging.debug('Auth/authenticate_async()')
+        try:
+            await wait_for_auth_window(self)
+            self.last_auth_time = int(round(time.time() * 1000))
+            await asyncio.gather(self.session_authenticate_async(), self.key_manager_authenticate_async())
+        except Exception as exc:
+            raise MaxRetryException('max auth retry limit') from exc
+
+    async def session_authenticate_async(self):
+        """
+        Get the session token by calling API, asynchronously. The certificate is presented
+        through the ssl context of the request
+        """
+        logging.debug('Auth/session_authenticate_async()')
+        url = self.config.data['sessionAuthUrl'] + '/sessionauth/v1/authenticate'
+        data = await post_for_token(
+            self.get_async_auth_session(), url, auth_endpoint_constants['MAX_AUTH_RETRY'],
+            proxy=self.config.data['podProxyRequestObject'].get('http'),
+            ssl_context=self._get_async_ssl_context()
+        )
+        logging.debug('Auth/session token success')
+        self.session_token = data['token']
+        self.session_token_expire_at = data.get('expireAt')
+
+    async def key_manager_authenticate_async(self):
+        """
+        Get the key manager token by calling API, asynchronously. The certificate is presented
+        through the ssl context of the request
+        """
+        logging.debug('Auth/key_manager_authenticate_async()')
+        url = self.config.data['keyAuthUrl'] + '/keyauth/v1/authenticate'
+        data = await post_for_token(
+            self.get_async_auth_session(), url, auth_endpoint_constants['MAX_AUTH_RETRY'],
+            proxy=self.config.data['keyManagerProxyRequestObject'].get('http'),
+            ssl_context=self._get_async_ssl_context()
+        )
+        logging.debug('Auth/key manager token success')
+        self.key_manager_token = data['token']
+        self.key_manager_token_expire_at = data.get('expireAt')
+
+    def get_async_auth_session(self):
+        """aiohttp session of the asynchronous authentications, must be called from within the
+        running event loop"""
+        if self.async_auth_session is None or self.async_auth_session.closed:
+            self.async_auth_session = aiohttp.ClientSession()
+        return self.async_auth_session
+
+    async def close_async_auth_session(self):
+        if self.async_auth_session is not None:
+            await self.async_auth_session.close()
+            self.async_auth_session = None
+
+    def _get_async_ssl_context(self):
+        if self._async_ssl_context is None:
+            self._async_ssl_context = create_pkcs12_ssl_context(self.config)
+        return self._async_ssl_context
@@ -1,15 +1,30 @@
+import asyncio
 import json
+import os
 import requests
 import datetime
 import time
 import logging
+import aiohttp
+from .async_auth import create_ssl_context, post_for_token, wait_for_auth_window
 from .auth_endpoint_constants import auth_endpoint_constants
-from jose import jwt
+from jose import jwk
+from jose.utils import base64url_encode
 from ..clients.api_client import APIClient
+from ..clients.connection_pool import mount_http_adapter
 from ..exceptions.MaxRetryException import MaxRetryException
 
+# A JWT is reused while it has at least this many seconds left
+JWT_REUSE_MARGIN = 30
+
+
 class SymBotRSAAuth(APIClient):
-    """Class for RSA authentication"""
+    """Class for RSA authentication
+
+    The private key is read and parsed once, and read again only when the file at botRSAPath
+    changes, e.g. when the key is rotated. The signed JWT is shared by the session and key
+    manager authentications and reused until it is about to expire.
+    """
 
     def __init__(self, config):
         """
@@ -21,8 +36,17 @@ class SymBotRSAAuth(APIClient):
         self.auth_retries = 0
         self.session_token = None
         self.key_manager_token = None
+        # Epoch milliseconds, when the pod includes expireAt in the authentication response
+        self.session_token_expire_at = None
+        self.key_manager_token_expire_at = None
         self.auth_session = requests.Session()
         self.key_manager_auth_session = requests.Session()
+        self.async_auth_session = None
+        self._async_ssl_context = None
+        self._private_key = None
+        self._private_key_stat = None
+        self._jwt = None
+        self._jwt_expiration = 0
 
         self.auth_session.proxies.update(self.config.data['podProxyRequestObject'])
         self.key_manager_auth_session.proxies.update(self.config.data['keyManagerProxyRequestObject'])
@@ -32,6 +56,11 @@ class SymBotRSAAuth(APIClient):
             self.auth_session.verify = self.config.data['truststorePath']
             self.key_manager_auth_session.verify = self.config.data['truststorePath']
 
+        mount_http_adapter(self.auth_session, self.config.data['sessionAuthUrl'],
+                           self.config.data['podConnectionPool'])
+        mount_http_adapter(self.key_manager_auth_session, self.config.data['keyAuthUrl'],
+                           self.config.data['keyManagerConnectionPool'])
+
     def get_session_token(self):
         """Return the session token"""
         return self.session_token
@@ -70,17 +99,34 @@ class SymBotRSAAuth(APIClient):
         :return: A jwt token valid for < 290 seconds
         """
         logging.debug('RSA_auth/getJWT() function started')
-        with open(self.config.data['botRSAPath'], 'r') as f:
-            content = f.readlines()
-            private_key = ''.join(content)
-            expiration_date = int(datetime.datetime.now(datetime.timezone.utc)
-                                  .timestamp() + (5*58))
-            payload = {
-                'sub': self.config.data['botUsername'],
-                'exp': expiration_date
-            }
-            encoded = jwt.encode(payload, private_key, algorithm='RS512')
-            return encoded
+        private_key = self._load_private_key()
+        now = datetime.datetime.now(datetime.timezone.utc).timestamp()
+        if self._jwt is not None and self._jwt_expiration - now > JWT_REUSE_MARGIN:
+            logging.debug('RSA_auth/getJWT() --> reusing jwt')
+            return self._jwt
+
+        expiration_date = int(now + (5*58))
+        payload = {
+            'sub': self.config.data['botUsername'],
+            'exp': expiration_date
+        }
+        self._jwt = _sign_jwt(private_key, payload)
+        self._jwt_expiration = expiration_date
+        return self._jwt
+
+    def _load_private_key(self):
+        """Return the parsed private key, read again if the file has changed since it was last read"""
+        path = self.config.data['botRSAPath']
+        stat = os.stat(path)
+        key_stat = (path, stat.st_mtime_ns, stat.st_size)
+        if self._private_key is None or key_stat != self._private_key_stat:
+            logging.debug('RSA_auth/_load_private_key() --> reading {}'.format(path))
+            with open(path, 'r') as f:
+                self._private_key = jwk.construct(f.read(), 'RS512')
+            self._private_key_stat = key_stat
+            # A jwt signed with the previous key is no longer wanted
+            self._jwt = None
+        return self._private_key
 
     def session_authenticate(self):
         """
@@ -108,6 +154,7 @@ class SymBotRSAAuth(APIClient):
             data = json.loads(response.text)
             logging.debug('RSA/session token success')
             self.session_token = data['token']
+            self.session_token_expire_at = data.get('expireAt')
             self.auth_retries = 0
 
 
@@ -137,4 +184,73 @@ class SymBotRSAAuth(APIClient):
             data = json.loads(response.text)
             logging.debug('RSA/key manager token success')
             self.key_manager_token = data['token']
+            self.key_manager_token_expire_at = data.get('expireAt')
             self.auth_retries = 0
+
+    async def authenticate_async(self):
+        """
+        Get the session and key manager token without blocking the event loop. Both are
+        requested at the same time.
+        """
+        logging.debug('RSA Auth/authenticate_async()')
+        await wait_for_auth_window(self)
+        self.last_auth_time = int(round(time.time() * 1000))
+        await asyncio.gather(self.session_authenticate_async(), self.key_manager_authenticate_async())
+
+    async def session_authenticate_async(self):
+        """
+        Get the session token by calling API using jwt token, asynchronously
+        """
+        logging.debug('RSA_auth/session_authenticate_async()')
+        url = self.config.data['sessionAuthUrl'] + '/login/pubkey/authenticate'
+        data = await post_for_token(
+            self.get_async_auth_session(), url, auth_endpoint_constants['MAX_RSA_RETRY'],
+            proxy=self.config.data['podProxyRequestObject'].get('http'),
+            ssl_context=self._get_async_ssl_context(), json={'token': self.create_jwt()}
+        )
+        logging.debug('RSA/session token success')
+        self.session_token = data['token']
+        self.session_token_expire_at = data.get('expireAt')
+
+    async def key_manager_authenticate_async(self):
+        """
+        Get the key manager token by calling API using jwt token, asynchronously
+        """
+        logging.debug('RSA_auth/key_manager_authenticate_async()')
+        url = self.config.data['keyAuthUrl'] + '/relay/pubkey/authenticate'
+        data = await post_for_token(
+            self.get_async_auth_session(), url, auth_endpoint_constants['MAX_RSA_RETRY'],
+            proxy=self.config.data['keyManagerProxyRequestObject'].get('http'),
+            ssl_context=self._get_async_ssl_context(), json={'token': self.create_jwt()}
+        )
+        logging.debug('RSA/key manager token success')
+        self.key_manager_token = data['token']
+        self.key_manager_token_expire_at = data.get('expireAt')
+
+    def get_async_auth_session(self):
+        """aiohttp session of the asynchronous authentications, must be called from within the
+        running event loop"""
+        if self.async_auth_session is None or self.async_auth_session.closed:
+            self.async_auth_session = aiohttp.ClientSession()
+        return self.async_auth_session
+
+    async def close_async_auth_session(self):
+        if self.async_auth_session is not None:
+            await self.async_auth_session.close()
+            self.async_auth_session = None
+
+    def _get_async_ssl_context(self):
+        if self._async_ssl_context is None:
+            self._async_ssl_context = create_ssl_context(self.config)
+        return self._async_ssl_context
+
+
+def _sign_jwt(private_key, payload):
+    """Encode payload as a JWT signed with private_key, a jose Key, as jose.jwt.encode does
+    but without parsing the key again"""
+    segments = [
+        base64url_encode(json.dumps(part, separators=(',', ':')).encode('utf-8'))
+        for part in ({'alg': 'RS512', 'typ': 'JWT'}, payload)
+    ]
+    signing_input = b'.'.join(segments)
+    return b'.'.join([signing_input, base64url_encode(private_key.sign(signing_input))]).decode('utf-8')
@@ -1,6 +1,9 @@
 import logging
+from functools import partial
 
 from .api_client import APIClient
+from .endpoint import endpoint, rest_call
+from .paginator import Paginator
 
 
 # child class of APIClient --> Extends error handling functionality
@@ -11,6 +14,7 @@ class AdminClient(APIClient):
     def __init__(self, bot_client):
         self.bot_client = bot_client
 
+    @endpoint
     def admin_get_user(self, user_id):
         """
         Returns details for a particular user.
@@ -20,8 +24,9 @@ class AdminClient(APIClient):
         """
         logging.debug('AdminClient/admin_get_user()')
         url = '/pod/v2/admin/user/{0}'.format(user_id)
-        return self.bot_client.execute_rest_call("GET", url)
+        return rest_call("GET", url)
 
+    @endpoint
     def admin_list_users(self, skip=0, limit=50):
         """
         Returns a list of users ID, including user metadata
@@ -32,8 +37,16 @@ class AdminClient(APIClient):
         url = '/pod/v2/admin/user/list'
         params = {'skip': skip, 'limit': limit}
 
-        return self.bot_client.execute_rest_call("GET", url, params=params)
+        return rest_call("GET", url, params=params)
+
+    def iter_admin_list_users(self, page_size=50, max_items=None):
+        """
+        Iterate over the users of admin_list_users, page after page, see Paginator.
+        """
+        return Paginator(self.bot_client, partial(self.admin_list_users.build, self), page_size=page_size,
+                         max_items=max_items)
     
+    @endpoint
     def admin_create_user(self, user_attributes):
         """
         Creates a new user, either End-User or Service User.
@@ -51,8 +64,9 @@ class AdminClient(APIClient):
         """
         logging.debug('AdminClient/admin_list_users()')
         url = '/pod/v2/admin/user/create'
-        return self.bot_client.execute_rest_call("POST", url, json=user_attributes)
+        return rest_call("POST", url, json=user_attributes)
     
+    @endpoint
     def admin_update_user(self, user_id, updated_user_attributes):
         """
         Updates an existing user.
@@ -125,8 +139,9 @@ class AdminClient(APIClient):
         """
         logging.debug('AdminClient/admin_update_user()')
         url = '/pod/v2/admin/user/{0}/update'.format(user_id)
-        return self.bot_client.execute_rest_call("POST", url, json=updated_user_attributes)
+        return rest_call("POST", url, json=updated_user_attributes)
 
+    @endpoint
     def admin_get_user_avatar(self, user_id):
         """
         Returns the URL of the avatar of a particular user.
@@ -135,8 +150,9 @@ class AdminClient(APIClient):
         """
         logging.debug('AdminClient/admin_get_user_avatar')
         url = '/pod/v1/admin/user/{0}/avatar'.format(user_id)
-        return self.bot_client.execute_rest_call("GET", url)
+        return rest_call("GET", url)
 
+    @endpoint
     def admin_update_avatar(self, user_id, image_encoded_string):
         """
         Updates the avatar of a particular user. file_path to base64 encoded image
@@ -149,8 +165,9 @@ class AdminClient(APIClient):
         url = '/pod/v1/admin/user/{0}/avatar/update'.format(user_id)
         #base64encode the image file
         data = {'image': image_encoded_string}
-        return self.bot_client.execute_rest_call("POST", url, json=data)    
+        return rest_call("POST", url, json=data)    
 
+    @endpoint
     def admin_get_user_status(self, user_id):
         """
         Get the status, active or inactive, for a particular user.
@@ -159,8 +176,9 @@ class AdminClient(APIClient):
         """
         logging.debug('AdminClient/admin_get_user_status()')
         url = '/pod/v1/admin/user/{0}/status'.format(user_id)
-        return self.bot_client.execute_rest_call("GET", url)
+        return rest_call("GET", url)
 
+    @endpoint
     def admin_update_user_status(self, user_id, status):
         """
         Update the status of a particular user.
@@ -172,8 +190,9 @@ class AdminClient(APIClient):
         logging.debug('AdminClient/admin_update_user_status()')
         url = '/pod/v1/admin/user/{0}/status/update'.format(user_id)
         data  = {'status': status}
-        return self.bot_client.execute_rest_call("POST", url, json=data)
+        return rest_call("POST", url, json=data)
 
+    @endpoint
     def admin_list_pod_features(self):
         """
         Returns the full set of Symphony features available for this pod.
@@ -209,8 +228,9 @@ Calling this endpoint requires the User Provisioning role with ACCESS_USER_PROVI
 """
         logging.debug('AdminClient/admin_list_pod_features()')
         url = '/pod/v1/admin/system/features/list'
-        return self.bot_client.execute_rest_call("GET", url)
+        return rest_call("GET", url)
 
+    @endpoint
     def admin_get_user_features(self, user_id):
         """
         Returns the list of Symphony feature entitlements for a particular user.
@@ -221,8 +241,9 @@ Calling this endpoint requires the User Provisioning role with ACCESS_USER_PROVI
         """
         logging.debug('AdminClient/admin_get_user_features()')
         url = '/pod/v1/admin/user/{0}/features'.format(user_id)
-        return self.bot_client.execute_rest_call("GET", url)
+        return rest_call("GET", url)
 
+    @endpoint
     def admin_update_user_features(self, user_id, feature_list):
         """
         Updates the feature entitlements for a particular user.
@@ -233,8 +254,9 @@ Calling this endpoint requires the User Provisioning role with ACCESS_USER_PROVI
         """
         logging.debug('AdminClient/admin_update_user_features()')
         url = '/pod/v1/admin/user/{0}/features/update'.format(user_id)
-        return self.bot_client.execute_rest_call("POST", url, json=feature_list)
+        return rest_call("POST", url, json=feature_list)
 
+    @endpoint
     def admin_find_users(self, filters, skip=0, limit=50):
         """
         Finds a list of users based on a specified role or feature entitlement.
@@ -250,8 +272,16 @@ Calling this endpoint requires the User Provisioning role with ACCESS_USER_PROVI
         logging.debug('AdminClient/admin_find_users()')
         url = '/pod/v1/admin/user/find'
         params = {'skip': skip, 'limit': limit}
-        return self.bot_client.execute_rest_call("POST", url, params=params, json=filters)
+        return rest_call("POST", url, params=params, json=filters)
+
+    def iter_admin_find_users(self, filters, page_size=50, max_items=None):
+        """
+        Iterate over the users of admin_find_users, page after page, see Paginator.
+        """
+        return Paginator(self.bot_client, partial(self.admin_find_users.build, self, filters),
+                         page_size=page_size, max_items=max_items)
 
+    @endpoint
     def admin_list_roles(self):
         """
         Returns a list of all roles available in the company (pod).
@@ -260,8 +290,9 @@ Calling this endpoint requires the User Provisioning role with ACCESS_USER_PROVI
         """
         logging.debug('AdminClient/admin_list_roles()')
         url = '/pod/v1/admin/system/roles/list'
-        return self.bot_client.execute_rest_call("GET", url)
+        return rest_call("GET", url)
 
+    @endpoint
     def admin_add_role(self, user_id, payload={}):
         """
         Add a role or optional entitleable action to a user's account. For example: {"id":"COMPLIANCE_OFFICER.MONITOR_ROOMS"}
@@ -271,8 +302,9 @@ Calling this endpoint requires the User Provisioning role with ACCESS_USER_PROVI
         logging.debug('AdminClient/admin_add_role()')
         url = '/pod/v1/admin/user/{0}/roles/add'.format(user_id)
 
-        return self.bot_client.execute_rest_call("POST", url, json=payload)
+        return rest_call("POST", url, json=payload)
 
+    @endpoint
     def admin_remove_role(self, user_id, payload={}):
         """
         Remove a role or optional entitleable action to a user's account. For example: {"id":"L2_SUPPORT"}
@@ -281,19 +313,21 @@ Calling this endpoint requires the User Provisioning role with ACCESS_USER_PROVI
         """
         logging.debug('AdminClient/admin_remove_role()')
         url = '/pod/v1/admin/user/{0}/roles/remove'.format(user_id)
-        return self.bot_client.execute_rest_call("POST", url, json=payload)
+        return rest_call("POST", url, json=payload)
 
 
+    @endpoint
     def import_message(self, imported_message):
         logging.debug('MessageClient/import_message()')
         url = '/agent/v4/message/import'
-        return self.bot_client.execute_rest_call("POST", url, json=imported_message)
+        return rest_call("POST", url, json=imported_message)
 
     # go on admin clients
+    @endpoint
     def suppress_message(self, message_id):
         logging.debug('MessageClient/suppress_message()')
         url = '/pod/v1/admin/messagesuppression/{0}/suppress'.format(message_id)
-        return self.bot_client.execute_rest_call("POST", url)
+        return rest_call("POST", url)
 
 
 
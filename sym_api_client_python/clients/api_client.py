@@ -4,6 +4,7 @@ import aiohttp
 import requests
 from requests_toolbelt.multipart.encoder import MultipartEncoder
 
+from .endpoint import add_async_endpoints
 from ..exceptions.APIClientErrorException import APIClientErrorException
 from ..exceptions.DatafeedExpiredException import DatafeedExpiredException
 from ..exceptions.ForbiddenException import ForbiddenException
@@ -21,11 +22,19 @@ class APIClient:
     def __init__(self, bot_client):
         self.bot_client = bot_client
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # The methods decorated with @endpoint get their _async version, see endpoint
+        add_async_endpoints(cls)
+
     def make_mulitpart_form(self, fields, aio=False):
         """Create a multipart form to be used across the Symphony API, that works for both requests
         and the asynchronous aiohttp. Requests basically uses requests-toolbelt, but it's a little
         bit more involved for aiohttp. The output of this is expected to be passed to either
-        execute_rest_request or execute_rest_request_async depending whether aio was true"""
+        execute_rest_request or execute_rest_request_async depending whether aio was true.
+
+        fields is a dict, or a list of (name, value) pairs for a name used more than once. A value
+        is either a string or a (filename, file object, content type) tuple"""
 
         if aio:
             # This appears to be the canonical way to use aiohttp to pass mulipart data into the API
@@ -35,14 +44,14 @@ class APIClient:
             # encodes as a application/x-www-form-urlencoded that Symphony doesn't appear to like for
             # attachments
             with aiohttp.MultipartWriter("form-data") as data:
-                for k, v in fields.items():
-                    if len(v) == 1:
-                        part = data.append(v)
-                        part.set_content_disposition("form-data", name=k)
-                    if len(v) == 3:
+                for k, v in (fields.items() if isinstance(fields, dict) else fields):
+                    if isinstance(v, tuple) and len(v) == 3:
                         filename, file_object, content_type = v
                         part = data.append(file_object, {'Content-Type': content_type})
                         part.set_content_disposition('form-data', name=k, filename=filename)
+                    else:
+                        part = data.append(v)
+                        part.set_content_disposition("form-data", name=k)
 
             headers = {
                 'Content-Type': 'multipart/form-data; boundary=' + data.boundary
@@ -58,7 +67,9 @@ class APIClient:
 
         return {"data": data, "headers": headers}
 
-    def handle_error(self, response, bot_client, error_json=None, text=None):
+    def handle_error(self, response, bot_client, error_json=None, text=None, token_generation=None):
+        """Raise the exception matching the status of response. On a 401 the tokens are refreshed
+        first, unless they already have been since token_generation, see TokenRefresher"""
         logging.debug('api_client/handle_error() function started')
         _error_field = "message"
         if isinstance(response, requests.Response):
@@ -91,7 +102,7 @@ class APIClient:
 
         elif status == 401:
             logging.debug('api_client()/handling 401 error')
-            bot_client.reauth_client()
+            bot_client.reauth_client(token_generation)
             logging.debug('api_client()/successfully reauthenticated')
             raise UnauthorizedException(
                 'User, unauthorized, refreshing tokens: {}'
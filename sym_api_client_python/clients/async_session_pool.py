@@ -0,0 +1,98 @@
+import logging
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+log = logging.getLogger(__name__)
+
+AsyncPoolStats = namedtuple('AsyncPoolStats', 'host limit limit_per_host acquired idle')
+
+
+class AsyncSessionPool:
+    """Owns the aiohttp sessions used by SymBotClient for asynchronous calls.
+
+    Each host gets one TCPConnector, shared by every session talking to that host, so that a pod
+    and an agent behind the same hostname share warm keep-alive connections. Sessions are never
+    rebuilt while the pool is open: when tokens are rotated the default headers of the existing
+    sessions are updated in place, see update_headers.
+
+    The connector settings come from the config:
+
+        asyncConnectionLimit: total connections per host connector, 0 for no limit. Defaults to 100
+        asyncConnectionLimitPerHost: connections per (host, port, ssl) endpoint, 0 for no limit.
+                                     Defaults to 0
+        asyncKeepaliveTimeout: seconds an idle connection is kept open. Defaults to 15
+        asyncDnsCacheTtl: seconds DNS lookups are cached, None to cache forever. Defaults to 10
+
+    Sessions must be created from within the running event loop.
+    """
+
+    def __init__(self, limit=100, limit_per_host=0, keepalive_timeout=15, ttl_dns_cache=10):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self._connectors = {}
+        self._sessions = {}
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            limit=config.data.get('asyncConnectionLimit', 100),
+            limit_per_host=config.data.get('asyncConnectionLimitPerHost', 0),
+            keepalive_timeout=config.data.get('asyncKeepaliveTimeout', 15),
+            ttl_dns_cache=config.data.get('asyncDnsCacheTtl', 10),
+        )
+
+    def get_session(self, name, base_url, headers):
+        """Return the session registered as name, creating it with the connector of the host of
+        base_url and the given default headers if it doesn't exist yet"""
+        session = self._sessions.get(name)
+        if session is None or session.closed:
+            host = urlsplit(base_url).netloc
+            log.debug('AsyncSessionPool/get_session() - creating {} session for {}'.format(name, host))
+            session = aiohttp.ClientSession(
+                headers=headers,
+                connector=self._get_connector(host),
+                connector_owner=False,
+            )
+            self._sessions[name] = session
+        return session
+
+    def update_headers(self, name, headers):
+        """Replace default headers of an existing session without closing its connections"""
+        session = self._sessions.get(name)
+        if session is not None and not session.closed:
+            session.headers.update(headers)
+
+    def get_stats(self):
+        """Return an AsyncPoolStats per host: its configured limits and the number of connections
+        currently in use and idle in the keep-alive pool"""
+        stats = []
+        for host, connector in self._connectors.items():
+            # aiohttp doesn't expose these counts publicly
+            acquired = len(getattr(connector, '_acquired', ()))
+            idle = sum(len(conns) for conns in getattr(connector, '_conns', {}).values())
+            stats.append(AsyncPoolStats(host, connector.limit, connector.limit_per_host, acquired, idle))
+        return stats
+
+    async def close(self):
+        for session in self._sessions.values():
+            await session.close()
+        for connector in self._connectors.values():
+            await connector.close()
+        self._sessions = {}
+        self._connectors = {}
+
+    def _get_connector(self, host):
+        connector = self._connectors.get(host)
+        if connector is None or connector.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.ttl_dns_cache,
+            )
+            self._connectors[host] = connector
+        return connector
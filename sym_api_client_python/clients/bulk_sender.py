@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .message_client import MESSAGE_CREATE
+from .retry_policy import RetryPolicy
+
+BulkSendResult = namedtuple('BulkSendResult', 'stream_id response error')
+
+# Statuses of a message send worth retrying: rate limited, or the agent or pod failing for a moment
+BULK_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """Rate limiter letting rate calls through per second on average, and up to burst at once.
+
+    Each call reserves a token and waits until it is due, so calls made from threads and from
+    coroutines are spaced out in the order they reserved their token.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError('A token bucket needs a positive rate, got {}'.format(rate))
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, rate)
+        self.clock = clock
+
+        self._tokens = self.burst
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token and return the seconds to wait before it is due"""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class BulkSender:
+    """Sends many messages concurrently, at most rate of them per second.
+
+    Messages are given as (stream_id, outbound_msg) pairs, the outbound_msg being that of
+    MessageClient.send_msg, or as one message for many streams with broadcast:
+
+        bulk_sender = bot_client.get_bulk_sender()
+        results = bulk_sender.broadcast(stream_ids, dict(message='<messageML>Alert</messageML>'))
+        results = await bulk_sender.send_async([(stream_id, outbound_msg), ...])
+
+    max_concurrency messages are in flight at once, on as many threads with send and broadcast, or
+    as many coroutines with send_async and broadcast_async. The rate limit is shared by all the
+    sends of a BulkSender.
+
+    A BulkSendResult is returned for each message, in order, with either the response of the
+    agent or the error raised by the send. Sends returning one of retry_policy's statuses, by
+    default 429 and 5xx, are retried with its backoff, and a Retry-After header is honoured.
+    """
+
+    def __init__(self, bot_client, rate=50, burst=None, max_concurrency=10, retry_policy=None):
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1, got {}'.format(max_concurrency))
+        self.bot_client = bot_client
+        self.max_concurrency = max_concurrency
+        self.retry_policy = retry_policy or RetryPolicy(retry_statuses=BULK_RETRY_STATUSES)
+        self.token_bucket = TokenBucket(rate, burst)
+
+    @classmethod
+    def from_config(cls, bot_client, config):
+        """Build a sender with the bulkSendRate (messages per second), bulkSendBurst and
+        bulkSendConcurrency config values"""
+        return cls(bot_client, rate=config.data.get('bulkSendRate', 50),
+                   burst=config.data.get('bulkSendBurst'),
+                   max_concurrency=config.data.get('bulkSendConcurrency', 10))
+
+    def send(self, messages):
+        """Send (stream_id, outbound_msg) pairs, return their BulkSendResults in order"""
+        messages = list(messages)
+        logging.debug('BulkSender/send() - {} messages'.format(len(messages)))
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(messages) or 1)) as executor:
+            return list(executor.map(lambda message: self._send_one(*message), messages))
+
+    def broadcast(self, stream_ids, outbound_msg):
+        """Send the same message to every stream of stream_ids"""
+        return self.send((stream_id, outbound_msg) for stream_id in stream_ids)
+
+    async def send_async(self, messages):
+        messages = list(messages)
+        logging.debug('BulkSender/send_async() - {} messages'.format(len(messages)))
+        results = [None] * len(messages)
+        pending = iter(enumerate(messages))
+
+        async def worker():
+            for index, (stream_id, outbound_msg) in pending:
+                results[index] = await self._send_one_async(stream_id, outbound_msg)
+
+        await asyncio.gather(*[worker() for _ in range(min(self.max_concurrency, len(messages)))])
+        return results
+
+    async def broadcast_async(self, stream_ids, outbound_msg):
+        return await self.send_async((stream_id, outbound_msg) for stream_id in stream_ids)
+
+    def _send_one(self, stream_id, outbound_msg):
+        self.token_bucket.acquire()
+        try:
+            response = self.bot_client.execute_rest_call(
+                'POST', MESSAGE_CREATE.format(stream_id=stream_id), files=outbound_msg,
+                retry_policy=self.retry_policy)
+        except Exception as exc:
+            logging.debug('BulkSender/_send_one() - sending to {} failed: {}'.format(stream_id, exc))
+            return BulkSendResult(stream_id, None, exc)
+        return BulkSendResult(stream_id, response, None)
+
+    async def _send_one_async(self, stream_id, outbound_msg):
+        await self.token_bucket.acquire_async()
+        try:
+            response = await self.bot_client.execute_rest_call_async(
+                'POST', MESSAGE_CREATE.format(stream_id=stream_id), files=outbound_msg,
+                retry_policy=self.retry_policy)
+        except Exception as exc:
+            logging.debug('BulkSender/_send_one_async() - sending to {} failed: {}'.format(stream_id, exc))
+            return BulkSendResult(stream_id, None, exc)
+        return BulkSendResult(stream_id, response, None)
@@ -0,0 +1,71 @@
+import logging
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+log = logging.getLogger(__name__)
+
+# Only these are retried by the adapter, anything else may have had side effects on the server
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+
+# Defaults match those of requests, i.e. a plain requests.Session()
+DEFAULT_POOL_CONFIG = {
+    'poolConnections': 10,
+    'poolMaxsize': 10,
+    'poolBlock': False,
+    'maxRetries': 0,
+    'backoffFactor': 0,
+    'retryStatuses': [429, 502, 503, 504],
+}
+
+
+def merge_pool_config(*pool_configs):
+    """Merge connection pool config dicts over the defaults, later ones taking precedence.
+    None entries are skipped."""
+    merged = dict(DEFAULT_POOL_CONFIG)
+    for pool_config in pool_configs:
+        if pool_config:
+            merged.update(pool_config)
+    return merged
+
+
+def build_retry(pool_config):
+    """Build the urllib3 Retry for a pool config. Connection errors are retried for every method
+    since the request never reached the server, but read errors and the retryStatuses only for
+    idempotent methods. Retry-After headers are honoured, and once retries are exhausted the last
+    response is returned rather than raised so the usual error handling applies. Without retries
+    it is the Retry of a plain HTTPAdapter, which raises a read timeout as a ReadTimeout."""
+    if not pool_config['maxRetries']:
+        return Retry(0, read=False)
+    retry_kwargs = dict(
+        total=pool_config['maxRetries'],
+        backoff_factor=pool_config['backoffFactor'],
+        status_forcelist=pool_config['retryStatuses'],
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    try:
+        return Retry(allowed_methods=IDEMPOTENT_METHODS, **retry_kwargs)
+    except TypeError:
+        # urllib3 < 1.26
+        return Retry(method_whitelist=IDEMPOTENT_METHODS, **retry_kwargs)
+
+
+def adapter_kwargs(pool_config):
+    """Keyword arguments of HTTPAdapter, or one of its subclasses, for a pool config"""
+    return {
+        'pool_connections': pool_config['poolConnections'],
+        'pool_maxsize': pool_config['poolMaxsize'],
+        'pool_block': pool_config['poolBlock'],
+        'max_retries': build_retry(pool_config),
+    }
+
+
+def mount_http_adapter(session, url, pool_config, adapter_class=HTTPAdapter, **kwargs):
+    """Mount an adapter sized from pool_config on session for every request starting with url.
+    Extra kwargs are passed to adapter_class, e.g. the certificate of a Pkcs12Adapter."""
+    log.debug('connection_pool/mount_http_adapter() - {} for {}: {}'
+              .format(adapter_class.__name__, url, pool_config))
+    adapter = adapter_class(**adapter_kwargs(pool_config), **kwargs)
+    session.mount(url, adapter)
+    return adapter
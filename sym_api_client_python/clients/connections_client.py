@@ -1,6 +1,7 @@
 import logging
 
 from .api_client import APIClient
+from .endpoint import endpoint, rest_call
 
 
 # child class of APIClient --> Extends error handling functionality
@@ -11,6 +12,7 @@ class ConnectionsClient(APIClient):
     def __init__(self, bot_client):
         self.bot_client = bot_client
 
+    @endpoint
     def create_connection(self, user_id):
         """
         Pods from all users involved need to have crossPod enabled between them.
@@ -22,8 +24,9 @@ class ConnectionsClient(APIClient):
         logging.debug('ConnectionsClient/create_connection()')
         url = '/pod/v1/connection/create'
         data = {'userId': user_id}
-        return self.bot_client.execute_rest_call('POST', url, json=data)
+        return rest_call('POST', url, json=data)
 
+    @endpoint
     def get_connection(self, user_id):
         """
         When calling this as an OBO-enabled endpoint,
@@ -31,8 +34,9 @@ class ConnectionsClient(APIClient):
         """
         logging.debug('ConnectionsClient/get_connection()')
         url = '/pod/v1/connection/user/{0}/info'.format(user_id)
-        return self.bot_client.execute_rest_call('GET', url)
+        return rest_call('GET', url)
 
+    @endpoint
     def list_connections(self, status, **kwargs):
         """
         This retrieves all connections of the requesting user.
@@ -45,8 +49,9 @@ class ConnectionsClient(APIClient):
         logging.debug('ConnectionsClient/list_connections()')
         url = '/pod/v1/connection/list'
         params = {'status' : status}
-        return self.bot_client.execute_rest_call('GET', url, params=params)
+        return rest_call('GET', url, params=params)
 
+    @endpoint
     def accept_connection(self, user_id):
         """
         This allows the user to accept a specific connection request.
@@ -56,8 +61,9 @@ class ConnectionsClient(APIClient):
         logging.debug('ConnectionsClient/accept_connection()')
         url = '/pod/v1/connection/accept'
         data = {'userId': user_id}
-        return self.bot_client.execute_rest_call('POST', url, json=data)
+        return rest_call('POST', url, json=data)
 
+    @endpoint
     def reject_connection(self, user_id):
         """
         This allows the user to reject a specific connection request.
@@ -68,8 +74,9 @@ class ConnectionsClient(APIClient):
         logging.debug('ConnectionsClient/reject_connection()')
         url = '/pod/v1/connection/reject'
         data = {'userId': user_id}
-        return self.bot_client.execute_rest_call('POST', url, json=data)
+        return rest_call('POST', url, json=data)
 
+    @endpoint
     def remove_connection(self, user_id):
         """
         Removes a connection with a user.
@@ -79,5 +86,5 @@ class ConnectionsClient(APIClient):
         """
         logging.debug('ConnectionsClient/remove_connection()')
         url = '/pod/v1/connection/user/{0}/remove'.format(user_id)
-        return self.bot_client.execute_rest_call('POST', url)
+        return rest_call('POST', url)
 
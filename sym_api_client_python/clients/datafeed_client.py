@@ -57,6 +57,19 @@ class DataFeedClient(APIClient):
         """
         return self.datafeed_client.read_datafeed(datafeed_id, *ackId)
 
+    def iter_datafeed(self, datafeed_id, *ackId):
+        """
+        Streaming version of read_datafeed, a generator of the events read.
+
+        The events are yielded as they are parsed off the response, rather than once the whole
+        of it has been read and decoded, so that handling a large read can start with its first
+        events and only a chunk of the response is held in memory. The ack id returned by
+        get_ack_id is updated once the generator is exhausted.
+
+        This feature is not supported in datafeed v1.
+        """
+        return self.datafeed_client.iter_datafeed(datafeed_id, *ackId)
+
     def list_datafeed_id(self):
         """
         List datafeeds for a user's auth session.
@@ -98,10 +111,40 @@ class DataFeedClient(APIClient):
         return self.datafeed_client.get_ack_id()
 
 
-    async def read_datafeed_async(self, datafeed_id):
+    async def create_datafeed_async(self):
+        """
+        Asynchronous version of create_datafeed, should be called with the await keyword
+        """
+        return await self.datafeed_client.create_datafeed_async()
+
+    async def read_datafeed_async(self, datafeed_id, *ackId):
         """
         This works the same as the previous datafeed apart from it's asynchronous and therefore should be called with the await keyword
 
         See read_datafeed for more info
         """
-        return await self.datafeed_client.read_datafeed_async(datafeed_id)
+        return await self.datafeed_client.read_datafeed_async(datafeed_id, *ackId)
+
+    def iter_datafeed_async(self, datafeed_id, *ackId):
+        """
+        Asynchronous version of iter_datafeed, an async generator to be iterated with async for
+
+        This feature is not supported in datafeed v1.
+        """
+        return self.datafeed_client.iter_datafeed_async(datafeed_id, *ackId)
+
+    async def list_datafeed_id_async(self):
+        """
+        Asynchronous version of list_datafeed_id, should be called with the await keyword
+
+        This feature is not supported in datafeed v1.
+        """
+        return await self.datafeed_client.list_datafeed_id_async()
+
+    async def delete_datafeed_async(self, datafeed_id):
+        """
+        Asynchronous version of delete_datafeed, should be called with the await keyword
+
+        This feature is not supported in datafeed v1.
+        """
+        await self.datafeed_client.delete_datafeed_async(datafeed_id)
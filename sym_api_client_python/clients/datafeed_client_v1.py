@@ -22,6 +22,10 @@ class DataFeedClientV1(APIClient):
         datafeed_read = self.bot_client.execute_rest_call("GET", url)
         return datafeed_read
 
+    def iter_datafeed(self, datafeed_id, *ackId):
+        logging.debug('DataFeedClientV1/iter_datafeed()')
+        raise TypeError("This function is not supported for the DF V1 client.")
+
     def list_datafeed_id(self):
         logging.debug('DataFeedClientV1/list_datafeed_id()')
         raise TypeError("This function is not supported for the DF V1 client.")
@@ -35,7 +39,15 @@ class DataFeedClientV1(APIClient):
         raise TypeError("This function is not supported for the DF V1 client.")
 
 
-    async def read_datafeed_async(self, datafeed_id):
+    async def create_datafeed_async(self):
+
+        url = '/agent/v4/datafeed/create'
+        response = await self.bot_client.execute_rest_call_async("POST", url)
+        datafeed_id = response.get('id')
+        logging.debug('DataFeedClientV1/create_datafeed_async() --> {}'.format(datafeed_id))
+        return datafeed_id
+
+    async def read_datafeed_async(self, datafeed_id, *ackId):
 
         logging.debug('DataFeedClientV1/read_datafeed_async()')
         url = '/agent/v4/datafeed/{0}/read'.format(datafeed_id)
@@ -43,3 +55,15 @@ class DataFeedClientV1(APIClient):
 
         return datafeed_read
 
+    def iter_datafeed_async(self, datafeed_id, *ackId):
+        logging.debug('DataFeedClientV1/iter_datafeed_async()')
+        raise TypeError("This function is not supported for the DF V1 client.")
+
+    async def list_datafeed_id_async(self):
+        logging.debug('DataFeedClientV1/list_datafeed_id_async()')
+        raise TypeError("This function is not supported for the DF V1 client.")
+
+    async def delete_datafeed_async(self, datafeed_id):
+        logging.debug('DataFeedClientV1/delete_datafeed_async()')
+        raise TypeError("This function is not supported for the DF V1 client.")
+
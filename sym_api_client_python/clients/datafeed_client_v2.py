@@ -1,7 +1,11 @@
 from .api_client import APIClient
+from .json_stream import JsonArrayStreamParser
 import logging
 import json
 
+# Size of the chunks of the body parsed at a time by the streaming reads
+_STREAM_CHUNK_SIZE = 65536
+
 class DataFeedClientV2(APIClient):
     def __init__(self, bot_client):
         self.bot_client = bot_client
@@ -33,6 +37,27 @@ class DataFeedClientV2(APIClient):
         events = datafeed_read.get("events")
         return events
 
+    def iter_datafeed(self, datafeed_id, *ackId):
+        """
+        DF 2 Version: Streaming read_datafeed, yields the events as they are parsed off the
+        response, so that the first ones can be handled before the rest of a large read has
+        arrived. The ack id is updated once the whole response has been read.
+        """
+        logging.debug('DataFeedClientV2/iter_datafeed()')
+        url = '/agent/v5/datafeeds/{0}/read'.format(datafeed_id)
+        data = {"ackId": ackId[0] if ackId else ""}
+
+        response = self.bot_client.execute_rest_call("POST", url, json=data, stream=True)
+        try:
+            if response.status_code == 204:
+                return
+            parser = JsonArrayStreamParser("events")
+            for chunk in response.iter_content(_STREAM_CHUNK_SIZE):
+                yield from parser.feed(chunk)
+            self.ackid = parser.close().get("ackId")
+        finally:
+            response.close()
+
     def list_datafeed_id(self):
         logging.debug('DataFeedClientV2/list_datafeed()')
         url = '/agent/v5/datafeeds'
@@ -45,4 +70,60 @@ class DataFeedClientV2(APIClient):
         self.bot_client.execute_rest_call("DELETE", url)
 
     def get_ack_id(self):
-        return self.ackid
\ No newline at end of file
+        return self.ackid
+
+    async def create_datafeed_async(self):
+        url = '/agent/v5/datafeeds'
+        response = await self.bot_client.execute_rest_call_async("POST", url)
+
+        datafeed_id = response.get("id")
+        logging.debug('DataFeedClientV2/create_datafeed_async() --> {}'.format(datafeed_id))
+        return datafeed_id
+
+    async def read_datafeed_async(self, datafeed_id, *ackId):
+        """
+        DF 2 Version: We need to use an ack Id to make sure the events are well received
+        """
+        logging.debug('DataFeedClientV2/read_datafeed_async()')
+        url = '/agent/v5/datafeeds/{0}/read'.format(datafeed_id)
+        data = {}
+        if len(ackId) == 0:
+            data["ackId"] = ""
+        else:
+            data["ackId"] = ackId[0]
+
+        datafeed_read = await self.bot_client.execute_rest_call_async("POST", url, json=data)
+        self.ackid = datafeed_read.get("ackId")
+        events = datafeed_read.get("events")
+        return events
+
+    async def iter_datafeed_async(self, datafeed_id, *ackId):
+        """
+        DF 2 Version: Asynchronous version of iter_datafeed, to be iterated with async for
+        """
+        logging.debug('DataFeedClientV2/iter_datafeed_async()')
+        url = '/agent/v5/datafeeds/{0}/read'.format(datafeed_id)
+        data = {"ackId": ackId[0] if ackId else ""}
+
+        response = await self.bot_client.execute_rest_call_async("POST", url, json=data, stream=True)
+        try:
+            if response.status == 204:
+                return
+            parser = JsonArrayStreamParser("events")
+            async for chunk in response.content.iter_chunked(_STREAM_CHUNK_SIZE):
+                for event in parser.feed(chunk):
+                    yield event
+            self.ackid = parser.close().get("ackId")
+        finally:
+            response.release()
+
+    async def list_datafeed_id_async(self):
+        logging.debug('DataFeedClientV2/list_datafeed_async()')
+        url = '/agent/v5/datafeeds'
+        datafeed_ids = await self.bot_client.execute_rest_call_async("GET", url)
+        return datafeed_ids
+
+    async def delete_datafeed_async(self, datafeed_id):
+        logging.debug('DataFeedClientV2/delete_datafeed_async()')
+        url = '/agent/v5/datafeeds/{0}'.format(datafeed_id)
+        await self.bot_client.execute_rest_call_async("DELETE", url)
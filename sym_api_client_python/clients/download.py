@@ -0,0 +1,94 @@
+import base64
+import binascii
+import hashlib
+import io
+import os
+from collections import namedtuple
+from contextlib import contextmanager
+
+from ..exceptions.AttachmentIntegrityException import AttachmentIntegrityException
+
+# Bytes of the response read at a time by the attachment downloads
+CHUNK_SIZE = 65536
+
+AttachmentDownload = namedtuple('AttachmentDownload', 'size checksum')
+
+# Around the base64 of the body: line breaks, and the quotes of a JSON string
+_IGNORED = b' \t\r\n"'
+
+
+class AttachmentDecoder:
+    """Decodes the base64 body of an attachment fed in chunks of any size, and checks its size and
+    checksum once it has all been fed:
+
+        decoder = AttachmentDecoder(expected_size=attachment['size'])
+        for chunk in chunks:
+            file.write(decoder.feed(chunk))
+        file.write(decoder.close())
+        size, checksum = decoder.verify()
+
+    checksum is the hex digest of the decoded attachment with checksum_algorithm, any name known
+    to hashlib, and is compared with expected_checksum when one is given.
+    """
+
+    def __init__(self, expected_size=None, expected_checksum=None, checksum_algorithm='sha256'):
+        self.expected_size = expected_size
+        self.expected_checksum = expected_checksum.lower() if expected_checksum else None
+        self.size = 0
+
+        self._hash = hashlib.new(checksum_algorithm)
+        self._pending = b''
+
+    def feed(self, data):
+        """Return the bytes decoded from data, a chunk of base64. Those that aren't a multiple of 4
+        are kept for the next chunk"""
+        data = self._pending + data.translate(None, _IGNORED)
+        end = len(data) - len(data) % 4
+        self._pending = data[end:]
+        return self._decode(data[:end])
+
+    def close(self):
+        if self._pending:
+            raise AttachmentIntegrityException('Attachment body is not valid base64, it ends with {} extra '
+                                               'characters'.format(len(self._pending)))
+        return b''
+
+    def verify(self):
+        """Return the size and checksum of the attachment, raise AttachmentIntegrityException when
+        they aren't those expected"""
+        checksum = self._hash.hexdigest()
+        if self.expected_size is not None and self.size != self.expected_size:
+            raise AttachmentIntegrityException('Attachment has {} bytes, expected {}'
+                                               .format(self.size, self.expected_size))
+        if self.expected_checksum is not None and checksum != self.expected_checksum:
+            raise AttachmentIntegrityException('Attachment has the {} checksum {}, expected {}'
+                                               .format(self._hash.name, checksum, self.expected_checksum))
+        return AttachmentDownload(self.size, checksum)
+
+    def _decode(self, data):
+        try:
+            # validate rejects the characters outside of the base64 alphabet, which are otherwise dropped
+            decoded = base64.b64decode(data, validate=True)
+        except binascii.Error as exc:
+            raise AttachmentIntegrityException('Attachment body is not valid base64: {}'.format(exc))
+        self.size += len(decoded)
+        self._hash.update(decoded)
+        return decoded
+
+
+@contextmanager
+def open_destination(destination):
+    """Open the destination of a download, a path or an opened file. A path is written to next to
+    it first, and only replaced once the download has succeeded"""
+    if isinstance(destination, io.IOBase) or hasattr(destination, 'write'):
+        yield destination
+        return
+    partial_path = '{}.part'.format(os.fspath(destination))
+    try:
+        with open(partial_path, 'wb') as file:
+            yield file
+        os.replace(partial_path, destination)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
@@ -0,0 +1,58 @@
+import functools
+from collections import namedtuple
+
+RestCall = namedtuple('RestCall', 'method path kwargs')
+
+
+def rest_call(method, path, **kwargs):
+    """The REST call of an endpoint, kwargs being those of execute_rest_call"""
+    return RestCall(method, path, kwargs)
+
+
+def endpoint(build):
+    """Decorator of the client methods that only describe the REST call of an endpoint.
+
+    The decorated method returns the RestCall of its arguments, built with rest_call, and is
+    turned into one making the call with execute_rest_call. APIClient then adds its <name>_async
+    twin, making the same call with execute_rest_call_async, so that the sync and async versions
+    of an endpoint share a single definition:
+
+        @endpoint
+        def get_room_info(self, stream_id):
+            url = '/pod/v3/room/{0}/info'.format(stream_id)
+            return rest_call('GET', url)
+
+        stream_client.get_room_info(stream_id)
+        await stream_client.get_room_info_async(stream_id)
+
+    The RestCall of the method itself is available from its build attribute, e.g. for paging.
+    """
+    @functools.wraps(build)
+    def call(self, *args, **kwargs):
+        method, path, call_kwargs = build(self, *args, **kwargs)
+        return self.bot_client.execute_rest_call(method, path, **call_kwargs)
+
+    call.build = build
+    return call
+
+
+def make_async_endpoint(name, build):
+    """The <name>_async twin of an endpoint"""
+    async def call_async(self, *args, **kwargs):
+        method, path, call_kwargs = build(self, *args, **kwargs)
+        return await self.bot_client.execute_rest_call_async(method, path, **call_kwargs)
+
+    call_async.__name__ = name + '_async'
+    call_async.__qualname__ = build.__qualname__ + '_async'
+    call_async.__module__ = build.__module__
+    call_async.__doc__ = 'Asynchronous version of {}, should be called with the await keyword'.format(name)
+    call_async.build = build
+    return call_async
+
+
+def add_async_endpoints(cls):
+    """Add the _async twins of the endpoints of a class that don't have one already"""
+    for name, value in list(vars(cls).items()):
+        build = getattr(value, 'build', None)
+        if build is not None and not name.endswith('_async') and name + '_async' not in vars(cls):
+            setattr(cls, name + '_async', make_async_endpoint(name, build))
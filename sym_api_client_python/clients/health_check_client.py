@@ -1,20 +1,32 @@
 import logging
 
 from .api_client import APIClient
+from .endpoint import endpoint, rest_call
 
 
 class HealthCheckClient(APIClient):
     def __init__(self, bot_client):
         self.bot_client = bot_client
 
+    @endpoint
     def get_health_check(self, show_firehose_errors=False):
         logging.debug('HealthCheckClient/get_health_check()')
         params = {'showFirehoseErrors': show_firehose_errors}
         url = '/agent/v2/HealthCheck'
-        return self.bot_client.execute_rest_call('GET', url, params=params)
+        return rest_call('GET', url, params=params)
 
     def ensure_all_services_up(self, check_firehose=False, fields_to_check=None):
         logging.debug('HealthCheckClient/ensure_all_services_up()')
+        fields_to_check = self._get_fields_to_check(check_firehose, fields_to_check)
+        self._check_services(self.get_health_check(check_firehose), fields_to_check)
+
+    async def ensure_all_services_up_async(self, check_firehose=False, fields_to_check=None):
+        logging.debug('HealthCheckClient/ensure_all_services_up_async()')
+        fields_to_check = self._get_fields_to_check(check_firehose, fields_to_check)
+        self._check_services(await self.get_health_check_async(check_firehose), fields_to_check)
+
+    @staticmethod
+    def _get_fields_to_check(check_firehose, fields_to_check):
         # This list would have to be updated if new fields became available in the health check
         if fields_to_check is None:
             fields_to_check = [
@@ -26,14 +38,13 @@ class HealthCheckClient(APIClient):
             ]
         if check_firehose:
             fields_to_check.append('firehoseConnectivity')
+        return fields_to_check
 
-        health_check = self.get_health_check(check_firehose)
-
+    @staticmethod
+    def _check_services(health_check, fields_to_check):
         logging.debug(health_check)
 
         functioning = [ health_check[field] for field in fields_to_check ]
         if not all(functioning):
             problems = [fields_to_check[i] for i,v in enumerate(functioning) if not v]
             raise RuntimeError(f"Not all services available: {problems}")
-            
-
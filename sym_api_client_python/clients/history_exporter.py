@@ -0,0 +1,220 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from collections import namedtuple
+
+from .bulk_sender import TokenBucket
+
+ExportResult = namedtuple('ExportResult', 'streams messages pages failed')
+
+
+class HistoryExporter:
+    """Exports the messages of many streams since a timestamp to a newline delimited JSON file.
+
+    max_concurrency streams are exported at once, each of them page after page of page_size
+    messages with get_msg_from_stream_async and its skip parameter, and at most rate pages are
+    fetched per second across all the streams:
+
+        exporter = bot_client.get_history_exporter()
+        result = await exporter.export_async(stream_ids, since, 'history.ndjson.gz',
+                                             checkpoint_path='history.checkpoint.json')
+
+    Messages are written, one JSON object per line, as the pages arrive, so that memory doesn't
+    grow with the size of the export. The output is gzip compressed when its path ends with .gz,
+    and replaced unless the export resumes from a checkpoint. The output and the checkpoint are
+    written, and compressed, off the event loop, one write at a time.
+
+    With a checkpoint_path, the number of messages exported from each stream, which streams are
+    done and the size of the output are saved at most every checkpoint_interval seconds and at
+    the end, after the output has been flushed. Exporting again with the same checkpoint cuts the
+    output back to its size at the checkpoint, dropping what was written after it, then appends
+    to it from where each stream was, so that a restart neither loses nor repeats messages. The
+    messages of a stream are expected oldest first, as the agent returns them. A checkpoint is
+    only resumed with the since it was saved with, and never when the output is now shorter than
+    it was at the checkpoint: export_async raises a ValueError instead, remove the checkpoint to
+    start a new export.
+
+    A stream that fails, once the RetryPolicy of the bot client has given up, doesn't stop the
+    others. It is reported in the failed dict of the ExportResult, and resumed by the next run.
+    """
+
+    def __init__(self, bot_client, max_concurrency=8, rate=20, burst=None, page_size=500, checkpoint_interval=5):
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1, got {}'.format(max_concurrency))
+        if page_size < 1:
+            raise ValueError('A page needs a size of at least 1, got {}'.format(page_size))
+        self.bot_client = bot_client
+        self.max_concurrency = max_concurrency
+        self.token_bucket = TokenBucket(rate, burst)
+        self.page_size = page_size
+        self.checkpoint_interval = checkpoint_interval
+
+    @classmethod
+    def from_config(cls, bot_client, config):
+        """Build an exporter with the historyExportConcurrency, historyExportRate (pages per second)
+        and historyExportPageSize config values"""
+        return cls(bot_client, max_concurrency=config.data.get('historyExportConcurrency', 8),
+                   rate=config.data.get('historyExportRate', 20),
+                   page_size=config.data.get('historyExportPageSize', 500))
+
+    async def export_async(self, stream_ids, since, output_path, checkpoint_path=None):
+        """Export the messages of stream_ids since the timestamp since, in milliseconds, to
+        output_path. Return an ExportResult with the number of streams exported, of messages and
+        of pages fetched, and the errors of the streams that failed by stream id"""
+        checkpoint = _Checkpoint.load(checkpoint_path, since)
+        stream_ids = [stream_id for stream_id in stream_ids if not checkpoint.is_done(stream_id)]
+        logging.debug('HistoryExporter/export_async() - {} streams to export'.format(len(stream_ids)))
+        output = await _Export.run_io(_Output, output_path, checkpoint.output_size or 0)
+        export = _Export(self, checkpoint, output)
+        pending = iter(stream_ids)
+
+        async def worker():
+            for stream_id in pending:
+                await export.export_stream(stream_id)
+
+        try:
+            await asyncio.gather(*[worker() for _ in range(min(self.max_concurrency, len(stream_ids)))])
+        finally:
+            await export.save_checkpoint()
+            await export.run_io(export.output.close)
+        return ExportResult(len(stream_ids) - len(export.failed), export.messages, export.pages, export.failed)
+
+
+class _Export:
+    """The state of a run of HistoryExporter.export_async"""
+
+    def __init__(self, exporter, checkpoint, output):
+        self.exporter = exporter
+        self.checkpoint = checkpoint
+        self.output = output
+        self.messages = 0
+        self.pages = 0
+        self.failed = {}
+        self._saved_at = time.monotonic()
+        # Serialises the writes of the output and of the checkpoint, made in the default executor
+        self._io_lock = asyncio.Lock()
+
+    async def export_stream(self, stream_id):
+        exporter = self.exporter
+        message_client = exporter.bot_client.get_message_client()
+        json_codec = exporter.bot_client.get_json_codec()
+        skip = self.checkpoint.get_skip(stream_id)
+        try:
+            while True:
+                await exporter.token_bucket.acquire_async()
+                page = await message_client.get_msg_from_stream_async(
+                    stream_id, self.checkpoint.since, skip=skip, limit=exporter.page_size)
+                page = page or []
+                lines = [json_codec.dumps(message) + '\n' for message in page]
+                skip += len(page)
+                done = len(page) < exporter.page_size
+                async with self._io_lock:
+                    await self.run_io(self.output.write_lines, lines)
+                    # Updated along with the write, so that a checkpoint never counts lines that
+                    # aren't in the output, nor misses some that are
+                    self.checkpoint.update(stream_id, skip, done)
+                self.messages += len(page)
+                self.pages += 1
+                if time.monotonic() - self._saved_at >= exporter.checkpoint_interval:
+                    await self.save_checkpoint()
+                if done:
+                    return
+        except Exception as exc:
+            logging.debug('HistoryExporter/export_stream() - exporting {} failed: {}'.format(stream_id, exc))
+            self.failed[stream_id] = exc
+
+    async def save_checkpoint(self):
+        if self.checkpoint.path is None:
+            return
+        self._saved_at = time.monotonic()
+        async with self._io_lock:
+            # The checkpoint can only count the messages that have reached the output
+            self.checkpoint.output_size = await self.run_io(self.output.commit)
+            await self.run_io(self.checkpoint.save)
+
+    @staticmethod
+    async def run_io(function, *args):
+        return await asyncio.get_event_loop().run_in_executor(None, function, *args)
+
+
+class _Checkpoint:
+    """The progress of an export, by stream, saved as JSON:
+
+        {"since": 1600000000000, "outputSize": 48213, "streams": {"stream_id": {"skip": 1500, "done": false}}}
+    """
+
+    def __init__(self, path, since, streams, output_size=None):
+        self.path = path
+        self.since = since
+        self.streams = streams
+        self.output_size = output_size
+
+    @classmethod
+    def load(cls, path, since):
+        if path is None or not os.path.exists(path):
+            return cls(path, since, {})
+        with open(path) as file:
+            data = json.load(file)
+        if data['since'] != since:
+            raise ValueError('Checkpoint {} is of an export since {}, not {}, remove it to start a new export'
+                             .format(path, data['since'], since))
+        return cls(path, data['since'], data['streams'], data.get('outputSize'))
+
+    def is_done(self, stream_id):
+        return self.streams.get(stream_id, {}).get('done', False)
+
+    def get_skip(self, stream_id):
+        return self.streams.get(stream_id, {}).get('skip', 0)
+
+    def update(self, stream_id, skip, done):
+        self.streams[stream_id] = {'skip': skip, 'done': done}
+
+    def save(self):
+        # Replaced at once, a checkpoint is never left half written
+        partial_path = self.path + '.part'
+        with open(partial_path, 'w') as file:
+            json.dump({'since': self.since, 'outputSize': self.output_size, 'streams': self.streams}, file)
+        os.replace(partial_path, self.path)
+
+
+class _Output:
+    """The newline delimited JSON file of an export, gzip compressed when its path ends with .gz"""
+
+    def __init__(self, path, size):
+        self.path = path
+        self.compressed = path.endswith('.gz')
+        current_size = os.path.getsize(path) if os.path.exists(path) else 0
+        if current_size < size:
+            # Replaced or cut since the checkpoint, the messages it counts are no longer all there
+            raise ValueError('Cannot resume the export to {}, it has {} bytes and had {} at the checkpoint'
+                             .format(path, current_size, size))
+        if os.path.exists(path):
+            # Drop what was written after the checkpoint, or all of it for a new export
+            os.truncate(path, size)
+        self._open()
+
+    def write_lines(self, lines):
+        self.file.writelines(lines)
+
+    def commit(self):
+        """Write out what has been written so far and return the size of the file"""
+        if self.compressed:
+            # Ends the gzip member, so that the file up to here is complete. The next one is
+            # appended to it, gzip readers read them as a single file
+            self.file.close()
+            self._open()
+        else:
+            self.file.flush()
+        return os.path.getsize(self.path)
+
+    def close(self):
+        self.file.close()
+
+    def _open(self):
+        if self.compressed:
+            self.file = gzip.open(self.path, 'at', encoding='utf-8')
+        else:
+            self.file = open(self.path, 'a', encoding='utf-8')
@@ -0,0 +1,100 @@
+import codecs
+import json
+import logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonCodec:
+    """Decodes the JSON bodies of the responses, straight from their bytes.
+
+    requests' response.text has to find the charset of the body first, guessing it with chardet
+    when the Content-Type has none, and builds a str that is thrown away once parsed. The JSON
+    of the pod and agent is UTF-8, which json.loads reads from bytes directly, so the body is
+    only decoded to a str when the Content-Type names another charset.
+
+    This is the json module of the standard library. OrjsonCodec does the same with orjson,
+    several times faster on large bodies, and get_json_codec picks it when it is installed.
+    Both raise a ValueError when the body isn't JSON.
+    """
+
+    name = 'json'
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def dumps(self, obj):
+        return json.dumps(obj)
+
+    def decode(self, content, content_type=None):
+        """Decode the bytes of a response body with the charset of content_type"""
+        charset = get_charset(content_type)
+        if charset is not None and not _is_utf8(charset):
+            try:
+                content = content.decode(charset)
+            except LookupError:
+                logging.debug('JsonCodec - unknown charset {}, decoding the body as UTF-8'.format(charset))
+        return self.loads(content)
+
+    def __repr__(self):
+        return '{}()'.format(type(self).__name__)
+
+
+class OrjsonCodec(JsonCodec):
+    """JsonCodec with orjson, which needs to be installed"""
+
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError('orjson is not installed, install it with pip install orjson')
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+    def dumps(self, obj):
+        return orjson.dumps(obj).decode('utf-8')
+
+
+_CODECS = {
+    'json': JsonCodec,
+    'orjson': OrjsonCodec,
+}
+_instances = {}
+
+
+def get_json_codec(name='auto'):
+    """Return the shared codec of the given name, 'json', 'orjson', or 'auto' for orjson when it
+    is installed and json otherwise"""
+    if name is None or name == 'auto':
+        name = 'orjson' if orjson is not None else 'json'
+    codec = _instances.get(name)
+    if codec is None:
+        try:
+            codec_class = _CODECS[name]
+        except KeyError:
+            raise ValueError('Unknown JSON codec {}, expected one of auto, {}'
+                             .format(name, ', '.join(_CODECS))) from None
+        codec = _instances.setdefault(name, codec_class())
+    return codec
+
+
+def get_charset(content_type):
+    """The charset parameter of a Content-Type header, None if there is none"""
+    if not content_type:
+        return None
+    for parameter in content_type.split(';')[1:]:
+        key, _, value = parameter.partition('=')
+        if key.strip().lower() == 'charset':
+            return value.strip().strip('\'"') or None
+    return None
+
+
+def _is_utf8(charset):
+    try:
+        return codecs.lookup(charset).name == 'utf-8'
+    except LookupError:
+        return False
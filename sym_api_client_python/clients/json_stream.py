@@ -0,0 +1,148 @@
+import codecs
+import json
+
+_WHITESPACE = ' \t\n\r'
+_NUMBER = '0123456789.eE+-'
+
+# Parser states, what is expected next
+_START = 0           # {
+_FIRST_KEY = 1       # a key or }
+_KEY = 2             # a key
+_COLON = 3           # :
+_VALUE = 4           # a value, or the array
+_AFTER_VALUE = 5     # , or }
+_FIRST_ELEMENT = 6   # an element or ]
+_ELEMENT = 7         # an element
+_AFTER_ELEMENT = 8   # , or ]
+_END = 9             # nothing
+
+class JsonArrayStreamParser:
+    """Incremental parser of a JSON object with a large array, such as a datafeed read
+    {"events": [...], "ackId": "..."}, fed with the chunks of the body as they arrive.
+
+    feed returns the elements of the array completed by each chunk, so they can be handled
+    before the rest of the body has arrived, and only the part of the body that hasn't been
+    parsed yet is kept. The other members of the object are parsed as well and returned by close
+    once the body is complete:
+
+        parser = JsonArrayStreamParser('events')
+        for chunk in response.iter_content(65536):
+            for event in parser.feed(chunk):
+                ...
+        ack_id = parser.close().get('ackId')
+
+    Each element is parsed with json.JSONDecoder.raw_decode straight from the buffer, so that
+    finding where an element ends doesn't cost a pass of Python code over its characters. The
+    body is expected to be UTF-8, as the JSON of the agent is. ValueError is raised for bodies
+    that aren't such an object, and by close for incomplete ones.
+    """
+
+    def __init__(self, array_key):
+        self.array_key = array_key
+        self.members = {}
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._state = _START
+        self._key = None
+
+    def feed(self, data):
+        """Parse a chunk of the body, return the elements of the array it completed"""
+        self._buffer += self._utf8.decode(data)
+        elements = []
+        position = self._parse(elements)
+        self._buffer = self._buffer[position:]
+        return elements
+
+    def close(self):
+        """Return the members of the object other than the array"""
+        self._buffer += self._utf8.decode(b'', final=True)
+        if self._parse([], final=True) < len(self._buffer) or self._state != _END:
+            raise ValueError('Incomplete JSON body, ended before the end of the object')
+        return self.members
+
+    def _parse(self, elements, final=False):
+        buffer = self._buffer
+        length = len(buffer)
+        position = 0
+        raw_decode = self._decoder.raw_decode
+        while True:
+            while position < length and buffer[position] in _WHITESPACE:
+                position += 1
+            if position == length:
+                return position
+            char = buffer[position]
+            state = self._state
+
+            if state == _ELEMENT or (state == _FIRST_ELEMENT and char != ']'):
+                element, end = self._decode(raw_decode, buffer, position, final)
+                if end is None:
+                    return position
+                elements.append(element)
+                position = end
+                self._state = _AFTER_ELEMENT
+            elif state == _AFTER_ELEMENT or state == _FIRST_ELEMENT:
+                if char == ',' and state == _AFTER_ELEMENT:
+                    self._state = _ELEMENT
+                elif char == ']':
+                    self._state = _AFTER_VALUE
+                else:
+                    raise ValueError('Expected a comma or the end of the array, got {!r}'.format(char))
+                position += 1
+            elif state == _KEY or (state == _FIRST_KEY and char != '}'):
+                if char != '"':
+                    raise ValueError('Expected a key, got {!r}'.format(char))
+                key, end = self._decode(raw_decode, buffer, position, final)
+                if end is None:
+                    return position
+                self._key = key
+                position = end
+                self._state = _COLON
+            elif state == _AFTER_VALUE or state == _FIRST_KEY:
+                if char == ',' and state == _AFTER_VALUE:
+                    self._state = _KEY
+                elif char == '}':
+                    self._state = _END
+                else:
+                    raise ValueError('Expected a comma or the end of the object, got {!r}'.format(char))
+                position += 1
+            elif state == _COLON:
+                if char != ':':
+                    raise ValueError('Expected a colon, got {!r}'.format(char))
+                position += 1
+                self._state = _VALUE
+            elif state == _VALUE:
+                if self._key == self.array_key and char == '[':
+                    position += 1
+                    self._state = _FIRST_ELEMENT
+                else:
+                    value, end = self._decode(raw_decode, buffer, position, final)
+                    if end is None:
+                        return position
+                    self.members[self._key] = value
+                    position = end
+                    self._state = _AFTER_VALUE
+            elif state == _START:
+                if char != '{':
+                    raise ValueError('Expected a JSON object, got {!r}'.format(char))
+                position += 1
+                self._state = _FIRST_KEY
+            else:
+                raise ValueError('Unexpected data after the JSON object: {!r}'.format(char))
+
+    @staticmethod
+    def _decode(raw_decode, buffer, position, final):
+        """Return the value at position and where it ends, (None, None) if it may not be
+        complete yet"""
+        try:
+            value, end = raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # Most likely cut short by the end of the chunk, a body that isn't valid JSON fails
+            # again once complete
+            if final:
+                raise
+            return None, None
+        if not final and isinstance(value, (int, float)) and (end == len(buffer) or buffer[end] in _NUMBER):
+            # A number cut short by the end of the buffer, such as 12 of 12.5e3, is valid JSON too
+            return None, None
+        return value, end
@@ -1,9 +1,13 @@
+import asyncio
 import io
 import logging
-from contextlib import contextmanager
+import os
+from contextlib import ExitStack, contextmanager
 from typing import Union
 
 from .api_client import APIClient
+from .download import CHUNK_SIZE as DOWNLOAD_CHUNK_SIZE, AttachmentDecoder, open_destination
+from .upload import UploadProgress
 
 # child class of APIClient --> Extends error handling functionality
 # MessageClient class contains a series of functions corresponding to all
@@ -19,13 +23,21 @@ def open_file(file):
         # already opened file
         yield file
     else:
+        file_object = open(file, mode='rb')
         try:
-            file_object = open(file, mode='rb')
             yield file_object
         finally:
             file_object.close()
 
 
+@contextmanager
+def open_files(attachments):
+    """Open the attachments given as paths of a list of (filename, attachment) pairs"""
+    with ExitStack() as stack:
+        yield [(filename, stack.enter_context(open_file(attachment)) if isinstance(attachment, (str, os.PathLike)) else attachment)
+               for filename, attachment in attachments]
+
+
 class MessageClient(APIClient):
 
     def __init__(self, bot_client):
@@ -59,21 +71,25 @@ class MessageClient(APIClient):
         url = MESSAGE_CREATE.format(stream_id=stream_id)
         return await self.bot_client.execute_rest_call_async('POST', url, files=outbound_msg)
 
-    def _data_and_headers_for_attachment(self, stream_id, msg, filename, attachment_file, aio=False):
-        """Build an attachment out of either a path or a stream"""
+    def _data_and_headers_for_attachments(self, stream_id, msg, attachments, progress=None, aio=False):
+        """Build a multipart form out of the message and its attachments, opened files or streams,
+        that is sent in chunks as it is read"""
         url = MESSAGE_CREATE.format(stream_id=stream_id)
+        upload_progress = UploadProgress(progress)
 
         # The below states that Content-Type for attachments should be 'file' which is almost
         # certainly wrong - it's not a valid MIME-type. text/plain seems right
-        fields = {'message': msg,
-                  'attachment': (filename, attachment_file, "file")}
+        fields = [('message', msg)]
+        for filename, attachment_file in attachments:
+            body = upload_progress.wrap_async(attachment_file) if aio else upload_progress.wrap(attachment_file)
+            fields.append(('attachment', (filename, body, "file")))
 
         parts = self.make_mulitpart_form(fields, aio=aio)
 
         return {'path': url, **parts}
 
     def send_msg_with_attachment(self, stream_id, msg,
-                                 filename, attachment: Union[str, io.BytesIO]):
+                                 filename, attachment: Union[str, io.BytesIO], progress=None):
         """
         In this function make sure that msg parameter is set to just the messageML string.
         Do not set msg parameter to dict(message='<messageML>testing attachement</messageML>')
@@ -81,31 +97,142 @@ class MessageClient(APIClient):
 
         :param attachment:
             A path to a file or a stream of bytes.
+        :param progress:
+            Optional progress(bytes_sent, total_bytes) callback, see send_msg_with_attachments.
         """
         logging.debug('MessageClient/send_msg_with_attachment()')
-        with open_file(attachment) as attachment_file:
-            parts = self._data_and_headers_for_attachment(stream_id, msg, filename, attachment_file)
-            return self.bot_client.execute_rest_call("POST", **parts)
+        return self.send_msg_with_attachments(stream_id, msg, [(filename, attachment)], progress=progress)
 
     async def send_msg_with_attachment_async(self, stream_id, msg,
-                                             filename, attachment: Union[str, io.BytesIO]):
+                                             filename, attachment: Union[str, io.BytesIO], progress=None):
         """
         :param attachment:
-            A path to a file or a stream of bytes.
+            A path to a file, a stream of bytes or an async iterator of bytes.
         """
         logging.debug('MessageClient/send_msg_with_attachment()')
-        with open_file(attachment) as attachment_file:
-            parts = self._data_and_headers_for_attachment(stream_id, msg, filename, attachment_file, aio=True)
+        return await self.send_msg_with_attachments_async(stream_id, msg, [(filename, attachment)],
+                                                          progress=progress)
+
+    def send_msg_with_attachments(self, stream_id, msg, attachments, progress=None):
+        """
+        Send a message with several attachments. The attachments are streamed as the request is
+        sent, without being read into memory first.
+
+        :param attachments:
+            A list of (filename, attachment) pairs, the attachment being a path to a file, a
+            stream of bytes or bytes.
+        :param progress:
+            Optional callback called with the number of bytes of the attachments sent so far and
+            their total size, as progress(bytes_sent, total_bytes).
+        """
+        logging.debug('MessageClient/send_msg_with_attachments()')
+        with open_files(attachments) as opened_attachments:
+            parts = self._data_and_headers_for_attachments(stream_id, msg, opened_attachments, progress)
+            return self.bot_client.execute_rest_call("POST", **parts)
+
+    async def send_msg_with_attachments_async(self, stream_id, msg, attachments, progress=None):
+        """
+        :param attachments:
+            A list of (filename, attachment) pairs, the attachment being a path to a file, a
+            stream of bytes, bytes or an async iterator of bytes. The request is sent with chunked
+            transfer encoding. total_bytes of progress is None when the size of an attachment
+            isn't known, as for an async iterator.
+        """
+        logging.debug('MessageClient/send_msg_with_attachments_async()')
+        with open_files(attachments) as opened_attachments:
+            parts = self._data_and_headers_for_attachments(stream_id, msg, opened_attachments, progress, aio=True)
             return await self.bot_client.execute_rest_call_async('POST', **parts)
 
     def get_msg_attachment(self, stream_id, msg_id, file_id):
         logging.debug('MessageClient/get_msg_attachment()')
+        url, params = self._get_attachment_url_and_params(stream_id, msg_id, file_id)
+        return self.bot_client.execute_rest_call("GET", url, params=params)
+
+    def iter_msg_attachment(self, stream_id, msg_id, file_id, expected_size=None, expected_checksum=None,
+                            checksum_algorithm='sha256'):
+        """
+        Iterate over the decoded bytes of an attachment, as they are read off the response. Its
+        size and checksum are checked once it has all been read, see download_msg_attachment.
+        """
+        logging.debug('MessageClient/iter_msg_attachment()')
+        decoder = AttachmentDecoder(expected_size, expected_checksum, checksum_algorithm)
+        yield from self._iter_msg_attachment(stream_id, msg_id, file_id, decoder)
+
+    def download_msg_attachment(self, stream_id, msg_id, file_id, destination, expected_size=None,
+                                expected_checksum=None, checksum_algorithm='sha256'):
+        """
+        Download an attachment to a file, in chunks, instead of reading and decoding its whole
+        base64 body in memory like get_msg_attachment.
+
+        :param destination:
+            A path, written to once the download is complete and verified, or an opened binary file.
+        :param expected_size:
+            Optional size in bytes of the attachment, e.g. the size of its entry in the message.
+        :param expected_checksum:
+            Optional hex digest of the attachment with checksum_algorithm.
+        :return:
+            The AttachmentDownload size and checksum of the attachment. AttachmentIntegrityException
+            is raised when they aren't those expected, or the body isn't valid base64.
+        """
+        logging.debug('MessageClient/download_msg_attachment()')
+        decoder = AttachmentDecoder(expected_size, expected_checksum, checksum_algorithm)
+        with open_destination(destination) as file:
+            for chunk in self._iter_msg_attachment(stream_id, msg_id, file_id, decoder):
+                file.write(chunk)
+        return decoder.verify()
+
+    async def iter_msg_attachment_async(self, stream_id, msg_id, file_id, expected_size=None,
+                                        expected_checksum=None, checksum_algorithm='sha256'):
+        logging.debug('MessageClient/iter_msg_attachment_async()')
+        decoder = AttachmentDecoder(expected_size, expected_checksum, checksum_algorithm)
+        async for chunk in self._iter_msg_attachment_async(stream_id, msg_id, file_id, decoder):
+            yield chunk
+
+    async def download_msg_attachment_async(self, stream_id, msg_id, file_id, destination, expected_size=None,
+                                            expected_checksum=None, checksum_algorithm='sha256'):
+        logging.debug('MessageClient/download_msg_attachment_async()')
+        decoder = AttachmentDecoder(expected_size, expected_checksum, checksum_algorithm)
+        loop = asyncio.get_event_loop()
+        with open_destination(destination) as file:
+            async for chunk in self._iter_msg_attachment_async(stream_id, msg_id, file_id, decoder):
+                # Written off the event loop, like the attachments sent are read
+                await loop.run_in_executor(None, file.write, chunk)
+        return decoder.verify()
+
+    def _iter_msg_attachment(self, stream_id, msg_id, file_id, decoder):
+        url, params = self._get_attachment_url_and_params(stream_id, msg_id, file_id)
+        response = self.bot_client.execute_rest_call('GET', url, params=params, stream=True)
+        try:
+            for data in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                chunk = decoder.feed(data)
+                if chunk:
+                    yield chunk
+        finally:
+            response.close()
+        decoder.close()
+        decoder.verify()
+
+    async def _iter_msg_attachment_async(self, stream_id, msg_id, file_id, decoder):
+        url, params = self._get_attachment_url_and_params(stream_id, msg_id, file_id)
+        response = await self.bot_client.execute_rest_call_async('GET', url, params=params, stream=True)
+        try:
+            async for data in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                chunk = decoder.feed(data)
+                if chunk:
+                    yield chunk
+        finally:
+            response.release()
+        decoder.close()
+        decoder.verify()
+
+    @staticmethod
+    def _get_attachment_url_and_params(stream_id, msg_id, file_id):
         url = '/agent/v1/stream/{0}/attachment'.format(stream_id)
         params = {
             'messageId': msg_id,
             'fileId': file_id
         }
-        return self.bot_client.execute_rest_call("GET", url, params=params)
+        return url, params
 
     # go on admin clients --> Contains sample data just for example's sake
     def import_message(self, importedMessage):
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Paginator:
+    """Iterates over the items of a skip/limit endpoint, page after page.
+
+    Iterate over it with for, or with async for from a coroutine:
+
+        for room in stream_client.iter_search_rooms('release', page_size=100):
+            ...
+        async for room in stream_client.iter_search_rooms('release', max_items=500):
+            ...
+
+    While the items of a page are consumed the next page is already being fetched, by a
+    background thread or task, so a long scan waits for the pod at most once per page instead
+    of once per page plus the time spent on the items, and only two pages are held in memory.
+    Iteration stops after a page shorter than page_size, after max_items items, or when the
+    response has hasMore false.
+
+    build_page returns the RestCall of a page given its skip and limit keyword arguments, such
+    as an @endpoint method's build with the other arguments bound. items_key is the key of the
+    items in the responses that are objects, None for endpoints returning a list.
+    """
+
+    def __init__(self, bot_client, build_page, items_key=None, page_size=50, max_items=None, prefetch=True):
+        if page_size < 1:
+            raise ValueError('A page needs a size of at least 1, got {}'.format(page_size))
+        self.bot_client = bot_client
+        self.build_page = build_page
+        self.items_key = items_key
+        self.page_size = page_size
+        self.max_items = max_items
+        self.prefetch = prefetch
+
+    def __iter__(self):
+        executor = ThreadPoolExecutor(max_workers=1) if self.prefetch else None
+        future = None
+        try:
+            skip, limit = 0, self._get_limit(0)
+            page = self._fetch_page(skip, limit)
+            while True:
+                items, more = self._get_items(page, limit)
+                skip += len(items)
+                limit = self._get_limit(skip)
+                more = more and limit > 0
+                if more and executor is not None:
+                    future = executor.submit(self._fetch_page, skip, limit)
+                yield from items
+                if not more:
+                    return
+                if future is not None:
+                    page, future = future.result(), None
+                else:
+                    page = self._fetch_page(skip, limit)
+        finally:
+            if future is not None:
+                future.cancel()
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def __aiter__(self):
+        return self._iterate_async()
+
+    async def _iterate_async(self):
+        task = None
+        try:
+            skip, limit = 0, self._get_limit(0)
+            page = await self._fetch_page_async(skip, limit)
+            while True:
+                items, more = self._get_items(page, limit)
+                skip += len(items)
+                limit = self._get_limit(skip)
+                more = more and limit > 0
+                if more and self.prefetch:
+                    task = asyncio.ensure_future(self._fetch_page_async(skip, limit))
+                for item in items:
+                    yield item
+                if not more:
+                    return
+                if task is not None:
+                    page, task = await task, None
+                else:
+                    page = await self._fetch_page_async(skip, limit)
+        finally:
+            if task is not None:
+                task.cancel()
+
+    def _get_limit(self, skip):
+        if self.max_items is None:
+            return self.page_size
+        return min(self.page_size, self.max_items - skip)
+
+    def _fetch_page(self, skip, limit):
+        method, path, kwargs = self.build_page(skip=skip, limit=limit)
+        logging.debug('Paginator/_fetch_page() - {} {} skip={} limit={}'.format(method, path, skip, limit))
+        return self.bot_client.execute_rest_call(method, path, **kwargs)
+
+    async def _fetch_page_async(self, skip, limit):
+        method, path, kwargs = self.build_page(skip=skip, limit=limit)
+        logging.debug('Paginator/_fetch_page_async() - {} {} skip={} limit={}'.format(method, path, skip, limit))
+        return await self.bot_client.execute_rest_call_async(method, path, **kwargs)
+
+    def _get_items(self, page, limit):
+        """Return the items of a page and whether there may be more after them"""
+        if isinstance(page, dict):
+            items = page.get(self.items_key) or []
+            has_more = page.get('hasMore', True)
+        else:
+            # A list, or [] for a 204
+            items = page or []
+            has_more = True
+        return items, has_more and len(items) >= limit
@@ -1,6 +1,7 @@
 import logging
 
 from .api_client import APIClient
+from .endpoint import endpoint, rest_call
 
 
 # child class of APIClient --> Extends error handling functionality
@@ -11,13 +12,15 @@ class PresenceClient(APIClient):
     def __init__(self, bot_client):
         self.bot_client = bot_client
 
+    @endpoint
     def get_presence(self):
         """Returns the online status of the calling user."""
         logging.debug('PresenceClient/get_presence()')
         url = '/pod/v2/user/presence/'
 
-        return self.bot_client.execute_rest_call('GET', url)
+        return rest_call('GET', url)
 
+    @endpoint
     def get_all_presence(self, last_user_id, limit):
         """
         Returns the presence of all users in a pod
@@ -36,8 +39,9 @@ class PresenceClient(APIClient):
                 'lastUserId': last_user_id,
                 'limit': limit
                 }
-        return self.bot_client.execute_rest_call('GET', url, params=params)
+        return rest_call('GET', url, params=params)
 
+    @endpoint
     def get_user_status(self, user_id, local=True):
         """
         Returns the online status of the specified user.
@@ -65,8 +69,9 @@ class PresenceClient(APIClient):
         logging.debug('PresenceClient/get_user_status()')
         url = '/pod/v3/user/{0}/presence'.format(user_id)
         params = {'local': local}
-        return self.bot_client.execute_rest_call("GET", url, params=params)
+        return rest_call("GET", url, params=params)
 
+    @endpoint
     def external_presence_interest(self, array_user_ids):
         """
         To get the presence state of external users, you must first register interest in those users using this endpoint.
@@ -89,8 +94,9 @@ Getting an external user’s presence is limited to one call every 5 minutes.
         logging.debug('PresenceClient/external_presence_interest()')
         url = '/pod/v1/user/presence/register'
         data = {'userIds': array_user_ids}
-        return self.bot_client.execute_rest_call("POST", url, json=data)
+        return rest_call("POST", url, json=data)
 
+    @endpoint
     def set_presence(self, category):
         """
         Sets the online status of the calling user.
@@ -104,8 +110,9 @@ Getting an external user’s presence is limited to one call every 5 minutes.
         logging.debug('PresenceClient/set_presence()')
         url = '/pod/v2/user/presence'
         data = {'category': category}
-        return self.bot_client.execute_rest_call("POST", url, json=data)
+        return rest_call("POST", url, json=data)
 
+    @endpoint
     def create_presence_feed(self):
         """
         Creates a new stream capturing online status changes ("presence feed") for the company (pod) and returns the ID of the new feed. 
@@ -113,8 +120,9 @@ Getting an external user’s presence is limited to one call every 5 minutes.
         """
         logging.debug('PresenceClient/create_presence_feed()')
         url = '/pod/v1/presence/feed/create'
-        return self.bot_client.execute_rest_call("POST", url)
+        return rest_call("POST", url)
 
+    @endpoint
     def read_presence_feed(self, feed_id):
         """
         Reads the specified presence feed that was created using the Create Presence feed endpoint. 
@@ -122,9 +130,10 @@ Getting an external user’s presence is limited to one call every 5 minutes.
         """
         logging.debug('PresenceClient/read_presence_feed()')
         url = '/pod/v1/presence/feed/{0}/read'.format(feed_id)
-        return self.bot_client.execute_rest_call("GET", url)
+        return rest_call("GET", url)
 
 
+    @endpoint
     def delete_presence_feed(self, feed_id):
         """
         Deletes a presence status feed. 
@@ -132,8 +141,9 @@ Getting an external user’s presence is limited to one call every 5 minutes.
         """
         logging.debug('PresenceClient/delete_presence_feed()')
         url = '/pod/v1/presence/feed/{0}/delete'.format(feed_id)
-        return self.bot_client.execute_rest_call("GET", url)
+        return rest_call("GET", url)
 
+    @endpoint
     def set_user_presence(self, user_id, category):
         """
         Sets the presence state of a another user.
@@ -146,4 +156,4 @@ Getting an external user’s presence is limited to one call every 5 minutes.
                 'category': category,
                 'userId': user_id
                 }
-        return self.bot_client.execute_rest_call("POST", url, json=data)
+        return rest_call("POST", url, json=data)
@@ -0,0 +1,112 @@
+import logging
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from ..exceptions.UnauthorizedException import UnauthorizedException
+
+log = logging.getLogger(__name__)
+
+
+class RetryPolicy:
+    """Decides whether, and after how long, SymBotClient retries a REST call.
+
+    A call is retried when handle_error raises one of retry_exceptions, by default the
+    UnauthorizedException raised once the tokens have been refreshed after a 401, or when the
+    response status is one of retry_statuses, by default 429 and 503. A call is attempted at
+    most max_attempts times, after which the error is raised as if there had been no retry.
+
+    Retries are delayed with exponential backoff and full jitter: the n-th retry waits a random
+    time between 0 and min(max_backoff, initial_backoff * multiplier ** (n - 1)) seconds, so that
+    many workers failing at the same moment, e.g. on a pod wide token expiry, don't all retry at
+    the same moment. A Retry-After header on the response takes precedence over the backoff, but
+    is never waited for longer than max_backoff.
+
+    The defaults can be changed with the retryPolicy entry of the config, see from_config, and
+    the policy replaced by passing retry_policy to SymBotClient. Subclasses can override
+    should_retry_status, should_retry_exception and get_delay.
+    """
+
+    def __init__(self, max_attempts=5, initial_backoff=0.5, max_backoff=30, multiplier=2,
+                 retry_statuses=(429, 503), retry_exceptions=(UnauthorizedException,),
+                 respect_retry_after=True):
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be at least 1, got {}'.format(max_attempts))
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.multiplier = multiplier
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_exceptions = tuple(retry_exceptions)
+        self.respect_retry_after = respect_retry_after
+
+    @classmethod
+    def from_config(cls, config):
+        """Build the policy from the optional retryPolicy entry of the config, e.g.
+
+            "retryPolicy": {"maxAttempts": 5, "initialBackoff": 0.5, "maxBackoff": 30,
+                            "multiplier": 2, "retryStatuses": [429, 503], "respectRetryAfter": true}
+        """
+        retry_config = config.data.get('retryPolicy') or {}
+        kwargs = {}
+        for key, kwarg in (('maxAttempts', 'max_attempts'),
+                           ('initialBackoff', 'initial_backoff'),
+                           ('maxBackoff', 'max_backoff'),
+                           ('multiplier', 'multiplier'),
+                           ('retryStatuses', 'retry_statuses'),
+                           ('respectRetryAfter', 'respect_retry_after')):
+            if key in retry_config:
+                kwargs[kwarg] = retry_config[key]
+        return cls(**kwargs)
+
+    def can_retry(self, attempt):
+        """Whether another attempt is allowed after attempt, counted from 1"""
+        return attempt < self.max_attempts
+
+    def should_retry_status(self, status, attempt):
+        return status in self.retry_statuses and self.can_retry(attempt)
+
+    def should_retry_exception(self, exception, attempt):
+        return isinstance(exception, self.retry_exceptions) and self.can_retry(attempt)
+
+    def get_delay(self, attempt, headers=None):
+        """Seconds to wait before the attempt following attempt, honouring a Retry-After header"""
+        if self.respect_retry_after and headers is not None:
+            retry_after = parse_retry_after(headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff)
+        ceiling = min(self.max_backoff, self.initial_backoff * self.multiplier ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header value, either delay-seconds or an HTTP-date.
+    Returns None if the value is missing or can't be parsed."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        log.debug('RetryPolicy - Ignoring invalid Retry-After header: {}'.format(value))
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def is_replayable(kwargs):
+    """Whether the body of a request made with kwargs can be sent again. Streams, e.g. the
+    MultipartEncoder of an attachment or an open file, are consumed by the first attempt."""
+    data = kwargs.get('data')
+    if data is not None and not isinstance(data, (str, bytes, dict, list, tuple)):
+        return False
+    for value in (kwargs.get('files') or {}).values():
+        if isinstance(value, tuple):
+            value = value[1]
+        if value is not None and not isinstance(value, (str, bytes)):
+            return False
+    return True
@@ -1,6 +1,9 @@
 import logging
+from functools import partial
 
 from .api_client import APIClient
+from .endpoint import endpoint, rest_call
+from .paginator import Paginator
 
 
 # child class of APIClient --> Extends error handling functionality
@@ -11,6 +14,7 @@ class SignalsClient(APIClient):
     def __init__(self, bot_client):
         self.bot_client = bot_client
 
+    @endpoint
     def list_signals(self, skip=0, limit=50):
         """
         Lists signals on behalf of the user. 
@@ -20,16 +24,25 @@ class SignalsClient(APIClient):
         logging.debug('SignalsClient/list_signals()')
         url = '/agent/v1/signals/list' 
         params = {'skip': skip, 'limit': limit}
-        return self.bot_client.execute_rest_call("GET", url, params=params)
+        return rest_call("GET", url, params=params)
 
+    def iter_signals(self, page_size=50, max_items=None):
+        """
+        Iterate over the signals of list_signals, page after page, see Paginator.
+        """
+        return Paginator(self.bot_client, partial(self.list_signals.build, self), page_size=page_size,
+                         max_items=max_items)
+
+    @endpoint
     def get_signal(self, signal_id):
         """
         Gets details about the specified signal.
         """
         logging.debug('SignalsClient/get_signal()')
         url = '/agent/v1/signals/{0}/get'.format(signal_id)
-        return self.bot_client.execute_rest_call("GET", url)
+        return rest_call("GET", url)
     
+    @endpoint
     def create_signal(self, signal_object):
         """
         Creates a new Signal.
@@ -43,8 +56,9 @@ class SignalsClient(APIClient):
         """
         logging.debug('SignalClient/create_signal()')
         url = '/agent/v1/signals/create'
-        return self.bot_client.execute_rest_call("POST", url, json=signal_object)
+        return rest_call("POST", url, json=signal_object)
     
+    @endpoint
     def update_signal(self, signal_id, signal_object):
         """
         Updates an existing Signal.
@@ -60,14 +74,16 @@ class SignalsClient(APIClient):
         """
         logging.debug('SignalsClient/update_signal()')
         url = '/agent/v1/signals/{0}/update'.format(signal_id)
-        return self.bot_client.execute_rest_call("POST", url, json=signal_object)
+        return rest_call("POST", url, json=signal_object)
 
+    @endpoint
     def delete_signal(self, signal_id):
         """Deletes an existing Signal."""
         logging.debug('SignalsClient/delete_signal()')
         url = '/agent/v1/signals/{0}/delete'.format(signal_id)
-        return self.bot_client.execute_rest_call("POST", url)    
+        return rest_call("POST", url)    
 
+    @endpoint
     def subscribe_signal(self, user_id_array, signal_id, pushed=False):
         """
         Subscribe an array of users to a Signal.
@@ -80,9 +96,10 @@ class SignalsClient(APIClient):
         logging.debug('SignalsClient/subscribe_signal()')
         url = '/agent/v1/signals/{0}/subscribe'.format(signal_id)
         params = {"pushed": pushed}
-        return self.bot_client.execute_rest_call("POST", url, params=params, json=user_id_array)
+        return rest_call("POST", url, params=params, json=user_id_array)
 
     
+    @endpoint
     def unsubscribe_signal(self, user_id_array, signal_id):
         """
         Unsubscribe an array of users from the specified Signal.
@@ -93,12 +110,18 @@ class SignalsClient(APIClient):
         """
         logging.debug('SignalsClient/unsubscribe_signal()')
         url = '/agent/v1/signals/{0}/unsubscribe'.format(signal_id)
-        return self.bot_client.execute_rest_call("POST", url, json=user_id_array)
+        return rest_call("POST", url, json=user_id_array)
 
 
+    @endpoint
     def get_subscribers(self, signal_id, skip=0, limit=50):
         """ Gets the subscribers for the specified signal."""
         logging.debug('SignalsClient/get_subscribers()')
         url = '/agent/v1/signals/{0}/subscribers'.format(signal_id) 
         params = {'skip': skip, 'limit': limit}
-        return self.bot_client.execute_rest_call("GET", url, params=params)
+        return rest_call("GET", url, params=params)
+
+    def iter_subscribers(self, signal_id, page_size=50, max_items=None):
+        """ Iterate over the subscribers of get_subscribers, page after page, see Paginator."""
+        return Paginator(self.bot_client, partial(self.get_subscribers.build, self, signal_id),
+                         items_key='data', page_size=page_size, max_items=max_items)
@@ -1,6 +1,9 @@
 import logging
+from functools import partial
 
 from .api_client import APIClient
+from .endpoint import endpoint, rest_call
+from .paginator import Paginator
 
 
 # child class of APIClient --> Extends error handling functionality
@@ -13,6 +16,7 @@ class StreamClient(APIClient):
     def __init__(self, bot_client):
         self.bot_client = bot_client
 
+    @endpoint
     def create_im(self, users_array):
         """
         Creates a new single or multi-party instant message conversation or returns
@@ -20,8 +24,9 @@ class StreamClient(APIClient):
         """
         logging.debug('StreamClient/create_im()')
         url = '/pod/v1/im/create'
-        return self.bot_client.execute_rest_call("POST", url, json=users_array)
+        return rest_call("POST", url, json=users_array)
 
+    @endpoint
     def create_im_admin(self, users_array):
         """
         Creates a new single or multi-party instant message conversation or returns
@@ -29,8 +34,9 @@ class StreamClient(APIClient):
         """
         logging.debug('StreamClient/create_im_admin()')
         url = '/pod/v1/admin/im/create'
-        return self.bot_client.execute_rest_call("POST", url, json=users_array)
+        return rest_call("POST", url, json=users_array)
 
+    @endpoint
     def create_room(self, roomToCreate):
         """
         Creates a new chatroom. See Room Attributes for room creation parameters.
@@ -56,8 +62,9 @@ class StreamClient(APIClient):
         """
         logging.debug('StreamClient/create_room()')
         url = '/pod/v3/room/create'
-        return self.bot_client.execute_rest_call("POST", url, json=roomToCreate)
+        return rest_call("POST", url, json=roomToCreate)
 
+    @endpoint
     def update_room(self, stream_id, **kwargs):
         """
         Updates the attributes of an existing chat room.
@@ -72,16 +79,18 @@ class StreamClient(APIClient):
         """
         logging.debug('StreamClient/update_room()')
         url = '/pod/v3/room/{0}/update'.format(stream_id)
-        return self.bot_client.execute_rest_call('POST', url, json=kwargs)
+        return rest_call('POST', url, json=kwargs)
 
+    @endpoint
     def get_room_info(self, stream_id):
         """
         Returns information about a particular chat room.
         """
         logging.debug('StreamClient/get_room_info()')
         url = '/pod/v3/room/{0}/info'.format(stream_id)
-        return self.bot_client.execute_rest_call('GET', url)
+        return rest_call('GET', url)
 
+    @endpoint
     def activate_room(self, stream_id):
         """
         Deactivate or reactivate a chatroom. At creation, a new chatroom is active.
@@ -91,8 +100,9 @@ class StreamClient(APIClient):
         params = {
             'active': True
         }
-        return self.bot_client.execute_rest_call('POST', url, params=params)
+        return rest_call('POST', url, params=params)
 
+    @endpoint
     def deactivate_room(self, stream_id):
         """
         Deactivate or reactivate a chatroom. At creation, a new chatroom is active.
@@ -102,16 +112,18 @@ class StreamClient(APIClient):
         params = {
             'active': False
         }
-        return self.bot_client.execute_rest_call('POST', url, params=params)
+        return rest_call('POST', url, params=params)
 
+    @endpoint
     def get_room_members(self, stream_id):
         """
         Lists the current members of an existing room.
         """
         logging.debug('StreamClient/get_room_members()')
         url = '/pod/v2/room/{0}/membership/list'.format(stream_id)
-        return self.bot_client.execute_rest_call('GET', url)
+        return rest_call('GET', url)
 
+    @endpoint
     def add_member_to_room(self, stream_id, user_id):
         """
         Adds a new member to an existing room.
@@ -119,7 +131,7 @@ class StreamClient(APIClient):
         logging.debug('StreamClient/add_member_to_room()')
         url = '/pod/v1/room/{0}/membership/add'.format(stream_id)
         data = {'id': user_id}
-        return self.bot_client.execute_rest_call('POST', url, json=data)
+        return rest_call('POST', url, json=data)
 
     # Content Object. * is required. Either articleId or articleUrl must be specified
     # "content":{
@@ -138,6 +150,7 @@ class StreamClient(APIClient):
     #     "appName": (string) App name of the calling application,
     #     "appIconUrl": (string) App icon URL of the calling application
     # }
+    @endpoint
     def share_room(self, stream_id, content):
         """
         Share third-party content, such as a news article, into the specified stream.
@@ -167,8 +180,9 @@ class StreamClient(APIClient):
             "type": "com.symphony.sharing.article",
             "content": content
         }
-        return self.bot_client.execute_rest_call('POST', url, json=data)
+        return rest_call('POST', url, json=data)
 
+    @endpoint
     def remove_member_from_room(self, stream_id, user_id):
         """
         Removes an existing member from an existing room
@@ -176,8 +190,9 @@ class StreamClient(APIClient):
         logging.debug('StreamClient/remove_member_from_room()')
         url = '/pod/v1/room/{0}/membership/remove'.format(stream_id)
         data = {'id': user_id}
-        return self.bot_client.execute_rest_call('POST', url, json=data)
+        return rest_call('POST', url, json=data)
 
+    @endpoint
     def promote_user_to_owner(self, stream_id, user_id):
         """
         Promotes user to owner of the chat room.
@@ -185,8 +200,9 @@ class StreamClient(APIClient):
         logging.debug('StreamClient/promote_user_to_owner()')
         url = '/pod/v1/room/{0}/membership/promoteOwner'.format(stream_id)
         data = {'id': user_id}
-        return self.bot_client.execute_rest_call('POST', url, json=data)
+        return rest_call('POST', url, json=data)
 
+    @endpoint
     def demote_user_from_owner(self, stream_id, user_id):
         """
         Demotes room owner to a participant in the chat room.
@@ -194,7 +210,7 @@ class StreamClient(APIClient):
         logging.debug('StreamClient/demote_user_from_owner()')
         url = '/pod/v1/room/{0}/membership/demoteOwner'.format(stream_id)
         data = {'id': user_id}
-        return self.bot_client.execute_rest_call('POST', url, json=data)
+        return rest_call('POST', url, json=data)
 
     # Available kwargs:
     # labels: A list of room keywords whose values will be queried.
@@ -204,6 +220,7 @@ class StreamClient(APIClient):
     # owner: If provided, restricts the search to rooms owned by the specified user.
     # member: If provided, restricts the search to rooms where the specified user is a member.
     # sortOrder: Sort algorithm to be used. Supports two values: BASIC (legacy algorithm) and RELEVANCE (enhanced algorithm).
+    @endpoint
     def search_rooms(self, query, skip=0, limit=50, **kwargs):
         """
         Search for rooms, querying name, description, and specified keywords.
@@ -220,8 +237,16 @@ class StreamClient(APIClient):
             'query': query
         }
         data.update(kwargs)
-        return self.bot_client.execute_rest_call('POST', url, params=params, json=data)
+        return rest_call('POST', url, params=params, json=data)
 
+    def iter_search_rooms(self, query, page_size=50, max_items=None, **kwargs):
+        """
+        Iterate over the rooms found by search_rooms, page after page, see Paginator.
+        """
+        return Paginator(self.bot_client, partial(self.search_rooms.build, self, query, **kwargs),
+                         items_key='rooms', page_size=page_size, max_items=max_items)
+
+    @endpoint
     def get_user_streams(self, skip=0, limit=50, stream_types = 'ALL', include_inactive = True):
         """
         Returns a list of all the streams of which the requesting user is a member,
@@ -244,17 +269,27 @@ class StreamClient(APIClient):
             'skip': skip,
             'limit': limit
         }
-        return self.bot_client.execute_rest_call('POST', url, json=data, params=params)
+        return rest_call('POST', url, json=data, params=params)
+
+    def iter_user_streams(self, page_size=50, max_items=None, stream_types='ALL', include_inactive=True):
+        """
+        Iterate over the streams of get_user_streams, page after page, see Paginator.
+        """
+        build_page = partial(self.get_user_streams.build, self, stream_types=stream_types,
+                             include_inactive=include_inactive)
+        return Paginator(self.bot_client, build_page, page_size=page_size, max_items=max_items)
 
+    @endpoint
     def stream_info_v2(self, stream_id):
         """
         Returns information about a particular stream.
         """
         logging.debug('StreamClient/stream_info_v2()')
         url = '/pod/v2/streams/{0}/info'.format(stream_id)
-        return self.bot_client.execute_rest_call('GET', url)
+        return rest_call('GET', url)
 
 
+    @endpoint
     def list_streams_enterprise(self, skip=0, limit=50, **kwargs):
         """
         Returns a list of all the streams (IMs, MIMs, and chatrooms) for the calling
@@ -279,8 +314,9 @@ class StreamClient(APIClient):
             'skip': skip,
             'limit': limit
         }
-        return self.bot_client.execute_rest_call('POST', url, params=params, json=kwargs)
+        return rest_call('POST', url, params=params, json=kwargs)
 
+    @endpoint
     def list_streams_enterprise_v2(self, skip=0, limit=50, **kwargs):
         """
         Returns a list of all the streams (IMs, MIMs, and chatrooms) for the calling
@@ -305,8 +341,18 @@ class StreamClient(APIClient):
             'skip': skip,
             'limit': limit
         }
-        return self.bot_client.execute_rest_call('POST', url, params=params, json=kwargs)
+        return rest_call('POST', url, params=params, json=kwargs)
 
+    def iter_streams_enterprise_v2(self, page_size=50, max_items=None, **kwargs):
+        """
+        Iterate over the streams of list_streams_enterprise_v2, page after page, see Paginator.
+        With a large page_size, such as 1000, scanning all the streams of the company takes a
+        few calls and holds two pages in memory at most.
+        """
+        return Paginator(self.bot_client, partial(self.list_streams_enterprise_v2.build, self, **kwargs),
+                         items_key='streams', page_size=page_size, max_items=max_items)
+
+    @endpoint
     def get_stream_members(self, stream_id, skip=0, limit=100):
         """
         Returns a list of all the current members of a stream (IM, MIM, or chatroom
@@ -323,4 +369,11 @@ class StreamClient(APIClient):
             'skip': skip,
             'limit': limit
         }
-        return self.bot_client.execute_rest_call('GET', url, params=params)
+        return rest_call('GET', url, params=params)
+
+    def iter_stream_members(self, stream_id, page_size=100, max_items=None):
+        """
+        Iterate over the members of get_stream_members, page after page, see Paginator.
+        """
+        return Paginator(self.bot_client, partial(self.get_stream_members.build, self, stream_id),
+                         items_key='members', page_size=page_size, max_items=max_items)
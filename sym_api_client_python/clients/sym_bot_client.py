@@ -1,6 +1,6 @@
-import json
+import asyncio
 import logging
-from json.decoder import JSONDecodeError
+import time
 
 import aiohttp
 import requests
@@ -8,15 +8,24 @@ import ssl
 
 from .admin_client import AdminClient
 from .api_client import APIClient
+from .async_session_pool import AsyncSessionPool
+from .bulk_sender import BulkSender
+from .connection_pool import mount_http_adapter
 from .connections_client import ConnectionsClient
 from .datafeed_client import DataFeedClient
 from .health_check_client import HealthCheckClient
+from .history_exporter import HistoryExporter
+from .json_codec import get_json_codec
 from .message_client import MessageClient
+from .retry_policy import RetryPolicy, is_replayable
 from .signals_client import SignalsClient
 from .stream_client import StreamClient
+from .token_refresher import TokenRefresher
+from .token_renewer import TokenRenewer
+from .user_cache import UserCache
 from .user_client import UserClient
+from .user_lookup_batcher import UserLookupBatcher
 from ..datafeed_event_service import AsyncDataFeedEventService, DataFeedEventService
-from ..exceptions.UnauthorizedException import UnauthorizedException
 
 # SymBotClient class is the Client class that has access to all of the other
 # client classes upon initialization, SymBotClient class gets an instance of
@@ -29,10 +38,30 @@ from ..exceptions.UnauthorizedException import UnauthorizedException
 # Saving this has as a constant because it's easily typoed and used everywhere
 _TRUSTSTORE_PATH = "truststorePath"
 
+_NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+def _to_async_params(params):
+    """The query parameters of an aiohttp request, which unlike requests rejects booleans and
+    None: booleans are sent as true and false and None values are dropped"""
+    if not isinstance(params, dict):
+        return params
+    return {key: (str(value).lower() if isinstance(value, bool) else value)
+            for key, value in params.items() if value is not None}
+
+
+class _RetryableResponse(Exception):
+    """Raised by a single attempt when the response status is to be retried"""
+
+    def __init__(self, status, headers):
+        super().__init__(status)
+        self.status = status
+        self.headers = headers
+
 
 class SymBotClient(APIClient):
 
-    def __init__(self, auth, config):
+    def __init__(self, auth, config, retry_policy=None, json_codec=None, user_cache=None):
         self.auth = auth
         self.config = config
         self.agentConfig = config
@@ -53,7 +82,15 @@ class SymBotClient(APIClient):
         self.bot_user_info = None
         self.health_check_client = None
         self.async_ssl_context = None
-
+        self.async_session_pool = None
+        self.retry_policy = retry_policy
+        self.json_codec = json_codec
+        self.user_cache = user_cache
+        self.user_lookup_batcher = None
+        self.bulk_sender = None
+        self.history_exporter = None
+        self.token_refresher = None
+        self.token_renewer = None
 
     def get_datafeed_event_service(self, *args, **kwargs):
         if self.datafeed_event_service is None:
@@ -122,6 +159,8 @@ class SymBotClient(APIClient):
                 'cache-control': 'no-cache'}
             )
             self.pod_session.proxies.update(self.config.data['podProxyRequestObject'])
+            mount_http_adapter(self.pod_session, self.config.data['podUrl'],
+                               self.config.data['podConnectionPool'])
             if self.config.data[_TRUSTSTORE_PATH]:
                 logging.debug("Setting truststorePath for pod to {}".format(
                     self.config.data[_TRUSTSTORE_PATH]))
@@ -139,6 +178,8 @@ class SymBotClient(APIClient):
                 'cache-control': 'no-cache'}
             )
             self.agent_session.proxies.update(self.config.data['agentProxyRequestObject'])
+            mount_http_adapter(self.agent_session, self.config.data['agentUrl'],
+                               self.config.data['agentConnectionPool'])
             if self.config.data[_TRUSTSTORE_PATH]:
                 logging.debug("Setting truststorePath for agent to {}".format(
                     self.config.data[_TRUSTSTORE_PATH])
@@ -147,9 +188,56 @@ class SymBotClient(APIClient):
 
         return self.agent_session
 
+    def get_retry_policy(self):
+        """Return the RetryPolicy of execute_rest_call and execute_rest_call_async, either the one
+        passed to the constructor or one built from the retryPolicy config entry"""
+        if self.retry_policy is None:
+            self.retry_policy = RetryPolicy.from_config(self.config)
+        return self.retry_policy
+
+    def get_json_codec(self):
+        """Return the JsonCodec decoding the responses, either the one passed to the constructor
+        or the one named by the jsonCodec config entry, orjson when installed by default"""
+        if self.json_codec is None:
+            self.json_codec = get_json_codec(self.config.data.get('jsonCodec', 'auto'))
+        return self.json_codec
+
+    def get_user_cache(self):
+        """Return the UserCache of the user lookups of UserClient, either the one passed to the
+        constructor or one built from the userCacheSize and userCacheTtl config entries. None when
+        users aren't cached, which is the default"""
+        if self.user_cache is None:
+            self.user_cache = UserCache.from_config(self.config)
+        return self.user_cache
+
+    def get_user_lookup_batcher(self):
+        """Return the UserLookupBatcher coalescing the user lookups of concurrent handlers into
+        /pod/v3/users calls, configured with userLookupBatchWindow and userLookupBatchSize"""
+        if self.user_lookup_batcher is None:
+            self.user_lookup_batcher = UserLookupBatcher.from_config(self.get_user_client(), self.config)
+        return self.user_lookup_batcher
+
+    def get_bulk_sender(self):
+        """Return the BulkSender sending messages to many streams concurrently, rate limited by
+        bulkSendRate and bulkSendBurst, with bulkSendConcurrency messages in flight"""
+        if self.bulk_sender is None:
+            self.bulk_sender = BulkSender.from_config(self, self.config)
+        return self.bulk_sender
+
+    def get_history_exporter(self):
+        """Return the HistoryExporter exporting the messages of many streams concurrently, configured
+        with historyExportConcurrency, historyExportRate and historyExportPageSize"""
+        if self.history_exporter is None:
+            self.history_exporter = HistoryExporter.from_config(self, self.config)
+        return self.history_exporter
+
     def execute_rest_call(self, method, path, **kwargs):
-        results = None
-        session = None
+        """Make a REST call and return its JSON decoded result. 401 responses, after the tokens
+        have been refreshed, and the retry statuses of the RetryPolicy are retried with backoff.
+
+        With stream=True, successful responses are returned unread, for the caller to read their
+        body as it arrives and close them. A retry_policy kwarg replaces the RetryPolicy of the
+        bot client for this call"""
         if path.startswith("/agent/"):
             url = self.config.data["agentUrl"] + path
             session = self.get_agent_session()
@@ -160,6 +248,29 @@ class SymBotClient(APIClient):
             url = path
             session = self.get_agent_session()
 
+        policy = kwargs.pop('retry_policy', None) or self.get_retry_policy()
+        if not is_replayable(kwargs):
+            # The body is consumed by the first attempt, a retry would send it empty
+            policy = _NO_RETRY
+        attempt = 1
+        while True:
+            try:
+                return self._execute_rest_call_once(session, method, url, policy, attempt, **kwargs)
+            except _RetryableResponse as retryable:
+                delay = policy.get_delay(attempt, retryable.headers)
+                logging.debug('bot_client/execute_rest_call() - {} {} returned {}, retrying in {:.3g}s'
+                              .format(method, path, retryable.status, delay))
+            except Exception as exc:
+                if not policy.should_retry_exception(exc, attempt):
+                    raise
+                delay = policy.get_delay(attempt)
+                logging.debug('bot_client/execute_rest_call() - caught {}, retrying in {:.3g}s'
+                              .format(type(exc).__name__, delay))
+            time.sleep(delay)
+            attempt += 1
+
+    def _execute_rest_call_once(self, session, method, url, policy, attempt, **kwargs):
+        token_generation = self.get_token_refresher().generation
         try:
             response = session.request(method, url, **kwargs)
         except requests.exceptions.ConnectionError as err:
@@ -167,41 +278,56 @@ class SymBotClient(APIClient):
             logging.debug(type(err))
             logging.debug('ensure pod/agent subdomains are correct')
             raise
+        if kwargs.get('stream') and response.status_code in (200, 201, 204):
+            return response
         if response.status_code == 204:
             results = []
         elif response.status_code == 200 or response.status_code == 201:
             try:
-                results = json.loads(response.text)
-            except JSONDecodeError:
+                results = self.get_json_codec().decode(response.content, response.headers.get('Content-Type'))
+            except ValueError:
                 results = response.text
+        elif policy.should_retry_status(response.status_code, attempt):
+            response.close()
+            raise _RetryableResponse(response.status_code, response.headers)
         else:
             # Try to get the json to be used to handle the error message
             error_json = None
             text = None
             try:
-                error_json = response.json()
-            except JSONDecodeError:
+                error_json = self.get_json_codec().decode(response.content, response.headers.get('Content-Type'))
+            except ValueError:
                 try:
                     text = response.text
                 except Exception:
                     text = None
-            try:
-                super().handle_error(response, self, error_json, text)
-            except UnauthorizedException:
-                logging.debug('caught UnauthorizedException - try execute_rest_call() again')
-                self.execute_rest_call(method, path, **kwargs)
+            super().handle_error(response, self, error_json, text, token_generation=token_generation)
         return results
 
+    def get_async_session_pool(self):
+        """Return the AsyncSessionPool holding the aiohttp sessions and connectors, configured
+        from the asyncConnectionLimit, asyncConnectionLimitPerHost, asyncKeepaliveTimeout and
+        asyncDnsCacheTtl config values"""
+        if self.async_session_pool is None:
+            self.async_session_pool = AsyncSessionPool.from_config(self.config)
+        return self.async_session_pool
+
+    def get_async_pool_stats(self):
+        """Return the connection counts of each host of the async pool, see AsyncSessionPool"""
+        if self.async_session_pool is None:
+            return []
+        return self.async_session_pool.get_stats()
 
     def get_async_pod_session(self):
         """This is the method to retrieve the session object for asynchronous calls with aiohttp"""
         if self.async_pod_session is None:
             logging.debug('bot_client/get_pod_session() - creating async pod session')
-            self.async_pod_session = aiohttp.ClientSession(
-            headers = {
-                'sessionToken': self.auth.get_session_token(),
-                'cache-control': 'no-cache'}
-                )
+            self.async_pod_session = self.get_async_session_pool().get_session(
+                'pod', self.config.data['podUrl'],
+                headers={
+                    'sessionToken': self.auth.get_session_token(),
+                    'cache-control': 'no-cache'}
+            )
             # For aiohttp proxies and truststore are handled when the request is made
         return self.async_pod_session
 
@@ -209,11 +335,12 @@ class SymBotClient(APIClient):
         """This is the method to retrieve the session object for asynchronous calls with aiohttp"""
         if self.async_agent_session is None:
             logging.debug('bot_client/get_agent_session() - creating async agent session')
-            self.async_agent_session = aiohttp.ClientSession(
-            headers = {
-                'sessionToken': self.auth.get_session_token(),
-                'keyManagerToken': self.auth.get_key_manager_token(),
-                'cache-control': 'no-cache'}
+            self.async_agent_session = self.get_async_session_pool().get_session(
+                'agent', self.config.data['agentUrl'],
+                headers={
+                    'sessionToken': self.auth.get_session_token(),
+                    'keyManagerToken': self.auth.get_key_manager_token(),
+                    'cache-control': 'no-cache'}
             )
             # For aiohttp proxies and truststore are handled when the request is made
         return self.async_agent_session
@@ -221,10 +348,9 @@ class SymBotClient(APIClient):
     # Known issue on this function when using a proxy due to an outstanding issue with aiohttp
     # To workaround this please check README.md
     async def execute_rest_call_async(self, method, path, **kwargs):
-        """This is the asynchronous method to hit the rest api, it should be awaited"""
-        results = None
-        session = None
-
+        """This is the asynchronous method to hit the rest api, it should be awaited. Calls are
+        retried in the same way as with execute_rest_call, and with stream=True successful
+        responses are returned unread as well, to be read from response.content and released"""
         if path.startswith("/agent/"):
             url = self.config.data["agentUrl"] + path
             session = self.get_async_agent_session()
@@ -241,8 +367,36 @@ class SymBotClient(APIClient):
             session = self.get_async_pod_session()
             http_proxy = self.config.data['podProxyRequestObject'].get("http")
 
+        if kwargs.get('params'):
+            kwargs['params'] = _to_async_params(kwargs['params'])
+
+        policy = kwargs.pop('retry_policy', None) or self.get_retry_policy()
+        if not is_replayable(kwargs):
+            # The body is consumed by the first attempt, a retry would send it empty
+            policy = _NO_RETRY
+        attempt = 1
+        while True:
+            try:
+                return await self._execute_rest_call_once_async(
+                    session, method, url, http_proxy, policy, attempt, **kwargs)
+            except _RetryableResponse as retryable:
+                delay = policy.get_delay(attempt, retryable.headers)
+                logging.debug('bot_client/execute_rest_call_async() - {} {} returned {}, retrying in {:.3g}s'
+                              .format(method, path, retryable.status, delay))
+            except Exception as exc:
+                if not policy.should_retry_exception(exc, attempt):
+                    raise
+                delay = policy.get_delay(attempt)
+                logging.debug('bot_client/execute_rest_call_async() - caught {}, retrying in {:.3g}s'
+                              .format(type(exc).__name__, delay))
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _execute_rest_call_once_async(self, session, method, url, http_proxy, policy, attempt,
+                                            **kwargs):
         # This is to handle the files keyword
         files = kwargs.pop("files", None)
+        stream = kwargs.pop("stream", False)
 
         # The below attempts to handle a files kwarg in the same way that Requests handles it
         if files is not None:
@@ -262,7 +416,7 @@ class SymBotClient(APIClient):
         else:
             data = None
 
-
+        token_generation = self.get_token_refresher().generation
         try:
             response = await session.request(method, url, proxy=http_proxy, ssl=self.get_async_ssl_context(), data=data, **kwargs)
         except aiohttp.ClientConnectionError as err:
@@ -271,57 +425,96 @@ class SymBotClient(APIClient):
             logging.debug('ensure pod/agent subdomains are correct')
             raise
 
+        if stream and response.status in (200, 201, 204):
+            return response
         if response.status == 204:
             results = []
-        elif response.status == 200:
-            text = await response.text()
+        elif response.status == 200 or response.status == 201:
+            body = await response.read()
 
             try:
-                results = json.loads(text)
-            except JSONDecodeError:
-                results = text
+                results = self.get_json_codec().decode(body, response.headers.get('Content-Type'))
+            except ValueError:
+                results = await response.text()
+        elif policy.should_retry_status(response.status, attempt):
+            response.release()
+            raise _RetryableResponse(response.status, response.headers)
         else:
             # Try to get the json to be used to handle the error message
             error_json = None
             text = None
             try:
-                error_json = await response.json()
-            except JSONDecodeError:
+                error_json = self.get_json_codec().decode(await response.read(),
+                                                          response.headers.get('Content-Type'))
+            except ValueError:
                 try:
                     text = await response.text()
                 except Exception:
                     text = None
-            try:
-                super().handle_error(response, self, error_json, text)
-            except UnauthorizedException:
-                await self.execute_rest_call_async(method, path, **kwargs)
+            if response.status == 401:
+                # Refresh without blocking the event loop, handle_error then finds the tokens
+                # already refreshed and only raises
+                await self.reauth_client_async(token_generation)
+            super().handle_error(response, self, error_json, text, token_generation=token_generation)
         return results
 
-    def reauth_client(self):
+    def get_token_refresher(self):
+        if self.token_refresher is None:
+            # On the async path the auth classes authenticate with aiohttp when they can
+            refresh_tokens_async = self._refresh_tokens_async \
+                if asyncio.iscoroutinefunction(getattr(self.auth, 'authenticate_async', None)) else None
+            self.token_refresher = TokenRefresher(self._refresh_tokens, refresh_tokens_async)
+        return self.token_refresher
+
+    def get_token_renewer(self):
+        """Return the TokenRenewer refreshing the tokens ahead of their expiry, configured from the
+        authTokenLifetime, authTokenRenewalRatio and authTokenRenewalRetryInterval config values.
+        It isn't started, call start() or start_async() on it"""
+        if self.token_renewer is None:
+            self.token_renewer = TokenRenewer.from_config(self)
+        return self.token_renewer
+
+    def reauth_client(self, token_generation=None):
+        """Refresh the tokens and update the sessions with them. Concurrent callers share a
+        single refresh, and if token_generation is given nothing is done when the tokens have
+        already been refreshed since, see TokenRefresher"""
+        self.get_token_refresher().refresh(token_generation)
+
+    async def reauth_client_async(self, token_generation=None):
+        """Same as reauth_client, without blocking the event loop"""
+        await self.get_token_refresher().refresh_async(token_generation)
+
+    def _refresh_tokens(self):
         self.auth.authenticate()
+        self._update_session_tokens()
+
+    async def _refresh_tokens_async(self):
+        await self.auth.authenticate_async()
+        self._update_session_tokens()
+
+    def _update_session_tokens(self):
         if self.pod_session:
-            logging.debug('bot_client/reauth_client() - pod session exists')
+            logging.debug('bot_client/_update_session_tokens() - pod session exists')
             self.pod_session.headers.update({
                 'sessionToken': self.auth.get_session_token()}
             )
         if self.agent_session:
-            logging.debug('bot_client/reauth_client() - agent session exists')
+            logging.debug('bot_client/_update_session_tokens() - agent session exists')
             self.agent_session.headers.update({
                 'sessionToken' : self.auth.get_session_token(),
                 'keyManagerToken': self.auth.get_key_manager_token()}
             )
 
+        # The async sessions keep their connections, only their headers are replaced
         if self.async_pod_session:
-            logging.debug('bot_client/reauth_client() - async pod session exists')
-            self.async_pod_session = aiohttp.ClientSession(
-            headers = {
+            logging.debug('bot_client/_update_session_tokens() - async pod session exists')
+            self.async_session_pool.update_headers('pod', {
                 'sessionToken': self.auth.get_session_token()}
             )
 
         if self.async_agent_session:
-            logging.debug('bot_client/reauth_client() - async agent session exists')
-            self.async_agent_session = aiohttp.ClientSession(
-            headers = {
+            logging.debug('bot_client/_update_session_tokens() - async agent session exists')
+            self.async_session_pool.update_headers('agent', {
                 'sessionToken': self.auth.get_session_token(),
                 'keyManagerToken': self.auth.get_key_manager_token()}
             )
@@ -357,12 +550,17 @@ class SymBotClient(APIClient):
         just ensures that doesn't happen and gives a cleaner output from the SDK.
 
         For most usecases this method can be safely omitted.
+
+        This also closes the connectors of the AsyncSessionPool, the next asynchronous call
+        opens new connections, and stops the TokenRenewer task if there is one.
         """
         logging.debug("Manually closing sessions")
-        if self.async_pod_session:
-            await self.async_pod_session.close()
-            self.async_pod_session = None
-
-        if self.async_agent_session:
-            await self.async_agent_session.close()
-            self.async_agent_session = None
+        if self.token_renewer is not None:
+            await self.token_renewer.stop_async()
+        close_auth_session = getattr(self.auth, 'close_async_auth_session', None)
+        if asyncio.iscoroutinefunction(close_auth_session):
+            await close_auth_session()
+        self.async_pod_session = None
+        self.async_agent_session = None
+        if self.async_session_pool is not None:
+            await self.async_session_pool.close()
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+
+log = logging.getLogger(__name__)
+
+
+class TokenRefresher:
+    """Runs at most one token refresh at a time, shared by every thread and coroutine.
+
+    The first caller of refresh or refresh_async becomes the leader and calls refresh_tokens,
+    the callers arriving while it runs wait for its outcome instead of authenticating again,
+    and all of them see the same result or exception.
+
+    Every completed refresh increments generation. A caller records the generation before
+    sending its request and passes it to refresh after a 401: if the tokens have been refreshed
+    since, the request simply failed with the old tokens and refresh returns straight away, so
+    a burst of 401s from requests that were in flight during an expiry costs one refresh.
+
+    refresh_async never blocks the event loop: the leader awaits refresh_tokens_async when there
+    is one, otherwise it runs refresh_tokens in the default executor, and the followers await the
+    shared future. The refresh runs in its own task or thread, so cancelling the caller that
+    started it doesn't leave the others waiting forever.
+
+    A refresh call made from the thread of the event loop running a refresh_tokens_async task,
+    e.g. a sync call of an async listener getting a 401, can't wait for that task, which only
+    runs once the call returns. It refreshes the tokens itself instead.
+    """
+
+    def __init__(self, refresh_tokens, refresh_tokens_async=None):
+        self.refresh_tokens = refresh_tokens
+        self.refresh_tokens_async = refresh_tokens_async
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._future = None
+        self._task = None
+        self._task_loop = None
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def refresh(self, seen_generation=None):
+        """Refresh the tokens, or wait for the refresh already running, and return the new
+        generation. Nothing is done if the tokens were refreshed after seen_generation."""
+        future, leader = self._join(seen_generation)
+        if leader:
+            self._run(future)
+        elif not future.done() and self._is_task_on_current_loop():
+            log.debug('TokenRefresher - refresh in progress on the event loop of this thread, refreshing here')
+            self.refresh_tokens()
+            with self._lock:
+                self._generation += 1
+                return self._generation
+        return future.result()
+
+    async def refresh_async(self, seen_generation=None):
+        """Same as refresh, to be awaited from within the event loop"""
+        future, leader = self._join(seen_generation)
+        if leader:
+            if self.refresh_tokens_async is not None:
+                self._task_loop = asyncio.get_event_loop()
+                self._task = asyncio.ensure_future(self._run_async(future))
+            else:
+                asyncio.get_event_loop().run_in_executor(None, self._run, future)
+        return await asyncio.wrap_future(future)
+
+    def _join(self, seen_generation):
+        with self._lock:
+            if seen_generation is not None and self._generation > seen_generation:
+                log.debug('TokenRefresher - tokens already refreshed since generation {}'
+                          .format(seen_generation))
+                future = Future()
+                future.set_result(self._generation)
+                return future, False
+            if self._future is not None:
+                log.debug('TokenRefresher - waiting for the refresh in progress')
+                return self._future, False
+            self._future = Future()
+            return self._future, True
+
+    def _run(self, future):
+        log.debug('TokenRefresher - refreshing tokens')
+        try:
+            self.refresh_tokens()
+        except BaseException as exc:
+            self._fail(future, exc)
+            if not isinstance(exc, Exception):
+                raise
+        else:
+            self._complete(future)
+
+    async def _run_async(self, future):
+        log.debug('TokenRefresher - refreshing tokens asynchronously')
+        try:
+            await self.refresh_tokens_async()
+        except BaseException as exc:
+            self._fail(future, exc)
+            if not isinstance(exc, Exception):
+                raise
+        else:
+            self._complete(future)
+        finally:
+            self._task = None
+            self._task_loop = None
+
+    def _is_task_on_current_loop(self):
+        task_loop = self._task_loop
+        return task_loop is not None and task_loop is _get_running_loop()
+
+    def _complete(self, future):
+        with self._lock:
+            self._generation += 1
+            self._future = None
+            generation = self._generation
+        future.set_result(generation)
+
+    def _fail(self, future, exc):
+        with self._lock:
+            self._future = None
+        future.set_exception(exc)
+
+
+def _get_running_loop():
+    """The event loop running in this thread, None if there is none"""
+    try:
+        return asyncio.get_running_loop()
+    except AttributeError:
+        # Python 3.6
+        return asyncio._get_running_loop()
+    except RuntimeError:
+        return None
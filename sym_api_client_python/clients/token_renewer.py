@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class TokenRenewer:
+    """Refreshes the session and key manager tokens of a SymBotClient before they expire.
+
+    Without it tokens are only refreshed once a request has failed with a 401, which adds a
+    failed request and a full authentication to the first call after an expiry. The renewer
+    refreshes them once renewal_ratio of their lifetime has passed, through the same single
+    refresh as the 401 handling (see TokenRefresher), which pushes the new tokens into every
+    live session while the old ones are still valid.
+
+    The lifetime is taken from the expireAt of the authentication responses when the pod
+    returns one, otherwise token_lifetime seconds from the last authentication is assumed.
+    A failed refresh is tried again after retry_interval seconds.
+
+    Run it as a daemon thread for synchronous bots:
+
+        renewer = bot_client.get_token_renewer()
+        renewer.start()
+        ...
+        renewer.stop()
+
+    or as a task for asynchronous bots, which doesn't block the event loop while authenticating:
+
+        renewer.start_async()
+        ...
+        await renewer.stop_async()
+    """
+
+    def __init__(self, bot_client, token_lifetime=3600, renewal_ratio=0.8, retry_interval=30):
+        if not 0 < renewal_ratio < 1:
+            raise ValueError('renewal_ratio must be between 0 and 1, got {}'.format(renewal_ratio))
+        self.bot_client = bot_client
+        self.token_lifetime = token_lifetime
+        self.renewal_ratio = renewal_ratio
+        self.retry_interval = retry_interval
+        self.renewals = 0
+        self._thread = None
+        self._stopped = threading.Event()
+        self._task = None
+
+    @classmethod
+    def from_config(cls, bot_client):
+        config = bot_client.get_sym_config()
+        return cls(
+            bot_client,
+            token_lifetime=config.data.get('authTokenLifetime', 3600),
+            renewal_ratio=config.data.get('authTokenRenewalRatio', 0.8),
+            retry_interval=config.data.get('authTokenRenewalRetryInterval', 30),
+        )
+
+    @property
+    def running(self):
+        return (self._thread is not None and self._thread.is_alive()) or \
+               (self._task is not None and not self._task.done())
+
+    def get_delay(self, now=None):
+        """Seconds until the tokens should be renewed, 0 if they already should have been"""
+        now = time.time() if now is None else now
+        auth = self.bot_client.get_sym_auth()
+        issued_at = getattr(auth, 'last_auth_time', 0) / 1000
+        if not issued_at:
+            return 0
+        expiries = [expire_at / 1000 for expire_at in (getattr(auth, 'session_token_expire_at', None),
+                                                       getattr(auth, 'key_manager_token_expire_at', None))
+                    if expire_at]
+        expire_at = min(expiries) if expiries else issued_at + self.token_lifetime
+        renew_at = issued_at + (expire_at - issued_at) * self.renewal_ratio
+        return max(0, renew_at - now)
+
+    def start(self):
+        """Renew the tokens from a daemon thread"""
+        if self.running:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='TokenRenewer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def start_async(self):
+        """Renew the tokens from a task, must be called from within the running event loop"""
+        if self.running:
+            return self._task
+        self._task = asyncio.ensure_future(self._run_async())
+        return self._task
+
+    async def stop_async(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _run(self):
+        log.debug('TokenRenewer - started')
+        while not self._stopped.wait(self.get_delay()):
+            try:
+                self.bot_client.reauth_client()
+            except Exception as exc:
+                log.exception('TokenRenewer - Failed to renew tokens, trying again in {}s: {}'
+                              .format(self.retry_interval, exc))
+                if self._stopped.wait(self.retry_interval):
+                    break
+                continue
+            self.renewals += 1
+            log.debug('TokenRenewer - tokens renewed')
+        log.debug('TokenRenewer - stopped')
+
+    async def _run_async(self):
+        log.debug('TokenRenewer - started')
+        while True:
+            await asyncio.sleep(self.get_delay())
+            try:
+                await self.bot_client.reauth_client_async()
+            except Exception as exc:
+                log.exception('TokenRenewer - Failed to renew tokens, trying again in {}s: {}'
+                              .format(self.retry_interval, exc))
+                await asyncio.sleep(self.retry_interval)
+                continue
+            self.renewals += 1
+            log.debug('TokenRenewer - tokens renewed')
@@ -0,0 +1,97 @@
+import asyncio
+import io
+import logging
+
+# Bytes read from an attachment at a time by the asynchronous uploads
+CHUNK_SIZE = 65536
+
+
+def get_remaining_size(file):
+    """Bytes left to read from a seekable file, None when it can't be known, e.g. for a pipe"""
+    try:
+        position = file.tell()
+        end = file.seek(0, io.SEEK_END)
+        file.seek(position)
+    except (AttributeError, OSError, ValueError):
+        return None
+    return end - position
+
+
+class UploadProgress:
+    """Counts the bytes of the attachments of an upload read so far and reports them to a
+    progress(bytes_sent, total_bytes) callback, total_bytes being None when the size of an
+    attachment isn't known, e.g. for an async iterator."""
+
+    def __init__(self, progress=None):
+        self.progress = progress
+        self.bytes_sent = 0
+        self.total_bytes = 0
+
+    def wrap(self, attachment):
+        """Return the body of an attachment for requests, read in chunks as it is sent"""
+        if isinstance(attachment, (bytes, bytearray)):
+            attachment = io.BytesIO(attachment)
+        body = UploadFile(attachment, self)
+        if body.len is None:
+            raise ValueError('The size of an attachment needs to be known to upload it with requests, '
+                             'use the _async version to upload it chunked')
+        self._add_size(body.len)
+        return body
+
+    def wrap_async(self, attachment):
+        """Return the body of an attachment for aiohttp, an async iterator of its chunks"""
+        if isinstance(attachment, (bytes, bytearray)):
+            attachment = io.BytesIO(attachment)
+        if hasattr(attachment, '__aiter__'):
+            self._add_size(None)
+            return self._iter_async(attachment)
+        self._add_size(get_remaining_size(attachment))
+        return self._iter_file_async(attachment)
+
+    def add(self, size):
+        self.bytes_sent += size
+        if self.progress is not None:
+            self.progress(self.bytes_sent, self.total_bytes)
+
+    def _add_size(self, size):
+        if size is None or self.total_bytes is None:
+            self.total_bytes = None
+        else:
+            self.total_bytes += size
+
+    async def _iter_async(self, chunks):
+        async for chunk in chunks:
+            self.add(len(chunk))
+            yield chunk
+
+    async def _iter_file_async(self, file):
+        loop = asyncio.get_event_loop()
+        while True:
+            # Files are read off the event loop, like aiohttp does for the files it sends
+            chunk = await loop.run_in_executor(None, file.read, CHUNK_SIZE)
+            if not chunk:
+                return
+            self.add(len(chunk))
+            yield chunk
+
+
+class UploadFile:
+    """File-like reading an attachment for MultipartEncoder, which sends it in chunks. Its len is
+    what is left to read, as MultipartEncoder expects, and the bytes read are counted by the
+    UploadProgress of the upload. Wrapping BytesIO this way also keeps MultipartEncoder from
+    copying its whole content."""
+
+    def __init__(self, file, upload_progress):
+        self.file = file
+        self.upload_progress = upload_progress
+        self.len = get_remaining_size(file)
+
+    def read(self, size=-1):
+        data = self.file.read(size if size is not None and size >= 0 else -1)
+        if data:
+            self.len -= len(data)
+            self.upload_progress.add(len(data))
+        elif self.len:
+            logging.debug('UploadFile/read() - attachment ended {} bytes early'.format(self.len))
+            self.len = 0
+        return data
@@ -0,0 +1,181 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+UserCacheStats = namedtuple('UserCacheStats', 'size pending hits misses expired evictions')
+
+# Fields of the user objects of the datafeed events named differently in the users of the pod
+_EVENT_USER_FIELDS = {'userId': 'id', 'email': 'emailAddress'}
+
+
+class _Entry:
+    __slots__ = ('user', 'complete', 'expires_at')
+
+    def __init__(self, user, complete, expires_at):
+        self.user = user
+        self.complete = complete
+        self.expires_at = expires_at
+
+
+class UserCache:
+    """Directory of the users looked up by UserClient, by id, email and username.
+
+    Users are kept for ttl_sec and at most max_size of them are kept, the least recently used
+    being evicted first. UserClient caches the users returned by the pod, and the datafeed event
+    services add the initiators and affected users of the events they read with observe_events:
+
+        user_cache = UserCache(max_size=10000, ttl_sec=300)
+        user_cache.put(user)
+        user_cache.get(user_id)
+        user_cache.invalidate(user_id)
+
+    The user objects of the events only have some of the fields of a user, so these partial
+    entries are only returned with partial=True. Their ids are queued instead, see take_pending,
+    so that UserClient fetches them along with the next miss in one /pod/v3/users call.
+
+    The cache is thread safe, so that it can be shared by the workers of a DatafeedPipeline.
+    """
+
+    def __init__(self, max_size=10000, ttl_sec=300, clock=time.monotonic):
+        if max_size < 1:
+            raise ValueError('A user cache needs a size of at least 1, got {}'.format(max_size))
+        self.max_size = max_size
+        self.ttl_sec = ttl_sec
+        self.clock = clock
+
+        self._entries = OrderedDict()
+        self._emails = {}
+        self._usernames = {}
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+
+    @classmethod
+    def from_config(cls, config):
+        """Build the cache configured by userCacheSize and userCacheTtl, None when userCacheSize is
+        0 or not set"""
+        max_size = config.data.get('userCacheSize', 0)
+        if not max_size:
+            return None
+        return cls(max_size=max_size, ttl_sec=config.data.get('userCacheTtl', 300))
+
+    def get(self, user_id, partial=False):
+        """Return the cached user of the given id, None if there is none"""
+        with self._lock:
+            return self._get(user_id, partial)
+
+    def get_by_email(self, email, partial=False):
+        with self._lock:
+            return self._get(self._emails.get(email.lower()), partial)
+
+    def get_by_username(self, username, partial=False):
+        with self._lock:
+            return self._get(self._usernames.get(username), partial)
+
+    def put(self, user):
+        """Cache a user returned by the pod, such as the users of /pod/v2/user and /pod/v3/users"""
+        with self._lock:
+            self._put(user, True)
+
+    def observe(self, user):
+        """Cache the user object of a datafeed event, unless the user is already cached"""
+        user_id = user.get('userId')
+        if user_id is None:
+            return
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry.expires_at > self.clock():
+                return
+            self._put({_EVENT_USER_FIELDS.get(key, key): value for key, value in user.items()}, False)
+            self._pending[user_id] = None
+            if len(self._pending) > self.max_size:
+                self._pending.popitem(last=False)
+
+    def observe_events(self, events):
+        """Cache the initiators and affected users of datafeed events"""
+        for event in events:
+            if not event:
+                continue
+            user = (event.get('initiator') or {}).get('user')
+            if user:
+                self.observe(user)
+            for data in (event.get('payload') or {}).values():
+                affected_user = data.get('affectedUser') if isinstance(data, dict) else None
+                if affected_user:
+                    self.observe(affected_user)
+
+    def take_pending(self, limit, exclude=()):
+        """Remove and return up to limit ids of users only seen in events, to be fetched"""
+        user_ids = []
+        with self._lock:
+            while self._pending and len(user_ids) < limit:
+                user_id = self._pending.popitem(last=False)[0]
+                if user_id not in exclude:
+                    user_ids.append(user_id)
+        return user_ids
+
+    def invalidate(self, user_id=None, email=None, username=None):
+        """Remove a user from the cache, by id, email or username"""
+        with self._lock:
+            if email is not None:
+                user_id = self._emails.get(email.lower(), user_id)
+            if username is not None:
+                user_id = self._usernames.get(username, user_id)
+            if user_id is not None:
+                self._remove(user_id)
+                self._pending.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._emails.clear()
+            self._usernames.clear()
+            self._pending.clear()
+
+    def get_stats(self):
+        with self._lock:
+            return UserCacheStats(len(self._entries), len(self._pending), self._hits, self._misses,
+                                  self._expired, self._evictions)
+
+    def _get(self, user_id, partial):
+        entry = self._entries.get(user_id) if user_id is not None else None
+        if entry is not None and entry.expires_at <= self.clock():
+            self._remove(user_id)
+            self._expired += 1
+            entry = None
+        if entry is None or not (entry.complete or partial):
+            self._misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self._hits += 1
+        return entry.user
+
+    def _put(self, user, complete):
+        user_id = user.get('id')
+        if user_id is None:
+            return
+        self._remove(user_id)
+        self._entries[user_id] = _Entry(user, complete, self.clock() + self.ttl_sec)
+        if user.get('emailAddress'):
+            self._emails[user['emailAddress'].lower()] = user_id
+        if user.get('username'):
+            self._usernames[user['username']] = user_id
+        if complete:
+            self._pending.pop(user_id, None)
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+            self._evictions += 1
+
+    def _remove(self, user_id):
+        entry = self._entries.pop(user_id, None)
+        if entry is None:
+            return
+        email = entry.user.get('emailAddress')
+        if email and self._emails.get(email.lower()) == user_id:
+            del self._emails[email.lower()]
+        username = entry.user.get('username')
+        if username and self._usernames.get(username) == user_id:
+            del self._usernames[username]
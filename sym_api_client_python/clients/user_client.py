@@ -1,6 +1,9 @@
 import logging
+from functools import partial
 
 from .api_client import APIClient
+from .endpoint import endpoint, rest_call
+from .paginator import Paginator
 
 
 # logging.basicConfig(filename='logs/example.log', format='%(asctime)s - %(
@@ -14,50 +17,187 @@ from .api_client import APIClient
 
 
 class UserClient(APIClient):
+    """The user lookups by id, email, username and lists of ids go through the UserCache of the
+    bot client when there is one, see SymBotClient.get_user_cache. The users missing from the
+    cache are then fetched with /pod/v3/users, userCacheBatchSize ids at a time, along with the
+    users seen in datafeed events and not fetched yet. Lookups with local=True bypass the cache,
+    which holds the users of every pod, and go to the pod."""
 
     def __init__(self, bot_client):
         self.bot_client = bot_client
+        self.batch_size = bot_client.get_sym_config().data.get('userCacheBatchSize', 100)
 
     def get_user_from_user_name(self, user_name):
         logging.debug('UserClient/get_user_from_user_name()')
-        url = '/pod/v2/user'
-        params = {'username': user_name}
-        return self.bot_client.execute_rest_call('GET', url, params=params)
+        user = self._get_cached_user(username=user_name)
+        if user is not None:
+            return user
+        return self._cache_user(self._get_user({'username': user_name}))
+
+    async def get_user_from_user_name_async(self, user_name):
+        logging.debug('UserClient/get_user_from_user_name_async()')
+        user = self._get_cached_user(username=user_name)
+        if user is not None:
+            return user
+        return self._cache_user(await self._get_user_async({'username': user_name}))
 
     def get_user_from_email(self, email, local=False):
         logging.debug('UserClient/get_user_from_email()')
-        url = '/pod/v2/user'
-        params = {'email': email, 'local':local}
-        return self.bot_client.execute_rest_call('GET', url, params=params)
+        user = self._get_cached_user(email=email, local=local)
+        if user is not None:
+            return user
+        return self._cache_user(self._get_user({'email': email, 'local': local}))
+
+    async def get_user_from_email_async(self, email, local=False):
+        logging.debug('UserClient/get_user_from_email_async()')
+        user = self._get_cached_user(email=email, local=local)
+        if user is not None:
+            return user
+        return self._cache_user(await self._get_user_async({'email': email, 'local': local}))
 
     def get_user_from_id(self, user_id, local=False):
         logging.debug('UserClient/get_user_from_id()')
-        url = '/pod/v2/user'
-        params = {'uid': user_id, 'local':local}
-        return self.bot_client.execute_rest_call('GET', url, params=params)
+        user_cache = self._get_user_cache(local)
+        if user_cache is not None:
+            user = user_cache.get(user_id)
+            if user is None:
+                user = self._fetch_users(self._get_user_ids_to_fetch(user_id), local)[0].get(user_id)
+            if user is not None:
+                return user
+        # Not cached or not returned by /pod/v3/users, which lists unknown users in its errors
+        return self._cache_user(self._get_user({'uid': user_id, 'local': local}))
+
+    async def get_user_from_id_async(self, user_id, local=False):
+        logging.debug('UserClient/get_user_from_id_async()')
+        user_cache = self._get_user_cache(local)
+        if user_cache is not None:
+            user = user_cache.get(user_id)
+            if user is None:
+                users, _ = await self._fetch_users_async(self._get_user_ids_to_fetch(user_id), local)
+                user = users.get(user_id)
+            if user is not None:
+                return user
+        return self._cache_user(await self._get_user_async({'uid': user_id, 'local': local}))
+
+    @endpoint
+    def _get_user(self, params):
+        return rest_call('GET', '/pod/v2/user', params=params)
 
     def get_users_from_id_list(self, user_id_list, local=False):
         logging.debug('UserClient/get_users_from_id_list()')
+        if self._get_user_cache(local) is None:
+            return self._get_users_from_id_list(user_id_list, local)
+
+        users, missing = self._get_cached_users(user_id_list)
+        fetched, errors = self._fetch_users(missing, local)
+        users.update(fetched)
+        return {'users': [users[user_id] for user_id in user_id_list if user_id in users], 'errors': errors}
+
+    async def get_users_from_id_list_async(self, user_id_list, local=False):
+        logging.debug('UserClient/get_users_from_id_list_async()')
+        if self._get_user_cache(local) is None:
+            return await self._get_users_from_id_list_async(user_id_list, local)
+
+        users, missing = self._get_cached_users(user_id_list)
+        fetched, errors = await self._fetch_users_async(missing, local)
+        users.update(fetched)
+        return {'users': [users[user_id] for user_id in user_id_list if user_id in users], 'errors': errors}
+
+    @endpoint
+    def _get_users_from_id_list(self, user_id_list, local):
         url = '/pod/v3/users'
         users_array = ','.join(map(str, user_id_list))
         params = {'uid': users_array, 'local': local}
-        return self.bot_client.execute_rest_call('GET', url, params=params)
+        return rest_call('GET', url, params=params)
+
+    def _fetch_users(self, user_ids, local):
+        """Fetch users with /pod/v3/users, batch_size at a time, and cache them. Return the users
+        by id and the errors"""
+        users = {}
+        errors = []
+        for start in range(0, len(user_ids), self.batch_size):
+            result = self._get_users_from_id_list(user_ids[start:start + self.batch_size], local)
+            self._cache_users(result, users, errors)
+        return users, errors
 
+    async def _fetch_users_async(self, user_ids, local):
+        users = {}
+        errors = []
+        for start in range(0, len(user_ids), self.batch_size):
+            result = await self._get_users_from_id_list_async(user_ids[start:start + self.batch_size], local)
+            self._cache_users(result, users, errors)
+        return users, errors
+
+    def _get_user_cache(self, local=False):
+        """The UserCache to look users up in, None without one or for a local lookup. The users
+        cached from other lookups and from events may belong to other pods"""
+        return None if local else self.bot_client.get_user_cache()
+
+    def _get_cached_user(self, email=None, username=None, local=False):
+        user_cache = self._get_user_cache(local)
+        if user_cache is None:
+            return None
+        if email is not None:
+            return user_cache.get_by_email(email)
+        return user_cache.get_by_username(username)
+
+    def _get_user_ids_to_fetch(self, user_id):
+        """The id of a user missing from the cache, and of users seen in events to fetch with it"""
+        user_cache = self.bot_client.get_user_cache()
+        return [user_id] + user_cache.take_pending(self.batch_size - 1, exclude=(user_id,))
+
+    def _get_cached_users(self, user_id_list):
+        """Return the cached users by id and the ids of the others"""
+        user_cache = self.bot_client.get_user_cache()
+        users = {}
+        missing = []
+        for user_id in user_id_list:
+            user = user_cache.get(user_id)
+            if user is None:
+                missing.append(user_id)
+            else:
+                users[user_id] = user
+        return users, missing
+
+    def _cache_users(self, result, users, errors):
+        if not isinstance(result, dict):
+            # 204, none of the users were found
+            return
+        user_cache = self.bot_client.get_user_cache()
+        for user in result.get('users', []):
+            user_cache.put(user)
+            users[user.get('id')] = user
+        errors.extend(result.get('errors', []))
+
+    def _cache_user(self, user):
+        user_cache = self.bot_client.get_user_cache()
+        if user_cache is not None and isinstance(user, dict):
+            user_cache.put(user)
+        return user
+
+    @endpoint
     def get_users_from_email_list(self, email_list, local=False):
         logging.debug('UserClient/get_users_from_email_list()')
         url = '/pod/v3/users'
         usersArray = ','.join(map(str, email_list))
         params = {'email': usersArray, 'local': local}
-        return self.bot_client.execute_rest_call('GET', url, params=params)
+        return rest_call('GET', url, params=params)
 
+    @endpoint
     def search_users(self, query, local=False, skip=0, limit=50, filters={}):
         logging.debug('UserClient/search_users()')
         url = '/pod/v1/user/search'
         params = {'local': local, 'skip': skip, 'limit': limit}
         data = {'query':query, 'filters': filters}
-        return self.bot_client.execute_rest_call('POST', url, params=params, json=data)
+        return rest_call('POST', url, params=params, json=data)
+
+    def iter_search_users(self, query, local=False, page_size=50, max_items=None, filters={}):
+        """Iterate over the users found by search_users, page after page, see Paginator"""
+        build_page = partial(self.search_users.build, self, query, local=local, filters=filters)
+        return Paginator(self.bot_client, build_page, items_key='users', page_size=page_size, max_items=max_items)
 
+    @endpoint
     def get_session_user(self):
         logging.debug('UserClient/get_session_user()')
         url = '/pod/v2/sessioninfo'
-        return self.bot_client.execute_rest_call('GET', url)
+        return rest_call('GET', url)
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import threading
+from collections import namedtuple
+
+BatcherStats = namedtuple('BatcherStats', 'lookups requests users_requested')
+
+_BY_ID = 'id'
+_BY_EMAIL = 'email'
+
+
+class _Batch:
+    """The lookups of one /pod/v3/users call, keyed by user id or lower case email"""
+    __slots__ = ('keys', 'full', 'done', 'users', 'error')
+
+    def __init__(self, full, done):
+        self.keys = {}
+        self.full = full
+        self.done = done
+        self.users = None
+        self.error = None
+
+
+class UserLookupBatcher:
+    """Coalesces the lookups of single users made at about the same time into /pod/v3/users calls.
+
+    The first lookup of a batch waits window_sec for others to join it, or until max_batch_size
+    users are asked for, then makes a single call for all of them and hands each caller its user.
+    Lookups of the same user in a batch share its result. Lookups by id and by email are batched
+    separately, as are those of threads and those of coroutines:
+
+        batcher = UserLookupBatcher(bot_client.get_user_client())
+        user = batcher.get_user_from_id(user_id)                    # from any thread
+        user = await batcher.get_user_from_id_async(user_id)        # from any coroutine
+
+    Users that aren't found are returned as None, and an error of the call is raised to every
+    caller of the batch, as is the CancelledError of a first lookup cancelled before the call
+    returned. Lookups by id hit the UserCache of the bot client first, when there is
+    one, and the users fetched are cached.
+    """
+
+    def __init__(self, user_client, window_sec=0.005, max_batch_size=100, local=False):
+        if max_batch_size < 1:
+            raise ValueError('A batch needs a size of at least 1, got {}'.format(max_batch_size))
+        self.user_client = user_client
+        self.window_sec = window_sec
+        self.max_batch_size = max_batch_size
+        self.local = local
+
+        self._lock = threading.Lock()
+        self._batches = {}
+        self._async_batches = {}
+        self._lookups = 0
+        self._requests = 0
+        self._users_requested = 0
+
+    @classmethod
+    def from_config(cls, user_client, config):
+        """Build a batcher with the userLookupBatchWindow (in seconds) and userLookupBatchSize
+        config values"""
+        return cls(user_client, window_sec=config.data.get('userLookupBatchWindow', 0.005),
+                   max_batch_size=config.data.get('userLookupBatchSize', 100))
+
+    def get_user_from_id(self, user_id):
+        user = self._get_cached_user(user_id)
+        if user is not None:
+            return user
+        return self._lookup(_BY_ID, user_id)
+
+    def get_user_from_email(self, email):
+        return self._lookup(_BY_EMAIL, email.lower())
+
+    async def get_user_from_id_async(self, user_id):
+        user = self._get_cached_user(user_id)
+        if user is not None:
+            return user
+        return await self._lookup_async(_BY_ID, user_id)
+
+    async def get_user_from_email_async(self, email):
+        return await self._lookup_async(_BY_EMAIL, email.lower())
+
+    def get_stats(self):
+        with self._lock:
+            return BatcherStats(self._lookups, self._requests, self._users_requested)
+
+    def _get_cached_user(self, user_id):
+        user_cache = self.user_client.bot_client.get_user_cache()
+        if user_cache is None:
+            return None
+        return user_cache.get(user_id)
+
+    def _join(self, batches, kind, key, new_batch):
+        """Add a lookup to the open batch of its kind, return the batch and whether it was opened
+        by this lookup"""
+        with self._lock:
+            self._lookups += 1
+            batch = batches.get(kind)
+            leader = batch is None
+            if leader:
+                batch = batches[kind] = new_batch()
+            batch.keys[key] = None
+            if len(batch.keys) >= self.max_batch_size:
+                # Closed, the next lookups open a new batch
+                del batches[kind]
+                batch.full.set()
+            return batch, leader
+
+    def _close(self, batches, kind, batch):
+        with self._lock:
+            if batches.get(kind) is batch:
+                del batches[kind]
+            self._requests += 1
+            self._users_requested += len(batch.keys)
+
+    def _lookup(self, kind, key):
+        batch, leader = self._join(self._batches, kind, key,
+                                   lambda: _Batch(threading.Event(), threading.Event()))
+        if leader:
+            try:
+                try:
+                    batch.full.wait(self.window_sec)
+                finally:
+                    self._close(self._batches, kind, batch)
+                batch.users = self._index(kind, self._fetch(kind, list(batch.keys)))
+            except Exception as exc:
+                batch.error = exc
+            except BaseException as exc:
+                batch.error = exc
+                raise
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+        return self._result(batch, key)
+
+    async def _lookup_async(self, kind, key):
+        batch, leader = self._join(self._async_batches, kind, key,
+                                   lambda: _Batch(asyncio.Event(), asyncio.Event()))
+        if leader:
+            try:
+                try:
+                    await asyncio.wait_for(batch.full.wait(), self.window_sec)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    self._close(self._async_batches, kind, batch)
+                batch.users = self._index(kind, await self._fetch_async(kind, list(batch.keys)))
+            except Exception as exc:
+                batch.error = exc
+            except BaseException as exc:
+                # The leader was cancelled, e.g. by the timeout of its handler: the batch is
+                # closed all the same and its CancelledError raised to the other callers
+                batch.error = exc
+                raise
+            finally:
+                batch.done.set()
+        else:
+            await batch.done.wait()
+        return self._result(batch, key)
+
+    def _fetch(self, kind, keys):
+        logging.debug('UserLookupBatcher/_fetch() - {} users by {}'.format(len(keys), kind))
+        if kind == _BY_ID:
+            return self.user_client.get_users_from_id_list(keys, local=self.local)
+        return self.user_client.get_users_from_email_list(keys, local=self.local)
+
+    async def _fetch_async(self, kind, keys):
+        logging.debug('UserLookupBatcher/_fetch_async() - {} users by {}'.format(len(keys), kind))
+        if kind == _BY_ID:
+            return await self.user_client.get_users_from_id_list_async(keys, local=self.local)
+        return await self.user_client.get_users_from_email_list_async(keys, local=self.local)
+
+    @staticmethod
+    def _index(kind, result):
+        if not isinstance(result, dict):
+            # 204, none of the users were found
+            return {}
+        if kind == _BY_ID:
+            return {user.get('id'): user for user in result.get('users', [])}
+        return {user.get('emailAddress', '').lower(): user for user in result.get('users', [])}
+
+    @staticmethod
+    def _result(batch, key):
+        if batch.error is not None:
+            raise batch.error
+        return batch.users.get(key)
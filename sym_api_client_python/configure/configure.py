@@ -2,6 +2,7 @@ import json
 import logging
 import os
 
+from sym_api_client_python.clients.connection_pool import merge_pool_config
 from sym_api_client_python.clients.constants.DatafeedVersion import DatafeedVersion
 
 
@@ -159,6 +160,14 @@ class SymConfig:
                         'https': data['keyManagerProxyURL'],
                     }
 
+            # connection pools of the requests sessions, connectionPool applies to all of them
+            self.data['podConnectionPool'] = merge_pool_config(data.get('connectionPool'),
+                                                               data.get('podConnectionPool'))
+            self.data['agentConnectionPool'] = merge_pool_config(data.get('connectionPool'),
+                                                                 data.get('agentConnectionPool'))
+            self.data['keyManagerConnectionPool'] = merge_pool_config(data.get('connectionPool'),
+                                                                      data.get('keyManagerConnectionPool'))
+
             # datafeedVersion
             if "datafeedVersion" not in data:
                 self.data["datafeedVersion"] = "v1"
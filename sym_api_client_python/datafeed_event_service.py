@@ -14,10 +14,11 @@ from .exceptions.DatafeedExpiredException import DatafeedExpiredException
 from .exceptions.ServerErrorException import ServerErrorException
 from .exceptions.MaxRetryException import MaxRetryException
 
-from .services.abstract_datafeed_event_service import AbstractDatafeedEventService
+from .services.abstract_datafeed_event_service import AbstractDatafeedEventService, get_event_stream_id
 from .clients.constants.DatafeedVersion import DatafeedVersion
 from .services.datafeed_event_service_v1 import DataFeedEventServiceV1
 from .services.datafeed_event_service_v2 import DataFeedEventServiceV2
+from .services.stream_ordered_dispatcher import StreamOrderedDispatcher
 
 log = logging.getLogger(__name__)
 
@@ -32,16 +33,25 @@ EventTrace = namedtuple('EventTrace', 'message_id creation_time bot_received lis
 
 class DataFeedEventService:
 
-    def __init__(self, sym_bot_client, error_timeout_sec=None, maximum_timeout_sec=None):
+    def __init__(self, sym_bot_client, error_timeout_sec=None, maximum_timeout_sec=None,
+                 pipeline_workers=None, pipeline_queue_size=None, streaming_reads=None):
+        """pipeline_workers and pipeline_queue_size override datafeedPipelineWorkers and
+        datafeedPipelineQueueSize from the config. See DatafeedPipeline for details.
+        streaming_reads overrides datafeedStreamingReads, which only applies to DF v2."""
         config = sym_bot_client.get_sym_config()
 
         # Creating the DataFeed Event Service
         if DatafeedVersion.version_of(config.data.get("datafeedVersion")) == DatafeedVersion.V2:
             self.datafeed_event_service = DataFeedEventServiceV2(sym_bot_client, error_timeout_sec=error_timeout_sec,
-                                                                 maximum_timeout_sec=maximum_timeout_sec)
+                                                                 maximum_timeout_sec=maximum_timeout_sec,
+                                                                 pipeline_workers=pipeline_workers,
+                                                                 pipeline_queue_size=pipeline_queue_size,
+                                                                 streaming_reads=streaming_reads)
         else:
             self.datafeed_event_service = DataFeedEventServiceV1(sym_bot_client, error_timeout_sec=error_timeout_sec,
-                                                                 maximum_timeout_sec=maximum_timeout_sec)
+                                                                 maximum_timeout_sec=maximum_timeout_sec,
+                                                                 pipeline_workers=pipeline_workers,
+                                                                 pipeline_queue_size=pipeline_queue_size)
 
     def start_datafeed(self):
         """Start reading events from datafeed.
@@ -55,8 +65,13 @@ class DataFeedEventService:
         self.datafeed_event_service.activate_datafeed()
 
     def deactivate_datafeed(self):
+        """Stop reading the datafeed. With pipelined reading, start_datafeed returns once the
+        current read has completed and every event already read has been handled."""
         self.datafeed_event_service.deactivate_datafeed()
 
+    def get_pipeline_stats(self):
+        return self.datafeed_event_service.get_pipeline_stats()
+
     def add_room_listener(self, room_listener):
         self.datafeed_event_service.add_room_listener(room_listener)
 
@@ -93,6 +108,21 @@ class DataFeedEventService:
     def remove_suppression_listener(self, suppression_listener):
         self.datafeed_event_service.remove_suppression_listener(suppression_listener)
 
+    def add_command_router(self, command_router):
+        self.datafeed_event_service.add_command_router(command_router)
+
+    def remove_command_router(self, command_router):
+        self.datafeed_event_service.remove_command_router(command_router)
+
+    def add_event_filter(self, predicate):
+        self.datafeed_event_service.add_event_filter(predicate)
+
+    def remove_event_filter(self, predicate):
+        self.datafeed_event_service.remove_event_filter(predicate)
+
+    def get_event_prefilter(self):
+        return self.datafeed_event_service.get_event_prefilter()
+
     def handle_events(self, events):
         self.datafeed_event_service.handle_events(events)
 
@@ -174,7 +204,12 @@ class AsyncDataFeedEventService(AbstractDatafeedEventService):
           common IO-bound operations an asychronous version may be available, aiohttp instead of
           requests for example. If one is not, consider running it in a ThreadPoolExecutor
         * Some assumptions about ordering will fail. For example a user sending two messages to a
-          bot in quick succession may get their responses in a different order.
+          bot in quick succession may get their responses in a different order. To avoid this
+          pass ordered_dispatch=True (or set datafeedOrderedDispatch in the config): events of
+          the same stream are then handled one after another, and different streams are handled
+          concurrently by at most max_concurrency handlers, see StreamOrderedDispatcher.
+        * With DF v2, streaming_reads=True (or datafeedStreamingReads in the config) queues the
+          events as they are parsed off the response of a read, see DataFeedClient.iter_datafeed.
 
     Potential improvements:
         * Provide a timeout to allow handlers to be cancelled after a certain period
@@ -193,22 +228,99 @@ class AsyncDataFeedEventService(AbstractDatafeedEventService):
     """
 
     def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.queue = asyncio.Queue()
-        self.exception_queue = asyncio.Queue()
         self.exception_handler = kwargs.pop('exception_handler', None)
         self.trace_enabled = kwargs.pop('trace_enabled', True)
         self.trace_recorder = kwargs.pop('trace_recorder', None)
+        ordered_dispatch = kwargs.pop('ordered_dispatch', None)
+        max_concurrency = kwargs.pop('max_concurrency', None)
+        max_stream_queue_size = kwargs.pop('max_stream_queue_size', None)
+        streaming_reads = kwargs.pop('streaming_reads', None)
+        super().__init__(*args, **kwargs)
+        self.queue = asyncio.Queue()
+        self.exception_queue = asyncio.Queue()
         self.trace_dict = {}
         self.handle_events_task = None
         self.tasks = []
         self.datafeed_id = None
 
+        if ordered_dispatch is None:
+            ordered_dispatch = self.config.data.get('datafeedOrderedDispatch', False)
+        if max_concurrency is None:
+            max_concurrency = self.config.data.get('datafeedMaxConcurrency', 64)
+        if max_stream_queue_size is None:
+            max_stream_queue_size = self.config.data.get('datafeedMaxStreamQueueSize', 0)
+        if streaming_reads is None:
+            streaming_reads = self.config.data.get('datafeedStreamingReads', False)
+        self.streaming_reads = streaming_reads and not self.config.is_datafeed_v1()
+        if ordered_dispatch:
+            self.dispatcher = StreamOrderedDispatcher(max_concurrency, max_stream_queue_size)
+        else:
+            self.dispatcher = None
+
     async def start_datafeed(self):
         log.debug('AsyncDataFeedEventService/start_datafeed()')
-        self.datafeed_id = self._get_from_file_or_create_datafeed_id()
+        self.datafeed_id = await self._get_or_create_datafeed_id_async()
         await asyncio.gather(self.read_datafeed(), self.handle_events(), self.handle_exceptions())
 
+    async def _get_or_create_datafeed_id_async(self):
+        """DF v1 reuses the id stored on disk if there is one, DF v2 reuses the first datafeed
+        listed by the agent. Otherwise a new datafeed is created."""
+        if self.config.is_datafeed_v1():
+            if self.config.should_store_datafeed_id():
+                datafeed_id = self.datafeed_id_repository.read_datafeed_id_from_file()
+                if datafeed_id:
+                    return datafeed_id
+            return await self._create_datafeed_and_persist_async()
+
+        datafeed_ids = await self.datafeed_client.list_datafeed_id_async()
+        if datafeed_ids:
+            return datafeed_ids[0].get('id')
+        return await self.datafeed_client.create_datafeed_async()
+
+    async def _create_datafeed_and_persist_async(self):
+        datafeed_id = await self.datafeed_client.create_datafeed_async()
+        if self.config.should_store_datafeed_id():
+            self.datafeed_id_repository.store_datafeed_id_to_file(datafeed_id, self.config.get_agent_url())
+        return datafeed_id
+
+    async def _read_datafeed_async(self):
+        if self.config.is_datafeed_v1():
+            return await self.datafeed_client.read_datafeed_async(self.datafeed_id)
+        return await self.datafeed_client.read_datafeed_async(self.datafeed_id, self.datafeed_client.get_ack_id())
+
+    async def _read_and_queue_events_async(self):
+        """Read the datafeed and queue its events, return how many were read"""
+        if self.streaming_reads:
+            read = 0
+            async for event in self.datafeed_client.iter_datafeed_async(self.datafeed_id,
+                                                                          self.datafeed_client.get_ack_id()):
+                read += 1
+                await self._queue_events((event,))
+            return read
+
+        events = await self._read_datafeed_async()
+        if events and events != [None]:
+            await self._queue_events(events)
+            return len(events)
+        return 0
+
+    async def _queue_events(self, events):
+        user_cache = self.bot_client.get_user_cache()
+        if user_cache is not None:
+            user_cache.observe_events(events)
+        # Events of the bot, without listeners or filtered out are dropped before
+        # being queued, see EventPrefilter
+        for event in self.get_event_prefilter().filter(events):
+            log.debug(
+                'AsyncDataFeedEventService/read_datafeed() --> '
+                'Incoming event from read_datafeed() with id: {}'.format(event.get('id'))
+            )
+
+            e_id = self._get_event_id(event)
+            self._add_trace(e_id, event["timestamp"])
+            await self.queue.put(event)
+            log.debug(f"Event queued. Current queue size: {self.queue.qsize()}")
+
     async def deactivate_datafeed(self, wait_for_handler_completions=True):
         """Deactivating the datafeed may take up to 30 seconds while waiting for
         a 204 from the read_datafeed API"""
@@ -226,6 +338,8 @@ class AsyncDataFeedEventService(AbstractDatafeedEventService):
         if not self.stop:
             self.stop = True
 
+        if self.dispatcher is not None:
+            self.dispatcher.close()
         await self.queue.put(None)
         await self.exception_queue.put(None)
         await self.bot_client.close_async_sessions()
@@ -233,7 +347,7 @@ class AsyncDataFeedEventService(AbstractDatafeedEventService):
     async def read_datafeed(self):
         while not self.stop:
             try:
-                events = await self.datafeed_client.read_datafeed_async(self.datafeed_id)
+                read = await self._read_and_queue_events_async()
             except CancelledError as exc:
                 log.info("Cancel request received. Stopping datafeed...")
                 await self.deactivate_datafeed()
@@ -247,21 +361,7 @@ class AsyncDataFeedEventService(AbstractDatafeedEventService):
                 continue
 
             self.decrease_timeout()
-            if events:
-                bot_id = self.bot_client.get_bot_user_info()['id']
-                for event in events:
-                    log.debug(
-                        'AsyncDataFeedEventService/read_datafeed() --> '
-                        'Incoming event from read_datafeed() with id: {}'.format(event.get('id'))
-                    )
-
-                    if event['initiator']['user']['userId'] != bot_id:
-                        e_id = self._get_event_id(event)
-                        self._add_trace(e_id, event["timestamp"])
-                        await self.queue.put(event)
-                    log.debug(f"Event queued. Current queue size: {self.queue.qsize()}")
-
-            else:
+            if not read:
                 log.debug(
                     'AsyncDataFeedEventService() - no data coming in from '
                     'datafeed: {}'.format(self.datafeed_id)
@@ -290,9 +390,17 @@ class AsyncDataFeedEventService(AbstractDatafeedEventService):
         sleep_for = self.get_and_increase_timeout(thrown_exception)
         log.debug('AsyncDataFeedEventService/handle_event() --> Sleeping for {:.4g}s'.format(sleep_for))
         await asyncio.sleep(sleep_for)
+
+        if not self.config.is_datafeed_v1():
+            try:
+                log.debug('AsyncDataFeedEventService --> Deleting previous Datafeed')
+                await self.datafeed_client.delete_datafeed_async(self.datafeed_id)
+            except Exception as exc:
+                await self.handle_datafeed_errors(exc)
+
         try:
             log.debug('AsyncDataFeedEventService/handle_event() --> Restarting Datafeed')
-            self.datafeed_id = self._create_datafeed_and_persist()
+            self.datafeed_id = await self._create_datafeed_and_persist_async()
         except Exception as exc:
             await self.handle_datafeed_errors(exc)
 
@@ -368,6 +476,8 @@ class AsyncDataFeedEventService(AbstractDatafeedEventService):
 
     async def handle_events(self):
         """For each event resolve its handler and add it to the queue to be processed"""
+        if self.dispatcher is not None:
+            self.dispatcher.start()
         while not self.stop:
             event = await self.queue.get()
 
@@ -389,8 +499,13 @@ class AsyncDataFeedEventService(AbstractDatafeedEventService):
                     self.queue.task_done()
                     continue
 
-                future = asyncio.ensure_future(route(event))
-                future.add_done_callback(partial(self._check_result, e_id))
+                if self.dispatcher is not None:
+                    # Events without a stream don't need ordering, their own id spreads them out
+                    key = get_event_stream_id(event) or e_id
+                    await self.dispatcher.submit(key, partial(route, event), partial(self._check_result, e_id))
+                else:
+                    future = asyncio.ensure_future(route(event))
+                    future.add_done_callback(partial(self._check_result, e_id))
 
     async def handle_exceptions(self):
         """If exceptions are not excplicitly handled they'll silently fail in the co-routine.
@@ -422,92 +537,94 @@ class AsyncDataFeedEventService(AbstractDatafeedEventService):
         log.debug('async msg_sent_handler function started')
         stream_type = payload['payload']['messageSent']['message']['stream']['streamType']
         message_sent_data = payload['payload']['messageSent']['message']
+        for command_router in self.registered_triggers:
+            await command_router.dispatch_async(message_sent_data)
         if str(stream_type) == 'ROOM':
-            for listener in self.room_listeners:
-                await listener.on_room_msg(message_sent_data)
+            for listener, event in self._listener_arguments(self.room_listeners, payload, message_sent_data):
+                await listener.on_room_msg(event)
         else:
-            for listener in self.im_listeners:
-                await listener.on_im_message(message_sent_data)
+            for listener, event in self._listener_arguments(self.im_listeners, payload, message_sent_data):
+                await listener.on_im_message(event)
 
     async def instant_msg_handler(self, payload):
         log.debug('async instant_msg_handler function started')
         instant_message_data = payload['payload']['instantMessageCreated']
-        for listener in self.im_listeners:
-            await listener.on_im_created(instant_message_data)
+        for listener, event in self._listener_arguments(self.im_listeners, payload, instant_message_data):
+            await listener.on_im_created(event)
 
     async def room_created_handler(self, payload):
         log.debug('async room_created_handler function started')
         room_created_data = payload['payload']['roomCreated']
-        for listener in self.room_listeners:
-            await listener.on_room_created(room_created_data)
+        for listener, event in self._listener_arguments(self.room_listeners, payload, room_created_data):
+            await listener.on_room_created(event)
 
     async def room_updated_handler(self, payload):
         log.debug('async room_updated_handler')
         room_updated_data = payload['payload']['roomUpdated']
-        for listener in self.room_listeners:
-            await listener.on_room_updated(room_updated_data)
+        for listener, event in self._listener_arguments(self.room_listeners, payload, room_updated_data):
+            await listener.on_room_updated(event)
 
     async def room_deactivated_handler(self, payload):
         log.debug('async room_deactivated_handler')
         room_deactivated_data = payload['payload']['roomDeactivated']
-        for listener in self.room_listeners:
-            await listener.on_room_deactivated(room_deactivated_data)
+        for listener, event in self._listener_arguments(self.room_listeners, payload, room_deactivated_data):
+            await listener.on_room_deactivated(event)
 
     async def room_reactivated_handler(self, payload):
         log.debug('async room_reactivated_handler')
         room_reactivated_data = payload['payload']['roomReactivated']
-        for listener in self.room_listeners:
-            await listener.on_room_reactivated(room_reactivated_data)
+        for listener, event in self._listener_arguments(self.room_listeners, payload, room_reactivated_data):
+            await listener.on_room_reactivated(event)
 
     async def user_joined_room_handler(self, payload):
         log.debug('async user_joined_room_handler')
         user_joined_room_data = payload['payload']['userJoinedRoom']
-        for listener in self.room_listeners:
-            await listener.on_user_joined_room(user_joined_room_data)
+        for listener, event in self._listener_arguments(self.room_listeners, payload, user_joined_room_data):
+            await listener.on_user_joined_room(event)
 
     async def user_left_room_handler(self, payload):
         log.debug('async user_left_room_handler')
         user_left_room_data = payload['payload']['userLeftRoom']
-        for listener in self.room_listeners:
-            await listener.on_user_left_room(user_left_room_data)
+        for listener, event in self._listener_arguments(self.room_listeners, payload, user_left_room_data):
+            await listener.on_user_left_room(event)
 
     async def promoted_to_owner(self, payload):
         log.debug('async promoted_to_owner')
         promoted_to_owner_data = payload['payload']['roomMemberPromotedToOwner']
-        for listener in self.room_listeners:
-            await listener.on_room_member_promoted_to_owner(promoted_to_owner_data)
+        for listener, event in self._listener_arguments(self.room_listeners, payload, promoted_to_owner_data):
+            await listener.on_room_member_promoted_to_owner(event)
 
     async def demoted_from_owner(self, payload):
         log.debug('async demoted_from_owner')
         demoted_to_owner_data = payload['payload']['roomMemberDemotedFromOwner']
-        for listener in self.room_listeners:
-            await listener.on_room_member_demoted_from_owner(demoted_to_owner_data)
+        for listener, event in self._listener_arguments(self.room_listeners, payload, demoted_to_owner_data):
+            await listener.on_room_member_demoted_from_owner(event)
 
     async def connection_accepted_handler(self, payload):
         log.debug('async connection_accepted_handler')
         connection_accepted_data = payload['payload']['connectionAccepted']
-        for listener in self.connection_listeners:
-            await listener.on_connection_accepted(connection_accepted_data)
+        for listener, event in self._listener_arguments(self.connection_listeners, payload, connection_accepted_data):
+            await listener.on_connection_accepted(event)
 
     async def connection_requested_handler(self, payload):
         log.debug('async connection_requested_handler')
         connection_requested_data = payload['payload']['connectionRequested']
-        for listener in self.connection_listeners:
-            await listener.on_connection_requested(connection_requested_data)
+        for listener, event in self._listener_arguments(self.connection_listeners, payload, connection_requested_data):
+            await listener.on_connection_requested(event)
 
     async def elements_action_handler(self, payload):
         log.debug('async elements_action_handler')
-        for listener in self.elements_listeners:
-            await listener.on_elements_action(payload)
+        for listener, event in self._listener_arguments(self.elements_listeners, payload, payload):
+            await listener.on_elements_action(event)
 
     async def shared_post_handler(self, payload):
         log.debug('shared_post_handler')
         shared_post = payload['payload']['sharedPost']
-        for listener in self.wall_post_listeners:
-            await listener.on_shared_post(shared_post)
+        for listener, event in self._listener_arguments(self.wall_post_listeners, payload, shared_post):
+            await listener.on_shared_post(event)
 
     async def suppressed_message_handler(self, payload):
         log.debug('suppressed_message_handler')
         message_suppressed = payload['payload']['messageSuppressed']
-        for listener in self.suppression_listeners:
-            await listener.on_message_suppression(message_suppressed)
+        for listener, event in self._listener_arguments(self.suppression_listeners, payload, message_suppressed):
+            await listener.on_message_suppression(event)
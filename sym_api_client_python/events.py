@@ -0,0 +1,401 @@
+"""Typed datafeed events, built lazily from the raw JSON of the datafeed.
+
+parse_event wraps the dict of an event in the class of its type, MessageSent, RoomCreated,
+ElementsAction... Nothing is copied or decoded up front: every attribute is read from the raw
+dict the first time it is accessed, and the attributes that build an object (a User, a Stream,
+a Message, a ParsedMessage) keep it for the next access. All the classes use __slots__, so an
+event costs a single small object until it is used.
+
+    event = parse_event(raw_event)
+    if isinstance(event, MessageSent) and event.message.stream.stream_type == 'ROOM':
+        print(event.initiator.display_name, event.message.parsed.text)
+
+The original dict is always available, unchanged, as raw.
+
+Listeners opt into typed events with a typed_events class attribute, they are then called with
+the typed event, e.g. the MessageSent for on_room_msg or on_im_message, instead of the dict of
+its payload:
+
+    class MyRoomListener(RoomListener):
+        typed_events = True
+
+        def on_room_msg(self, event):
+            stream_id = event.message.stream.stream_id
+"""
+from .processors.parsed_message import ParsedMessage
+
+
+class _lazy:
+    """Attribute computed the first time it is read and then kept in the slot '_' + its name,
+    cached_property for classes with __slots__"""
+
+    def __init__(self, function):
+        self.function = function
+        self.slot = '_' + function.__name__
+        self.__doc__ = function.__doc__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            return getattr(instance, self.slot)
+        except AttributeError:
+            value = self.function(instance)
+            setattr(instance, self.slot, value)
+            return value
+
+
+def _wrap(cls, raw):
+    return cls(raw) if raw is not None else None
+
+
+class User:
+    """A user of an event, the initiator or the user affected by it"""
+
+    __slots__ = ('raw',)
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    @property
+    def user_id(self):
+        return self.raw.get('userId')
+
+    @property
+    def first_name(self):
+        return self.raw.get('firstName')
+
+    @property
+    def last_name(self):
+        return self.raw.get('lastName')
+
+    @property
+    def display_name(self):
+        return self.raw.get('displayName')
+
+    @property
+    def email(self):
+        return self.raw.get('email')
+
+    @property
+    def username(self):
+        return self.raw.get('username')
+
+    def __repr__(self):
+        return 'User(user_id={!r})'.format(self.user_id)
+
+
+class Stream:
+
+    __slots__ = ('raw',)
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    @property
+    def stream_id(self):
+        return self.raw.get('streamId')
+
+    @property
+    def stream_type(self):
+        return self.raw.get('streamType')
+
+    @property
+    def room_name(self):
+        return self.raw.get('roomName')
+
+    @property
+    def external(self):
+        return self.raw.get('external')
+
+    @property
+    def cross_pod(self):
+        return self.raw.get('crossPod')
+
+    def __repr__(self):
+        return 'Stream(stream_id={!r}, stream_type={!r})'.format(self.stream_id, self.stream_type)
+
+
+class Message:
+    """A message of a MessageSent or SharedPost, raw is what the raw dict listeners get"""
+
+    __slots__ = ('raw', '_user', '_stream', '_parsed')
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    @property
+    def message_id(self):
+        return self.raw.get('messageId')
+
+    @property
+    def timestamp(self):
+        return self.raw.get('timestamp')
+
+    @property
+    def message(self):
+        """The PresentationML of the message"""
+        return self.raw.get('message')
+
+    @property
+    def data(self):
+        return self.parsed.data
+
+    @property
+    def attachments(self):
+        return self.raw.get('attachments', [])
+
+    @_lazy
+    def user(self):
+        return _wrap(User, self.raw.get('user'))
+
+    @_lazy
+    def stream(self):
+        return _wrap(Stream, self.raw.get('stream'))
+
+    @_lazy
+    def parsed(self):
+        """The ParsedMessage of the message, for its text, mentions and tags"""
+        return ParsedMessage(self.raw)
+
+    def __repr__(self):
+        return 'Message(message_id={!r})'.format(self.message_id)
+
+
+class Event:
+    """An event of the datafeed. data is the payload of the event, the dict the raw dict
+    listeners get for most types"""
+
+    __slots__ = ('raw', '_initiator', '_data')
+
+    payload_key = None
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    @property
+    def id(self):
+        return self.raw.get('id')
+
+    @property
+    def message_id(self):
+        return self.raw.get('messageId')
+
+    @property
+    def type(self):
+        return self.raw.get('type')
+
+    @property
+    def timestamp(self):
+        return self.raw.get('timestamp')
+
+    @_lazy
+    def initiator(self):
+        initiator = self.raw.get('initiator')
+        return _wrap(User, initiator.get('user')) if initiator else None
+
+    @_lazy
+    def data(self):
+        payload = self.raw.get('payload') or {}
+        if self.payload_key is None:
+            return payload
+        return payload.get(self.payload_key) or {}
+
+    def __repr__(self):
+        return '{}(id={!r})'.format(type(self).__name__, self.id)
+
+
+class _StreamEvent(Event):
+
+    __slots__ = ('_stream',)
+
+    @_lazy
+    def stream(self):
+        return _wrap(Stream, self.data.get('stream'))
+
+
+class _AffectedUserEvent(_StreamEvent):
+
+    __slots__ = ('_affected_user',)
+
+    @_lazy
+    def affected_user(self):
+        return _wrap(User, self.data.get('affectedUser'))
+
+
+class MessageSent(Event):
+
+    __slots__ = ('_message',)
+
+    payload_key = 'messageSent'
+
+    @_lazy
+    def message(self):
+        return _wrap(Message, self.data.get('message'))
+
+
+class SharedPost(Event):
+
+    __slots__ = ('_message', '_shared_message')
+
+    payload_key = 'sharedPost'
+
+    @_lazy
+    def message(self):
+        return _wrap(Message, self.data.get('message'))
+
+    @_lazy
+    def shared_message(self):
+        return _wrap(Message, self.data.get('sharedMessage'))
+
+
+class MessageSuppressed(_StreamEvent):
+
+    __slots__ = ()
+
+    payload_key = 'messageSuppressed'
+
+    @property
+    def suppressed_message_id(self):
+        return self.data.get('messageId')
+
+
+class InstantMessageCreated(_StreamEvent):
+
+    __slots__ = ()
+
+    payload_key = 'instantMessageCreated'
+
+
+class RoomCreated(_StreamEvent):
+
+    __slots__ = ()
+
+    payload_key = 'roomCreated'
+
+    @property
+    def room_properties(self):
+        return self.data.get('roomProperties', {})
+
+
+class RoomUpdated(_StreamEvent):
+
+    __slots__ = ()
+
+    payload_key = 'roomUpdated'
+
+    @property
+    def new_room_properties(self):
+        return self.data.get('newRoomProperties', {})
+
+
+class RoomDeactivated(_StreamEvent):
+
+    __slots__ = ()
+
+    payload_key = 'roomDeactivated'
+
+
+class RoomReactivated(_StreamEvent):
+
+    __slots__ = ()
+
+    payload_key = 'roomReactivated'
+
+
+class UserJoinedRoom(_AffectedUserEvent):
+
+    __slots__ = ()
+
+    payload_key = 'userJoinedRoom'
+
+
+class UserLeftRoom(_AffectedUserEvent):
+
+    __slots__ = ()
+
+    payload_key = 'userLeftRoom'
+
+
+class RoomMemberPromotedToOwner(_AffectedUserEvent):
+
+    __slots__ = ()
+
+    payload_key = 'roomMemberPromotedToOwner'
+
+
+class RoomMemberDemotedFromOwner(_AffectedUserEvent):
+
+    __slots__ = ()
+
+    payload_key = 'roomMemberDemotedFromOwner'
+
+
+class ConnectionRequested(Event):
+
+    __slots__ = ('_to_user',)
+
+    payload_key = 'connectionRequested'
+
+    @_lazy
+    def to_user(self):
+        return _wrap(User, self.data.get('toUser'))
+
+
+class ConnectionAccepted(Event):
+
+    __slots__ = ('_from_user',)
+
+    payload_key = 'connectionAccepted'
+
+    @_lazy
+    def from_user(self):
+        return _wrap(User, self.data.get('fromUser'))
+
+
+class ElementsAction(_StreamEvent):
+
+    __slots__ = ()
+
+    payload_key = 'symphonyElementsAction'
+
+    @property
+    def form_message_id(self):
+        return self.data.get('formMessageId')
+
+    @property
+    def form_id(self):
+        return self.data.get('formId')
+
+    @property
+    def form_values(self):
+        return self.data.get('formValues', {})
+
+    @property
+    def action(self):
+        """Name of the button that submitted the form"""
+        return self.form_values.get('action')
+
+
+EVENT_CLASSES = {
+    'MESSAGESENT': MessageSent,
+    'MESSAGESUPPRESSED': MessageSuppressed,
+    'INSTANTMESSAGECREATED': InstantMessageCreated,
+    'ROOMCREATED': RoomCreated,
+    'ROOMDEACTIVATED': RoomDeactivated,
+    'ROOMREACTIVATED': RoomReactivated,
+    'ROOMUPDATED': RoomUpdated,
+    'USERJOINEDROOM': UserJoinedRoom,
+    'USERLEFTROOM': UserLeftRoom,
+    'ROOMMEMBERPROMOTEDTOOWNER': RoomMemberPromotedToOwner,
+    'ROOMMEMBERDEMOTEDFROMOWNER': RoomMemberDemotedFromOwner,
+    'CONNECTIONACCEPTED': ConnectionAccepted,
+    'CONNECTIONREQUESTED': ConnectionRequested,
+    'SYMPHONYELEMENTSACTION': ElementsAction,
+    'SHAREDPOST': SharedPost,
+}
+
+
+def parse_event(raw):
+    """Wrap the raw dict of an event in the class of its type, Event for unknown types"""
+    return EVENT_CLASSES.get(raw.get('type'), Event)(raw)
@@ -0,0 +1,4 @@
+class AttachmentIntegrityException(Exception):
+    """Raised when a downloaded attachment doesn't have the expected size or checksum, or isn't
+    valid base64"""
+    pass
@@ -0,0 +1,227 @@
+import inspect
+import logging
+import re
+from collections import namedtuple
+
+from .parsed_message import ParsedMessage
+
+log = logging.getLogger(__name__)
+
+# What a handler is called with, along with the message data. command is the command or
+# pattern that matched, args the words after the command, groups the named groups of a pattern
+# and mentioned whether the message starts with a mention of the bot
+CommandMatch = namedtuple('CommandMatch', 'command args groups mentioned parsed')
+
+# Named groups of the patterns, stripped in the combined regex where names must be unique
+_NAMED_GROUP = re.compile(r'(?<!\\)\(\?P<\w+>')
+_BACKREFERENCE = re.compile(r'\(\?P=|\\[1-9]')
+_GLOBAL_FLAGS = re.compile(r'\(\?[aiLmsux]+\)')
+_SCOPED_FLAGS = ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'), (re.VERBOSE, 'x'))
+
+
+class _TrieNode:
+
+    __slots__ = ('children', 'route')
+
+    def __init__(self):
+        self.children = {}
+        self.route = None
+
+
+class _Route:
+
+    __slots__ = ('command', 'handler', 'mention_required')
+
+    def __init__(self, command, handler, mention_required):
+        self.command = command
+        self.handler = handler
+        self.mention_required = mention_required
+
+
+class CommandRouter:
+    """Registry of the commands of a bot, matched against each message in a single pass.
+
+    Commands are the first words of a message, after an optional mention of the bot, and are
+    kept in a trie of words: matching a message walks it once whatever the number of commands,
+    and the longest registered command wins, so '/deploy prod' and '/deploy' can have different
+    handlers. Patterns are regular expressions searched in the text of the message, all of them
+    compiled into a single regex. Mention handlers are called for the messages mentioning the
+    bot that no command or pattern matched, and the default handler for anything else.
+
+        router = CommandRouter()
+
+        @router.command('/help')
+        def help(message_data, match):
+            ...
+
+        router.pattern(r'ticket (?P<ticket>[A-Z]+-\\d+)', show_ticket)
+        datafeed_event_service.add_command_router(router)
+
+    Handlers are called with the message data and a CommandMatch. The datafeed event services
+    dispatch every MESSAGESENT to their routers before calling the listeners, with dispatch for
+    the synchronous services and dispatch_async for AsyncDataFeedEventService, which awaits the
+    handlers that are coroutine functions.
+
+    The bot is recognised by bot_user_id, which the services set to the id of the bot user when
+    it isn't given.
+    """
+
+    def __init__(self, bot_user_id=None, case_sensitive=False):
+        self.bot_user_id = bot_user_id
+        self.case_sensitive = case_sensitive
+        self._trie = _TrieNode()
+        self._patterns = []
+        self._regex = None
+        self._mention_handlers = []
+        self.default_handler = None
+
+    def command(self, command, handler=None, mention_required=False):
+        """Call handler for the messages starting with command, one or more words. Used as a
+        decorator when handler is None. With mention_required, the message must start with a
+        mention of the bot."""
+        if handler is None:
+            return lambda function: self.command(command, function, mention_required) or function
+        words = self._normalize(command).split()
+        if not words:
+            raise ValueError('Empty command')
+        node = self._trie
+        for word in words:
+            node = node.children.setdefault(word, _TrieNode())
+        if node.route is not None:
+            raise ValueError('Command already registered: {}'.format(command))
+        node.route = _Route(' '.join(words), handler, mention_required)
+
+    def pattern(self, pattern, handler=None, flags=0):
+        """Call handler for the messages whose text matches the regular expression pattern. The
+        match starting first in the text wins, then the pattern registered first. Used as a
+        decorator when handler is None."""
+        if handler is None:
+            return lambda function: self.pattern(pattern, function, flags) or function
+        compiled = re.compile(pattern, flags)
+        self._patterns.append((compiled, handler))
+        self._regex = None
+
+    def mention(self, handler=None):
+        """Call handler for the messages mentioning the bot that nothing else matched"""
+        if handler is None:
+            return lambda function: self.mention(function) or function
+        self._mention_handlers.append(handler)
+
+    def default(self, handler=None):
+        """Call handler for the messages that nothing else matched"""
+        if handler is None:
+            return lambda function: self.default(function) or function
+        self.default_handler = handler
+
+    def match(self, message_data):
+        """Return the handlers for message_data with their CommandMatch, as a list of
+        (handler, match), empty when nothing matches"""
+        parsed = ParsedMessage(message_data)
+        text = parsed.plain_text
+        mentioned, command_start = self._leading_mention(parsed)
+        remaining = text[command_start:]
+        words = remaining.split()
+
+        node = self._trie
+        route = None
+        depth = 0
+        for index, word in enumerate(words):
+            node = node.children.get(self._normalize(word))
+            if node is None:
+                break
+            if node.route is not None and (mentioned or not node.route.mention_required):
+                route = node.route
+                depth = index + 1
+        if route is not None:
+            return [(route.handler, CommandMatch(route.command, words[depth:], {}, mentioned, parsed))]
+
+        if self._patterns:
+            found = self._search(remaining)
+            if found is not None:
+                compiled, handler, groups = found
+                return [(handler, CommandMatch(compiled.pattern, list(groups.groups()),
+                                               groups.groupdict(), mentioned, parsed))]
+
+        if self._mention_handlers and (mentioned or self._mentions_bot(parsed)):
+            match = CommandMatch(None, words, {}, mentioned, parsed)
+            return [(handler, match) for handler in self._mention_handlers]
+
+        if self.default_handler is not None:
+            return [(self.default_handler, CommandMatch(None, words, {}, mentioned, parsed))]
+        return []
+
+    def dispatch(self, message_data):
+        """Call the handlers matching message_data, return whether there were any"""
+        matches = self.match(message_data)
+        for handler, match in matches:
+            log.debug('CommandRouter/dispatch() --> {}'.format(match.command))
+            handler(message_data, match)
+        return bool(matches)
+
+    async def dispatch_async(self, message_data):
+        """Same as dispatch, awaiting the handlers that return an awaitable"""
+        matches = self.match(message_data)
+        for handler, match in matches:
+            log.debug('CommandRouter/dispatch_async() --> {}'.format(match.command))
+            result = handler(message_data, match)
+            if inspect.isawaitable(result):
+                await result
+        return bool(matches)
+
+    def _normalize(self, word):
+        return word if self.case_sensitive else word.lower()
+
+    def _search(self, text):
+        """Return the pattern matching first in text, with its handler and match"""
+        regex, separate = self._compile()
+        best = None
+        if regex is not None:
+            found = regex.search(text)
+            if found is not None:
+                best = (found.start(), int(found.lastgroup[2:]))
+        for index in separate:
+            found = self._patterns[index][0].search(text)
+            if found is not None and (best is None or (found.start(), index) < best):
+                best = (found.start(), index)
+        if best is None:
+            return None
+        start, index = best
+        compiled, handler = self._patterns[index]
+        return compiled, handler, compiled.match(text, start)
+
+    def _compile(self):
+        # Each pattern is wrapped in a group named after its index: as the wrapping group is
+        # the last one to close, lastgroup tells which pattern matched. Patterns with
+        # backreferences or inline global flags can't be combined and are searched on their own
+        if self._regex is None:
+            combined = []
+            separate = []
+            for index, (compiled, _) in enumerate(self._patterns):
+                if _BACKREFERENCE.search(compiled.pattern) or _GLOBAL_FLAGS.match(compiled.pattern):
+                    separate.append(index)
+                else:
+                    combined.append('(?P<_p{}>(?{}:{}))'.format(
+                        index, _scoped_flags(compiled.flags), _NAMED_GROUP.sub('(', compiled.pattern)))
+            self._regex = (re.compile('|'.join(combined)) if combined else None, separate)
+        return self._regex
+
+    def _is_bot(self, user_id):
+        return self.bot_user_id is not None and str(user_id) == str(self.bot_user_id)
+
+    def _leading_mention(self, parsed):
+        """Whether the message starts with a mention of the bot, and where its text goes on"""
+        text = parsed.plain_text
+        for entity in parsed.mentions:
+            if text[:entity.start].strip():
+                break
+            if self._is_bot(entity.user_id):
+                return True, entity.end
+            break
+        return False, 0
+
+    def _mentions_bot(self, parsed):
+        return any(self._is_bot(entity.user_id) for entity in parsed.mentions)
+
+
+def _scoped_flags(flags):
+    return ''.join(letter for flag, letter in _SCOPED_FLAGS if flags & flag)
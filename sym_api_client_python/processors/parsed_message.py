@@ -0,0 +1,253 @@
+import json
+from collections import namedtuple
+from html.parser import HTMLParser
+
+HASHTAG_TYPE = "org.symphonyoss.taxonomy.hashtag"
+CASHTAG_TYPE = "org.symphonyoss.fin.security.id.ticker"
+MENTION_TYPE = "com.symphony.user.userId"
+
+# Entities of a message, joined from its <span class="entity" data-entity-id="..."> and the
+# matching entry of its data. start and end are the offsets of text in ParsedMessage.plain_text
+Mention = namedtuple('Mention', 'user_id text start end entity_id')
+HashTag = namedtuple('HashTag', 'value text start end entity_id')
+CashTag = namedtuple('CashTag', 'ticker text start end entity_id')
+
+_ENTITY_CLASSES = {
+    MENTION_TYPE: Mention,
+    HASHTAG_TYPE: HashTag,
+    CASHTAG_TYPE: CashTag,
+}
+
+
+# Elements without an end tag, they are never left open
+_VOID_ELEMENTS = frozenset(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+                            'meta', 'param', 'source', 'track', 'wbr'])
+
+
+class _PresentationMLScanner(HTMLParser):
+    """Collects the text of every div and span of a PresentationML message in a single pass.
+
+    The text of an element includes the text of the elements nested in it, and elements are
+    listed in the order they are opened, which is what BeautifulSoup's find_all(...).text gives.
+    An end tag closes every element opened after the matching start tag, as in BeautifulSoup.
+
+    Entity spans are also collected, as (data-entity-id, start, end, text) in the order they
+    are opened, with the offsets of their text in the text of the whole message.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.divs = []
+        self.spans = []
+        self.entity_spans = []
+        self.text_parts = []
+        self.text_length = 0
+        # (tag, elements, index, text parts, entity index, start) of every open element,
+        # everything but the tag is None for elements that aren't divs or spans
+        self._stack = []
+        self._collecting = [self.text_parts]
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _VOID_ELEMENTS:
+            return
+        elements = self._elements(tag)
+        if elements is None:
+            self._stack.append((tag, None, None, None, None, None))
+            return
+        parts = []
+        elements.append(None)
+        entity_index = None
+        if tag == 'span':
+            entity_id = _get_entity_id(attrs)
+            if entity_id is not None:
+                self.entity_spans.append((entity_id, None, None, None))
+                entity_index = len(self.entity_spans) - 1
+        self._stack.append((tag, elements, len(elements) - 1, parts, entity_index, self.text_length))
+        self._collecting.append(parts)
+
+    def handle_startendtag(self, tag, attrs):
+        elements = self._elements(tag)
+        if elements is not None:
+            elements.append('')
+
+    def handle_endtag(self, tag):
+        for position in range(len(self._stack) - 1, -1, -1):
+            if self._stack[position][0] == tag:
+                self._pop_to(position)
+                return
+
+    def handle_data(self, data):
+        self.text_length += len(data)
+        for parts in self._collecting:
+            parts.append(data)
+
+    def close(self):
+        super().close()
+        # Like BeautifulSoup, elements left open end with the document
+        self._pop_to(0)
+
+    def _elements(self, tag):
+        if tag == 'div':
+            return self.divs
+        if tag == 'span':
+            return self.spans
+        return None
+
+    def _pop_to(self, position):
+        while len(self._stack) > position:
+            _, elements, index, parts, entity_index, start = self._stack.pop()
+            if elements is not None:
+                text = ''.join(parts)
+                elements[index] = text
+                self._collecting.pop()
+                if entity_index is not None:
+                    entity_id = self.entity_spans[entity_index][0]
+                    self.entity_spans[entity_index] = (entity_id, start, self.text_length, text)
+
+
+def _get_entity_id(attrs):
+    entity_id = None
+    is_entity = False
+    for name, value in attrs:
+        if name == 'data-entity-id':
+            entity_id = value
+        elif name == 'class' and value and 'entity' in value.split():
+            is_entity = True
+    return entity_id if is_entity else None
+
+
+class ParsedMessage:
+    """A message of the datafeed, parsed once and queried many times.
+
+    The PresentationML of message_data['message'] is tokenized with a single streaming pass the
+    first time text or span_texts is needed, and message_data['data'] is decoded the first time
+    an entity value is needed. Every result is then cached, so a listener can ask for the text,
+    the mentions and the tags of a message without parsing it again:
+
+        parsed = ParsedMessage(message_data)
+        if parsed.text[0] == '/help' and bot_user_id in parsed.mention_ids:
+            ...
+
+    The results are the same as those of the SymMessageParser methods of the same name.
+
+    entities joins every entity span with its entry in the data in the same pass, as typed
+    Mention, HashTag and CashTag tuples carrying the offsets of their text in plain_text.
+    """
+
+    def __init__(self, message_data):
+        self.message_data = message_data
+        self._divs = None
+        self._spans = None
+        self._entity_spans = None
+        self._plain_text = None
+        self._entities = None
+        self._text = None
+        self._data = None
+        self._values = {}
+
+    @property
+    def message(self):
+        return self.message_data['message']
+
+    @property
+    def text(self):
+        """Words of the message, the text of every div split on spaces"""
+        if self._text is None:
+            if self._divs is None:
+                self._scan()
+            text = []
+            for div in self._divs:
+                text.extend(div.split(' '))
+            self._text = text
+        return self._text
+
+    @property
+    def span_texts(self):
+        """Text of every span, i.e. of every mention, hashtag and cashtag"""
+        if self._spans is None:
+            self._scan()
+        return self._spans
+
+    @property
+    def plain_text(self):
+        """Text of the whole message, without markup"""
+        if self._plain_text is None:
+            self._scan()
+        return self._plain_text
+
+    @property
+    def entities(self):
+        """Mention, HashTag and CashTag of every entity span of the message, in order. Spans
+        whose entity is missing from the data, or of another type, are left out."""
+        if self._entities is None:
+            if self._entity_spans is None:
+                self._scan()
+            entities = []
+            for entity_id, start, end, text in self._entity_spans:
+                entity = self.data.get(entity_id)
+                ids = entity.get('id') if isinstance(entity, dict) else None
+                if not ids or 'value' not in ids[0]:
+                    continue
+                entity_class = _ENTITY_CLASSES.get(ids[0].get('type'))
+                if entity_class is not None:
+                    entities.append(entity_class(ids[0]['value'], text, start, end, entity_id))
+            self._entities = entities
+        return self._entities
+
+    @property
+    def mentions(self):
+        return [entity for entity in self.entities if isinstance(entity, Mention)]
+
+    @property
+    def hash_tags(self):
+        return [entity for entity in self.entities if isinstance(entity, HashTag)]
+
+    @property
+    def cash_tags(self):
+        return [entity for entity in self.entities if isinstance(entity, CashTag)]
+
+    @property
+    def data(self):
+        """The decoded entity data of the message, an empty dict if there is none"""
+        if self._data is None:
+            raw_data = self.message_data.get('data')
+            if not raw_data:
+                self._data = {}
+            elif isinstance(raw_data, str):
+                self._data = json.loads(raw_data)
+            else:
+                self._data = raw_data
+        return self._data
+
+    @property
+    def mention_ids(self):
+        return self.get_values(MENTION_TYPE)
+
+    @property
+    def hash_tag_values(self):
+        return self.get_values(HASHTAG_TYPE)
+
+    @property
+    def cash_tag_values(self):
+        return self.get_values(CASHTAG_TYPE)
+
+    def get_values(self, id_type):
+        """Values of the entities of the data whose first id is of type id_type"""
+        values = self._values.get(id_type)
+        if values is None:
+            values = []
+            for entity in self.data.values():
+                ids = entity.get('id') if isinstance(entity, dict) else None
+                if ids and 'type' in ids[0] and ids[0]['type'] == id_type and 'value' in ids[0]:
+                    values.append(ids[0]['value'])
+            self._values[id_type] = values
+        return values
+
+    def _scan(self):
+        scanner = _PresentationMLScanner()
+        scanner.feed(self.message)
+        scanner.close()
+        self._divs = scanner.divs
+        self._spans = scanner.spans
+        self._entity_spans = scanner.entity_spans
+        self._plain_text = ''.join(scanner.text_parts)
@@ -1,6 +1,4 @@
-import json
-
-from bs4 import BeautifulSoup
+from .parsed_message import CASHTAG_TYPE, HASHTAG_TYPE, MENTION_TYPE, ParsedMessage
 
 
 class SymMessageParser:
@@ -33,20 +31,32 @@ class SymMessageParser:
 
     This class provides methods to the developer to easily access data in this
     message_data payload for quick bot development.
+
+    The message is parsed once by a ParsedMessage, whatever the number of methods called for it,
+    see parse. get_mentions, get_hash_tags and get_cash_tags return the text of the entities of
+    their type only, get_entities returns all of them with their values.
     """
 
     def __init__(self):
-        self.HASHTAG_TYPE = "org.symphonyoss.taxonomy.hashtag"
-        self.CASHTAG_TYPE = "org.symphonyoss.fin.security.id.ticker"
-        self.MENTION_TYPE = "com.symphony.user.userId"
+        self.HASHTAG_TYPE = HASHTAG_TYPE
+        self.CASHTAG_TYPE = CASHTAG_TYPE
+        self.MENTION_TYPE = MENTION_TYPE
+        self._last_parsed = None
+
+    def parse(self, message_data):
+        """Return the ParsedMessage of message_data. The last message parsed is kept, so calling
+        several of the methods below for the same message parses it only once. It is reused for
+        a message with the same messageId, message and data, even when message_data is another
+        dict or was changed in the meantime."""
+        parsed = self._last_parsed
+        if parsed is None or _cache_key(parsed.message_data) != _cache_key(message_data):
+            # A copy, so that changing message_data afterwards doesn't change what was parsed
+            parsed = ParsedMessage(dict(message_data))
+            self._last_parsed = parsed
+        return parsed
 
     def get_text(self, message_data):
-        text_arr = []
-        msg_xml = message_data['message']
-        soup = BeautifulSoup(msg_xml, 'html.parser')
-        for i in soup.find_all('div'):
-            text_arr.extend(i.text.split(' '))
-        return text_arr
+        return list(self.parse(message_data).text)
 
     def get_im_first_name(self, message_data):
         return message_data['user']['firstName']
@@ -60,47 +70,29 @@ class SymMessageParser:
     def get_stream_id(self, message_data):
         return message_data['stream']['streamId']
 
-    def __get_tags(self, json_nodes, tag_type):
-        tags = []
-        if json_nodes:
-            for k, v in json_nodes.items():
-                if 'id' in v and len(v['id']) > 0 and 'type' in v['id'][0] and v['id'][0]['type'] == tag_type and 'value' in v['id'][0]:
-                    tags.append(v['id'][0]['value'])
-        return tags
-
     def get_mentions(self, message_data):
-        mention_arr = []
-        msg_xml = message_data['message']
-        soup = BeautifulSoup(msg_xml, 'html.parser')
-        for i in soup.find_all('span'):
-            mention_arr.append(i.text)
-        return mention_arr
+        return [entity.text for entity in self.parse(message_data).mentions]
+
+    def get_entities(self, message_data):
+        """Mention, HashTag and CashTag of the message in order, with their value from the data
+        and the offsets of their text, see ParsedMessage.entities"""
+        return list(self.parse(message_data).entities)
 
     def get_mention_ids(self, message_data):
-        d = json.loads(message_data['data'])
-        return self.__get_tags(d, self.MENTION_TYPE)
+        return list(self.parse(message_data).mention_ids)
 
     def get_hash_tags(self, message_data):
-        tag_arr = []
-        msg_xml = message_data['message']
-        soup = BeautifulSoup(msg_xml, 'html.parser')
-        for i in soup.find_all('span'):
-            tag_arr.append(i.text)
-        return tag_arr
+        return [entity.text for entity in self.parse(message_data).hash_tags]
 
     def get_hash_tag_values(self, message_data):
-        d = json.loads(message_data['data'])
-        return self.__get_tags(d, self.HASHTAG_TYPE)
+        return list(self.parse(message_data).hash_tag_values)
 
     def get_cash_tags(self, message_data):
-        cash_arr = []
-        msg_xml = message_data['message']
-        soup = BeautifulSoup(msg_xml, 'html.parser')
-        for i in soup.find_all('span'):
-            cash_arr.append(i.text)
-        return cash_arr
+        return [entity.text for entity in self.parse(message_data).cash_tags]
 
     def get_cash_tag_values(self, message_data):
-        d = json.loads(message_data['data'])
-        return self.__get_tags(d, self.CASHTAG_TYPE)
+        return list(self.parse(message_data).cash_tag_values)
+
 
+def _cache_key(message_data):
+    return message_data.get('messageId'), message_data.get('message'), message_data.get('data')
@@ -1,7 +1,10 @@
 from abc import ABC, abstractmethod
 import logging
 
+from ..events import parse_event
 from .datafeed_id_repository import OnDiskDatafeedIdRepository
+from .datafeed_pipeline import DatafeedPipeline
+from .event_prefilter import EventPrefilter, get_event_stream_id
 from ..listeners.elements_listener import ElementsActionListener
 from ..listeners.connection_listener import ConnectionListener
 from ..listeners.im_listener import IMListener
@@ -11,10 +14,13 @@ from ..auth.auth_endpoint_constants import auth_endpoint_constants
 
 log = logging.getLogger(__name__)
 
+_PACKAGE = __name__.split('.')[0]
+
 
 class AbstractDatafeedEventService(ABC):
 
-    def __init__(self, sym_bot_client, error_timeout_sec=None, maximum_timeout_sec=None):
+    def __init__(self, sym_bot_client, error_timeout_sec=None, maximum_timeout_sec=None,
+                 pipeline_workers=None, pipeline_queue_size=None):
         self.datafeed_events = []
         self.room_listeners = []
         self.im_listeners = []
@@ -23,6 +29,8 @@ class AbstractDatafeedEventService(ABC):
         self.suppression_listeners = []
         self.wall_post_listeners = []
         self.registered_triggers = []
+        self.event_filters = []
+        self._event_prefilter = None
 
         self.bot_client = sym_bot_client
         self.config = sym_bot_client.get_sym_config()
@@ -71,6 +79,17 @@ class AbstractDatafeedEventService(ABC):
         # After every failure multiply the timeout by a factor
         self.timeout_multiplier = 2
 
+        # Pipelined reading: with at least one worker, events are handed to a pool of worker
+        # threads so that handling them never delays the next read of the datafeed. With 0
+        # workers the events are handled inline by the reading thread.
+        if pipeline_workers is None:
+            pipeline_workers = self.config.data.get('datafeedPipelineWorkers', 0)
+        if pipeline_queue_size is None:
+            pipeline_queue_size = self.config.data.get('datafeedPipelineQueueSize', 8)
+        self.pipeline_workers = pipeline_workers
+        self.pipeline_queue_size = pipeline_queue_size
+        self.pipeline = None
+
     @abstractmethod
     def start_datafeed(self):
         pass
@@ -142,30 +161,81 @@ class AbstractDatafeedEventService(ABC):
     def remove_suppression_listener(self, suppression_listener):
         self.suppression_listeners.remove(suppression_listener)
 
+    def add_command_router(self, command_router):
+        """Dispatch every message sent to command_router before the listeners, see CommandRouter"""
+        if command_router.bot_user_id is None:
+            command_router.bot_user_id = self.bot_client.get_bot_user_info()['id']
+        self.registered_triggers.append(command_router)
+
+    def remove_command_router(self, command_router):
+        self.registered_triggers.remove(command_router)
+
+    def add_event_filter(self, predicate):
+        """Only handle the events for which predicate(event_type, stream_id, user_id) is true,
+        see EventPrefilter"""
+        self.event_filters.append(predicate)
+
+    def remove_event_filter(self, predicate):
+        self.event_filters.remove(predicate)
+
+    def get_event_prefilter(self):
+        """Return the EventPrefilter for the current listeners, filters and routing_dict, built
+        again when they changed, whether through the add and remove methods or not"""
+        event_prefilter = self._event_prefilter
+        event_types = frozenset(self._get_listened_event_types())
+        if (event_prefilter is None or event_prefilter.event_types != event_types
+                or event_prefilter.predicates != tuple(self.event_filters)):
+            # The bot user is looked up once, not every time the listeners change
+            bot_user_id = (self.bot_client.get_bot_user_info()['id'] if event_prefilter is None
+                           else event_prefilter.bot_user_id)
+            event_prefilter = EventPrefilter(bot_user_id, event_types, self.event_filters)
+            self._event_prefilter = event_prefilter
+        return event_prefilter
+
+    def _get_listened_event_types(self):
+        """Types of routing_dict with at least one listener. Types routed to a handler that
+        isn't one of this package, by a subclass that added or replaced them in routing_dict or
+        overrode their handler, are always listened to"""
+        listeners = {
+            'MESSAGESENT': self.room_listeners or self.im_listeners or self.wall_post_listeners
+                           or self.registered_triggers,
+            'MESSAGESUPPRESSED': self.suppression_listeners,
+            'INSTANTMESSAGECREATED': self.im_listeners,
+            'CONNECTIONACCEPTED': self.connection_listeners,
+            'CONNECTIONREQUESTED': self.connection_listeners,
+            'SYMPHONYELEMENTSACTION': self.elements_listeners,
+            'SHAREDPOST': self.wall_post_listeners,
+        }
+        for event_type in ('ROOMCREATED', 'ROOMDEACTIVATED', 'ROOMREACTIVATED', 'ROOMUPDATED',
+                           'USERJOINEDROOM', 'USERLEFTROOM', 'ROOMMEMBERPROMOTEDTOOWNER',
+                           'ROOMMEMBERDEMOTEDFROMOWNER'):
+            listeners[event_type] = self.room_listeners
+        return [event_type for event_type, route in self.routing_dict.items()
+                if listeners.get(event_type, True) or not _is_builtin_handler(route)]
+
 
     # TODO: Add doc
     # TODO: Change all brackets access types by get function
     def handle_events(self, events):
         """ Routes the event to the proper handler.
 
-            Also Checks to see that the sender's email is not equal to Bot's email in config file.
-            This functionality helps the bot avoid entering an infinite loop where it responds to its own messageSent
-            after an event comes back over the dataFeed
+            Events are first passed through the EventPrefilter of the service, which drops in a
+            single pass the events initiated by the bot, which helps the bot avoid entering an
+            infinite loop where it responds to its own messageSent after an event comes back over
+            the dataFeed, the events nobody listens to and the events rejected by the filters
+            added with add_event_filter. The users of all the events are added to the UserCache
+            of the bot client, if there is one.
         """
         log.debug('DataFeedEventService/handle_events()')
-        for event in events:
-            if event is None:
-                continue
-            
+        user_cache = self.bot_client.get_user_cache()
+        if user_cache is not None:
+            user_cache.observe_events(events)
+        for event in self.get_event_prefilter().filter(events):
             log.debug(
                 'DataFeedEventService/read_datafeed() --> '
                 'Incoming event with id: {}'.format(event.get('id'))
             )
-            
-            if event['initiator']['user']['userId'] == self.bot_client.get_bot_user_info()['id']:
-                continue
-            else:
-                self.handle_event(event)
+            self.handle_event(event)
 
     # function takes in single event --> Checks eventType --> forwards event
     # to proper handling function there is a handle_event function that
@@ -188,98 +258,113 @@ class AbstractDatafeedEventService(ABC):
         log.debug('msg_sent_handler function started')
         stream_type = payload['payload']['messageSent']['message']['stream']['streamType']
         message_sent_data = payload['payload']['messageSent']['message']
+        for command_router in self.registered_triggers:
+            command_router.dispatch(message_sent_data)
         if str(stream_type) == 'ROOM':
-            for listener in self.room_listeners:
-                listener.on_room_msg(message_sent_data)
+            for listener, event in self._listener_arguments(self.room_listeners, payload, message_sent_data):
+                listener.on_room_msg(event)
         elif str(stream_type) == 'POST':
-            for listener in self.wall_post_listeners:
-                listener.on_wall_post_msg(message_sent_data)
+            for listener, event in self._listener_arguments(self.wall_post_listeners, payload, message_sent_data):
+                listener.on_wall_post_msg(event)
         else:
-            for listener in self.im_listeners:
-                listener.on_im_message(message_sent_data)
+            for listener, event in self._listener_arguments(self.im_listeners, payload, message_sent_data):
+                listener.on_im_message(event)
 
     def instant_msg_handler(self, payload):
         log.debug('instant_msg_handler function started')
         instant_message_data = payload['payload']['instantMessageCreated']
-        for listener in self.im_listeners:
-            listener.on_im_created(instant_message_data)
+        for listener, event in self._listener_arguments(self.im_listeners, payload, instant_message_data):
+            listener.on_im_created(event)
 
     def room_created_handler(self, payload):
         log.debug('room_created_handler function started')
         room_created_data = payload['payload']['roomCreated']
-        for listener in self.room_listeners:
-            listener.on_room_created(room_created_data)
+        for listener, event in self._listener_arguments(self.room_listeners, payload, room_created_data):
+            listener.on_room_created(event)
 
     def room_updated_handler(self, payload):
         log.debug('room_updated_handler')
         room_updated_data = payload['payload']['roomUpdated']
-        for listener in self.room_listeners:
-            listener.on_room_updated(room_updated_data)
+        for listener, event in self._listener_arguments(self.room_listeners, payload, room_updated_data):
+            listener.on_room_updated(event)
 
     def room_deactivated_handler(self, payload):
         log.debug('room_deactivated_handler')
         room_deactivated_data = payload['payload']['roomDeactivated']
-        for listener in self.room_listeners:
-            listener.on_room_deactivated(room_deactivated_data)
+        for listener, event in self._listener_arguments(self.room_listeners, payload, room_deactivated_data):
+            listener.on_room_deactivated(event)
 
     def room_reactivated_handler(self, payload):
         log.debug('room_reactivated_handler')
         room_reactivated_data = payload['payload']['roomReactivated']
-        for listener in self.room_listeners:
-            listener.on_room_reactivated(room_reactivated_data)
+        for listener, event in self._listener_arguments(self.room_listeners, payload, room_reactivated_data):
+            listener.on_room_reactivated(event)
 
     def user_joined_room_handler(self, payload):
         log.debug('user_joined_room_handler')
         user_joined_room_data = payload['payload']['userJoinedRoom']
-        for listener in self.room_listeners:
-            listener.on_user_joined_room(user_joined_room_data)
+        for listener, event in self._listener_arguments(self.room_listeners, payload, user_joined_room_data):
+            listener.on_user_joined_room(event)
 
     def user_left_room_handler(self, payload):
         log.debug('user_left_room_handler')
         user_left_room_data = payload['payload']['userLeftRoom']
-        for listener in self.room_listeners:
-            listener.on_user_left_room(user_left_room_data)
+        for listener, event in self._listener_arguments(self.room_listeners, payload, user_left_room_data):
+            listener.on_user_left_room(event)
 
     def promoted_to_owner(self, payload):
         log.debug('promoted_to_owner')
         promoted_to_owner_data = payload['payload']['roomMemberPromotedToOwner']
-        for listener in self.room_listeners:
-            listener.on_room_member_promoted_to_owner(promoted_to_owner_data)
+        for listener, event in self._listener_arguments(self.room_listeners, payload, promoted_to_owner_data):
+            listener.on_room_member_promoted_to_owner(event)
 
     def demoted_from_owner(self, payload):
         log.debug('demoted_from_owner')
         demoted_from_owner_data = payload['payload']['roomMemberDemotedFromOwner']
-        for listener in self.room_listeners:
-            listener.on_room_member_demoted_from_owner(demoted_from_owner_data)
+        for listener, event in self._listener_arguments(self.room_listeners, payload, demoted_from_owner_data):
+            listener.on_room_member_demoted_from_owner(event)
 
     def connection_accepted_handler(self, payload):
         log.debug('connection_accepted_handler')
         connection_accepted_data = payload['payload']['connectionAccepted']
-        for listener in self.connection_listeners:
-            listener.on_connection_accepted(connection_accepted_data)
+        for listener, event in self._listener_arguments(self.connection_listeners, payload, connection_accepted_data):
+            listener.on_connection_accepted(event)
 
     def connection_requested_handler(self, payload):
         log.debug('connection_requested_handler')
         connection_requested_data = payload['payload']['connectionRequested']
-        for listener in self.connection_listeners:
-            listener.on_connection_requested(connection_requested_data)
+        for listener, event in self._listener_arguments(self.connection_listeners, payload, connection_requested_data):
+            listener.on_connection_requested(event)
 
     def elements_action_handler(self, payload):
         log.debug('elements_action_handler')
-        for listener in self.elements_listeners:
-            listener.on_elements_action(payload)
+        for listener, event in self._listener_arguments(self.elements_listeners, payload, payload):
+            listener.on_elements_action(event)
 
     def shared_post_handler(self, payload):
         log.debug('shared_post_handler')
         shared_post = payload['payload']['sharedPost']
-        for listener in self.wall_post_listeners:
-            listener.on_shared_post(shared_post)
+        for listener, event in self._listener_arguments(self.wall_post_listeners, payload, shared_post):
+            listener.on_shared_post(event)
 
     def suppressed_message_handler(self, payload):
         log.debug('suppressed_message_handler')
         message_suppressed = payload['payload']['messageSuppressed']
-        for listener in self.suppression_listeners:
-            listener.on_message_suppression(message_suppressed)
+        for listener, event in self._listener_arguments(self.suppression_listeners, payload, message_suppressed):
+            listener.on_message_suppression(event)
+
+    def _listener_arguments(self, listeners, payload, data):
+        """Yield every listener with what it is called with: the typed event of payload for the
+        listeners with typed_events, see events, data otherwise. The typed event is built once,
+        the first time a listener wants it"""
+        event = None
+        for listener in listeners:
+            if getattr(listener, 'typed_events', False) is True:
+                if event is None:
+                    event = parse_event(payload)
+                yield listener, event
+            else:
+                yield listener, data
 
     ### Handle errors ###
     def get_and_increase_timeout(self, previous_exc=None):
@@ -316,6 +401,36 @@ class AbstractDatafeedEventService(ABC):
             self.current_timeout_sec = new_timeout
         return self.current_timeout_sec
 
+    ### Pipelined reading ###
+    def _start_pipeline(self):
+        if self.pipeline_workers:
+            self.pipeline = DatafeedPipeline(self.handle_events, workers=self.pipeline_workers,
+                                             queue_size=self.pipeline_queue_size,
+                                             name=type(self).__name__)
+            self.pipeline.start()
+
+    def _dispatch_events(self, events):
+        """Hand the events read from the datafeed to the pipeline if there is one, or handle
+        them straight away otherwise"""
+        if self.pipeline is not None:
+            self.pipeline.submit(events)
+        else:
+            self.handle_events(events)
+
+    def _stop_pipeline(self):
+        """Called by the reading thread once it has stopped reading, so that all the events
+        already read are handled before start_datafeed returns"""
+        if self.pipeline is not None:
+            self.pipeline.shutdown(wait=True)
+            log.debug('DataFeedEventService/_stop_pipeline() --> {}'.format(self.pipeline.get_stats()))
+
+    def get_pipeline_stats(self):
+        """Return the PipelineStats of the running or last run pipeline, None when events are
+        handled inline"""
+        if self.pipeline is None:
+            return None
+        return self.pipeline.get_stats()
+
     def _get_from_file_or_create_datafeed_id(self):
         if self.config.should_store_datafeed_id():
             datafeed_id = self.datafeed_id_repository.read_datafeed_id_from_file()
@@ -328,3 +443,9 @@ class AbstractDatafeedEventService(ABC):
         if self.config.should_store_datafeed_id():
             self.datafeed_id_repository.store_datafeed_id_to_file(datafeed_id, self.config.get_agent_url())
         return datafeed_id
+
+
+def _is_builtin_handler(route):
+    """Whether route is a handler of the datafeed event services of this package, which only
+    call the listeners"""
+    return (getattr(route, '__module__', None) or '').startswith(_PACKAGE + '.')
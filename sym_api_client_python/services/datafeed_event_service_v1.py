@@ -35,23 +35,29 @@ class DataFeedEventServiceV1(AbstractDatafeedEventService):
         """
             Read_datafeed function reads an array of events coming back from DataFeedClient.
 
-            The json objects returned from read_datafeed() gets passed to handle_events().
+            The json objects returned from read_datafeed() gets passed to handle_events(), or to
+            the pipeline workers when datafeedPipelineWorkers is set. In that case the events
+            already read are all handled before this returns.
         """
-        while not self.stop:
-            try:
-                events = self.datafeed_client.read_datafeed(self.datafeed_id)
-            except Exception as exc:
-                self.handle_datafeed_errors(exc)
-                continue
-
-            self.decrease_timeout()
-            if events:
-                self.handle_events(events)
-            else:
-                log.debug(
-                    'DataFeedEventService() - no data coming in from '
-                    'datafeed: {}'.format(self.datafeed_id)
-                )
+        self._start_pipeline()
+        try:
+            while not self.stop:
+                try:
+                    events = self.datafeed_client.read_datafeed(self.datafeed_id)
+                except Exception as exc:
+                    self.handle_datafeed_errors(exc)
+                    continue
+
+                self.decrease_timeout()
+                if events:
+                    self._dispatch_events(events)
+                else:
+                    log.debug(
+                        'DataFeedEventService() - no data coming in from '
+                        'datafeed: {}'.format(self.datafeed_id)
+                    )
+        finally:
+            self._stop_pipeline()
 
     ### Handling errors ###
     def handle_datafeed_errors(self, thrown_exception):
@@ -12,10 +12,19 @@ import time
 
 log = logging.getLogger(__name__)
 
+# Returned by next() once a streaming read is exhausted
+_END_OF_READ = object()
+
+
 class DataFeedEventServiceV2(AbstractDatafeedEventService):
     def __init__(self, *args, **kwargs):
+        """streaming_reads overrides datafeedStreamingReads from the config, see read_datafeed"""
+        streaming_reads = kwargs.pop('streaming_reads', None)
         self.datafeed_id = None
         super().__init__(*args, **kwargs)
+        if streaming_reads is None:
+            streaming_reads = self.config.data.get('datafeedStreamingReads', False)
+        self.streaming_reads = streaming_reads
 
 
 
@@ -35,7 +44,13 @@ class DataFeedEventServiceV2(AbstractDatafeedEventService):
         """
             Read_datafeed function reads an array of events coming back from DataFeedClient.
 
-            The json objects returned from read_datafeed() gets passed to handle_events().
+            The json objects returned from read_datafeed() gets passed to handle_events(), or to
+            the pipeline workers when datafeedPipelineWorkers is set. In that case the events
+            already read are all handled before this returns.
+
+            With streaming reads, the events are dispatched one by one as they are parsed off
+            the response by DataFeedClient.iter_datafeed, instead of once the whole read has
+            arrived.
         """
         datafeed_ids = self.datafeed_client.list_datafeed_id()
 
@@ -44,23 +59,54 @@ class DataFeedEventServiceV2(AbstractDatafeedEventService):
         else:
             self.datafeed_id = datafeed_ids[0].get("id")
 
-        while not self.stop:
-            try:
-                events = self.datafeed_client.read_datafeed(self.datafeed_id, self.datafeed_client.get_ack_id())
-            except Exception as exc:
-                self.handle_datafeed_errors(exc)
-                continue
-
-            self.decrease_timeout()
-
-            if events and events != [None]:
-                self.handle_events(events)
-            else:
-                log.debug(
-                    'DataFeedEventServiceV2() - no data coming in from '
-                    'datafeed: {}'.format(self.datafeed_id)
-                )
-
+        self._start_pipeline()
+        try:
+            while not self.stop:
+                if self.streaming_reads:
+                    self._read_datafeed_streaming()
+                    continue
+                try:
+                    events = self.datafeed_client.read_datafeed(self.datafeed_id, self.datafeed_client.get_ack_id())
+                except Exception as exc:
+                    self.handle_datafeed_errors(exc)
+                    continue
+
+                self.decrease_timeout()
+
+                if events and events != [None]:
+                    self._dispatch_events(events)
+                else:
+                    log.debug(
+                        'DataFeedEventServiceV2() - no data coming in from '
+                        'datafeed: {}'.format(self.datafeed_id)
+                    )
+        finally:
+            self._stop_pipeline()
+
+    def _read_datafeed_streaming(self):
+        events = self.datafeed_client.iter_datafeed(self.datafeed_id, self.datafeed_client.get_ack_id())
+        read = 0
+        try:
+            while True:
+                # Only the errors of the read go to handle_datafeed_errors, not those of the handlers
+                try:
+                    event = next(events, _END_OF_READ)
+                except Exception as exc:
+                    self.handle_datafeed_errors(exc)
+                    return
+                if event is _END_OF_READ:
+                    break
+                read += 1
+                self._dispatch_events([event])
+        finally:
+            events.close()
+
+        self.decrease_timeout()
+        if not read:
+            log.debug(
+                'DataFeedEventServiceV2() - no data coming in from '
+                'datafeed: {}'.format(self.datafeed_id)
+            )
 
     def handle_datafeed_errors(self, thrown_exception):
         """Various errors may get thrown by the datafeed reader, from 500s when a server node is
@@ -0,0 +1,145 @@
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+
+log = logging.getLogger(__name__)
+
+# Sentinel put on the queue once per worker to tell it to exit after the queue has been drained
+_STOP = object()
+
+PipelineStats = namedtuple(
+    'PipelineStats',
+    'batches_queued batches_handled events_handled handler_errors queue_depth max_queue_depth '
+    'blocked_puts blocked_time_sec'
+)
+
+
+class DatafeedPipeline:
+    """Decouples reading the datafeed from handling its events.
+
+    The thread reading the datafeed submits each batch of events to a bounded queue and goes
+    straight back to the long-poll, while a pool of worker threads drain the queue and pass the
+    batches to handle_batch. When the queue is full the reader blocks on submit, which is the
+    backpressure: the datafeed is then read no faster than the workers can handle it. The time
+    spent blocked is recorded in the stats so the worker count and queue size can be tuned.
+
+    With a single worker, batches are handled one after the other in the order they were read.
+    With more than one worker, batches are handled concurrently and ordering across batches is
+    no longer guaranteed, so listeners must be thread safe.
+
+        pipeline = DatafeedPipeline(service.handle_events, workers=4, queue_size=16)
+        pipeline.start()
+        pipeline.submit(events)
+        ...
+        pipeline.shutdown()  # handles everything still queued, then stops the workers
+    """
+
+    def __init__(self, handle_batch, workers=1, queue_size=8, name='DatafeedPipeline'):
+        if workers < 1:
+            raise ValueError('A datafeed pipeline needs at least one worker, got {}'.format(workers))
+        if queue_size < 1:
+            raise ValueError('A datafeed pipeline needs a queue size of at least 1, got {}'
+                             .format(queue_size))
+        self.handle_batch = handle_batch
+        self.workers = workers
+        self.queue_size = queue_size
+        self.name = name
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._stats_lock = threading.Lock()
+        self._batches_queued = 0
+        self._batches_handled = 0
+        self._events_handled = 0
+        self._handler_errors = 0
+        self._max_queue_depth = 0
+        self._blocked_puts = 0
+        self._blocked_time_sec = 0.0
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self):
+        if self.running:
+            return
+        self._threads = [
+            threading.Thread(target=self._work, args=(self._queue,), name='{}-worker-{}'.format(self.name, i), daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        log.debug('{} started with {} workers and a queue size of {}'
+                  .format(self.name, self.workers, self.queue_size))
+
+    def submit(self, events):
+        """Queue a batch of events, blocking while the queue is full"""
+        try:
+            self._queue.put_nowait(events)
+        except queue.Full:
+            started = time.monotonic()
+            self._queue.put(events)
+            blocked_for = time.monotonic() - started
+            with self._stats_lock:
+                self._blocked_puts += 1
+                self._blocked_time_sec += blocked_for
+            log.debug('{} --> Queue full, reader blocked for {:.4g}s'.format(self.name, blocked_for))
+
+        with self._stats_lock:
+            self._batches_queued += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+
+    def shutdown(self, wait=True):
+        """Stop the workers once every batch already submitted has been handled.
+
+        This must not be called from one of the worker threads when wait is True, as the worker
+        would then be waiting on itself. Without waiting, the pipeline can be started again right
+        away, with new workers, while the stopping ones handle what was already submitted.
+        """
+        threads, self._threads = self._threads, []
+        if not threads:
+            return
+        log.debug('{} --> Draining {} queued batches before stopping'
+                  .format(self.name, self._queue.qsize()))
+        for _ in threads:
+            self._queue.put(_STOP)
+        # The stopping workers drain the queue they were started with, and only that one
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def get_stats(self):
+        with self._stats_lock:
+            return PipelineStats(
+                batches_queued=self._batches_queued,
+                batches_handled=self._batches_handled,
+                events_handled=self._events_handled,
+                handler_errors=self._handler_errors,
+                queue_depth=self._queue.qsize(),
+                max_queue_depth=self._max_queue_depth,
+                blocked_puts=self._blocked_puts,
+                blocked_time_sec=self._blocked_time_sec,
+            )
+
+    def _work(self, work_queue):
+        while True:
+            events = work_queue.get()
+            try:
+                if events is _STOP:
+                    return
+                try:
+                    self.handle_batch(events)
+                except Exception as exc:
+                    # A failing listener must not take down the worker, otherwise the queue would
+                    # stop draining and the reader would eventually block forever
+                    log.exception('{} --> Error while handling events: {}'.format(self.name, exc))
+                    with self._stats_lock:
+                        self._handler_errors += 1
+                with self._stats_lock:
+                    self._batches_handled += 1
+                    self._events_handled += len(events)
+            finally:
+                work_queue.task_done()
@@ -0,0 +1,69 @@
+def get_event_stream_id(event):
+    """Return the streamId of the conversation an event belongs to, or None for events that
+    don't belong to a stream such as connection requests"""
+    payload = event.get('payload')
+    if not payload:
+        return None
+    for event_data in payload.values():
+        if not isinstance(event_data, dict):
+            continue
+        stream = event_data.get('stream')
+        if stream is None and isinstance(event_data.get('message'), dict):
+            stream = event_data['message'].get('stream')
+        if isinstance(stream, dict):
+            return stream.get('streamId')
+    return None
+
+
+class EventPrefilter:
+    """Drops the events of a datafeed read that no handler would act upon, before any of them
+    is handled.
+
+    An event is dropped when it is None, when it was initiated by the bot itself, which keeps a
+    bot from answering its own messages, when its type isn't one of event_types, the types that
+    have listeners, and when any of predicates returns a false value for it. Predicates are
+    called with the type, the stream id (None for events that don't belong to a stream) and the
+    initiator user id of the event, and are only called for events that passed the other checks:
+
+        def from_desk(event_type, stream_id, user_id):
+            return stream_id in desk_stream_ids
+
+    A prefilter is immutable, the datafeed event services build a new one when their listeners
+    or filters change. event_types None lets events of every type through.
+    """
+
+    def __init__(self, bot_user_id=None, event_types=None, predicates=()):
+        self.bot_user_id = bot_user_id
+        self.event_types = frozenset(event_types) if event_types is not None else None
+        self.predicates = tuple(predicates)
+
+    def accept(self, event):
+        return bool(self.filter([event]))
+
+    def filter(self, events):
+        """Return the events to handle, in order"""
+        # Locals and a single loop, this runs for every event of the datafeed
+        bot_user_id = self.bot_user_id
+        event_types = self.event_types
+        predicates = self.predicates
+        accepted = []
+        for event in events:
+            if event is None:
+                continue
+            event_type = event.get('type')
+            if event_types is not None and event_type not in event_types:
+                continue
+            initiator = event.get('initiator')
+            try:
+                user_id = initiator['user']['userId']
+            except (KeyError, TypeError):
+                user_id = None
+            if user_id is not None and user_id == bot_user_id:
+                continue
+            if predicates:
+                stream_id = get_event_stream_id(event)
+                if not all(predicate(event_type, stream_id, user_id) for predicate in predicates):
+                    continue
+            accepted.append(event)
+        return accepted
+
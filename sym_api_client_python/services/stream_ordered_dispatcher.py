@@ -0,0 +1,157 @@
+import asyncio
+import logging
+from collections import deque, namedtuple
+
+log = logging.getLogger(__name__)
+
+DispatcherStats = namedtuple('DispatcherStats', 'active_streams queued_jobs running_jobs max_concurrency')
+
+
+class _StreamState:
+    __slots__ = ('jobs', 'not_full')
+
+    def __init__(self):
+        self.jobs = deque()
+        self.not_full = asyncio.Event()
+
+
+class StreamOrderedDispatcher:
+    """Runs jobs one after another for the same key and concurrently across keys.
+
+    Used by AsyncDataFeedEventService with the streamId of each event as the key, so that
+    the events of one conversation are handled in the order they were read while different
+    conversations are handled in parallel.
+
+    A fixed pool of max_concurrency worker tasks takes turns at the streams that have work
+    waiting, one job at a time, so a burst over thousands of streams never creates more than
+    max_concurrency tasks and a busy stream cannot starve the others. When a stream already has
+    max_stream_queue_size jobs waiting, submit blocks until one of them has started, which slows
+    down the reader instead of queueing without limit. A max_stream_queue_size of 0 means no limit.
+
+        dispatcher = StreamOrderedDispatcher(max_concurrency=32, max_stream_queue_size=100)
+        dispatcher.start()
+        await dispatcher.submit(stream_id, partial(route, event), callback)
+        ...
+        await dispatcher.join()
+        dispatcher.close()
+    """
+
+    def __init__(self, max_concurrency=64, max_stream_queue_size=0):
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1, got {}'.format(max_concurrency))
+        self.max_concurrency = max_concurrency
+        self.max_stream_queue_size = max_stream_queue_size or 0
+        self._streams = {}
+        self._ready = None
+        self._idle = None
+        self._workers = []
+        self._unfinished = 0
+        self._running = 0
+        self._closing = False
+
+    def start(self):
+        """Start the worker tasks, must be called from within the running event loop. After close,
+        the workers still serving the jobs submitted before are kept, and the others replaced"""
+        self._closing = False
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        if not self._workers:
+            # Nothing is left of a previous run, whose jobs have all completed or been cancelled
+            self._streams = {}
+            self._unfinished = 0
+            self._running = 0
+            self._ready = asyncio.Queue()
+            self._idle = asyncio.Event()
+            self._idle.set()
+        self._workers += [asyncio.ensure_future(self._work())
+                          for _ in range(self.max_concurrency - len(self._workers))]
+
+    async def submit(self, key, job, callback=None):
+        """Schedule job, a coroutine function taking no arguments, to run after every job
+        previously submitted with the same key. callback is added as a done callback to the
+        future of the job."""
+        while True:
+            state = self._streams.get(key)
+            if state is None:
+                state = self._streams[key] = _StreamState()
+                state.jobs.append((job, callback))
+                self._ready.put_nowait(key)
+                break
+            if self.max_stream_queue_size and len(state.jobs) >= self.max_stream_queue_size:
+                log.debug('StreamOrderedDispatcher/submit() --> Queue for {} full, waiting'.format(key))
+                state.not_full.clear()
+                await state.not_full.wait()
+                # The stream may have been emptied and removed in the meantime, look it up again
+                continue
+            # A stream with jobs waiting is either already scheduled or running, in which case
+            # the worker reschedules it when its current job finishes
+            state.jobs.append((job, callback))
+            break
+
+        self._unfinished += 1
+        self._idle.clear()
+
+    async def join(self):
+        """Wait until every submitted job has completed"""
+        if self._idle is not None:
+            await self._idle.wait()
+
+    def close(self):
+        """Stop the workers once every job submitted has completed, as join waits for. This
+        doesn't wait, and is safe to call from within a job."""
+        self._closing = True
+        if self._unfinished == 0:
+            self._stop_workers()
+
+    def _stop_workers(self):
+        for _ in self._workers:
+            self._ready.put_nowait(None)
+
+    def get_stats(self):
+        return DispatcherStats(
+            active_streams=len(self._streams),
+            queued_jobs=self._unfinished - self._running,
+            running_jobs=self._running,
+            max_concurrency=self.max_concurrency,
+        )
+
+    async def _work(self):
+        while True:
+            key = await self._ready.get()
+            if key is None:
+                if self._closing:
+                    return
+                # Left over from a close followed by start before the workers saw it
+                continue
+            state = self._streams[key]
+            job, callback = state.jobs.popleft()
+            state.not_full.set()
+
+            self._running += 1
+            try:
+                await self._run(job, callback)
+            finally:
+                self._running -= 1
+                self._unfinished -= 1
+                if state.jobs:
+                    self._ready.put_nowait(key)
+                else:
+                    del self._streams[key]
+                if self._unfinished == 0:
+                    self._idle.set()
+                    if self._closing:
+                        # Queued only now, the keys rescheduled above would be stuck behind them
+                        self._stop_workers()
+
+    @staticmethod
+    async def _run(job, callback):
+        future = asyncio.ensure_future(job())
+        if callback is not None:
+            future.add_done_callback(callback)
+        try:
+            await future
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            # With a callback the exception is its responsibility, otherwise it would be lost
+            if callback is None:
+                log.exception('StreamOrderedDispatcher - Unhandled exception in job: {}'.format(exc))
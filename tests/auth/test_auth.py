@@ -0,0 +1,93 @@
+import datetime
+import os
+import ssl
+import tempfile
+import unittest
+from functools import lru_cache
+from unittest.async_case import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
+
+from aioresponses import aioresponses
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.serialization import pkcs12
+from cryptography.x509.oid import NameOID
+
+from sym_api_client_python.auth.async_auth import create_pkcs12_ssl_context
+from sym_api_client_python.auth.auth import Auth
+from sym_api_client_python.configure.configure import SymConfig
+from sym_api_client_python.exceptions.MaxRetryException import MaxRetryException
+from tests.util.resource_util import get_resource_filepath
+
+PASSWORD = 'changeit'
+
+
+@lru_cache(maxsize=None)
+def generate_p12():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'bot')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key()) \
+        .serial_number(x509.random_serial_number()) \
+        .not_valid_before(now - datetime.timedelta(days=1)) \
+        .not_valid_after(now + datetime.timedelta(days=1)) \
+        .sign(key, hashes.SHA256())
+    return pkcs12.serialize_key_and_certificates(
+        b'bot', key, cert, None, serialization.BestAvailableEncryption(PASSWORD.encode()))
+
+
+def create_config(test_case):
+    with tempfile.NamedTemporaryFile('wb', suffix='.p12', delete=False) as p12_file:
+        p12_file.write(generate_p12())
+    test_case.addCleanup(os.remove, p12_file.name)
+
+    config = SymConfig(get_resource_filepath('./bot-config.json'))
+    config.load_config()
+    config.data['p.12'] = p12_file.name
+    config.data['botCertPassword'] = PASSWORD
+    return config
+
+
+class TestPkcs12SslContext(unittest.TestCase):
+
+    def test_loads_client_certificate(self):
+        config = create_config(self)
+        with patch('sym_api_client_python.auth.async_auth.os.remove', wraps=os.remove) as remove:
+            ssl_context = create_pkcs12_ssl_context(config)
+        self.assertIsInstance(ssl_context, ssl.SSLContext)
+        # The temporary chain file doesn't outlive the context creation
+        chain_path = remove.call_args[0][0]
+        self.assertFalse(os.path.exists(chain_path))
+
+
+class TestAuthAsync(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.auth = Auth(create_config(self))
+        self.session_url = self.auth.config.data['sessionAuthUrl'] + '/sessionauth/v1/authenticate'
+        self.key_url = self.auth.config.data['keyAuthUrl'] + '/keyauth/v1/authenticate'
+
+    async def asyncTearDown(self):
+        await self.auth.close_async_auth_session()
+
+    async def test_authenticate_async(self):
+        with aioresponses() as m:
+            m.post(self.session_url, payload={'token': 'session-token'})
+            m.post(self.key_url, payload={'token': 'km-token', 'expireAt': 1234})
+            await self.auth.authenticate_async()
+
+            ssl_contexts = {id(call.kwargs['ssl']) for calls in m.requests.values() for call in calls}
+        self.assertEqual(ssl_contexts, {id(self.auth._get_async_ssl_context())})
+        self.assertEqual(self.auth.get_session_token(), 'session-token')
+        self.assertEqual(self.auth.get_key_manager_token(), 'km-token')
+        self.assertEqual(self.auth.key_manager_token_expire_at, 1234)
+
+    @patch('sym_api_client_python.auth.async_auth.asyncio.sleep', new_callable=AsyncMock)
+    async def test_failed_login_retried_then_given_up(self, sleep):
+        with aioresponses() as m:
+            m.post(self.session_url, payload={'token': 'session-token'})
+            m.post(self.key_url, status=401, repeat=True)
+            with self.assertRaises(MaxRetryException):
+                await self.auth.authenticate_async()
+        self.assertEqual(sleep.await_count, 5)
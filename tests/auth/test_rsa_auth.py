@@ -0,0 +1,141 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from functools import lru_cache
+from unittest.async_case import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
+
+import rsa
+from aioresponses import aioresponses
+from jose import jwk, jwt
+
+from sym_api_client_python.auth.rsa_auth import SymBotRSAAuth, _sign_jwt
+from sym_api_client_python.configure.configure import SymConfig
+from sym_api_client_python.exceptions.MaxRetryException import MaxRetryException
+from tests.util.resource_util import get_resource_filepath
+
+
+@lru_cache(maxsize=None)
+def generate_keys(index):
+    return rsa.newkeys(1024)
+
+
+def generate_key_file(test_case, index=0):
+    public_key, private_key = generate_keys(index)
+    with tempfile.NamedTemporaryFile('wb', suffix='.pem', delete=False) as key_file:
+        key_file.write(private_key.save_pkcs1())
+    test_case.addCleanup(os.remove, key_file.name)
+    return key_file.name, public_key.save_pkcs1().decode()
+
+
+def create_auth(key_path):
+    config = SymConfig(get_resource_filepath('./bot-config.json'))
+    config.load_config()
+    config.data['botRSAPath'] = key_path
+    return SymBotRSAAuth(config)
+
+
+class TestRSAAuthJwt(unittest.TestCase):
+
+    def setUp(self):
+        self.key_path, self.public_key = generate_key_file(self)
+        self.auth = create_auth(self.key_path)
+
+    def test_jwt_matches_jose(self):
+        token = self.auth.create_jwt()
+        claims = jwt.decode(token, self.public_key, algorithms=['RS512'])
+        self.assertEqual(claims['sub'], self.auth.config.data['botUsername'])
+
+        with open(self.key_path) as key_file:
+            expected = jwt.encode(claims, key_file.read(), algorithm='RS512')
+        self.assertEqual(token, expected)
+
+    def test_key_parsed_once_and_jwt_reused(self):
+        with patch('sym_api_client_python.auth.rsa_auth.jwk.construct', wraps=jwk.construct) as construct:
+            first = self.auth.create_jwt()
+            second = self.auth.create_jwt()
+        self.assertEqual(first, second)
+        self.assertEqual(construct.call_count, 1)
+
+    def test_jwt_renewed_when_about_to_expire(self):
+        with patch('sym_api_client_python.auth.rsa_auth._sign_jwt', wraps=_sign_jwt) as sign:
+            self.auth.create_jwt()
+            self.auth.create_jwt()
+            self.assertEqual(sign.call_count, 1)
+            self.auth._jwt_expiration = time.time() + 10
+            self.auth.create_jwt()
+            self.assertEqual(sign.call_count, 2)
+
+    def test_rotated_key_is_reloaded(self):
+        first = self.auth.create_jwt()
+
+        new_key_path, new_public_key = generate_key_file(self, index=1)
+        shutil.copyfile(new_key_path, self.key_path)
+        stat = os.stat(self.key_path)
+        os.utime(self.key_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        second = self.auth.create_jwt()
+        self.assertNotEqual(second, first)
+        jwt.decode(second, new_public_key, algorithms=['RS512'])
+
+
+class TestRSAAuthAsync(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        key_path, _ = generate_key_file(self)
+        self.auth = create_auth(key_path)
+        self.session_url = self.auth.config.data['sessionAuthUrl'] + '/login/pubkey/authenticate'
+        self.key_url = self.auth.config.data['keyAuthUrl'] + '/relay/pubkey/authenticate'
+
+    async def asyncTearDown(self):
+        await self.auth.close_async_auth_session()
+
+    async def test_authenticate_async(self):
+        with aioresponses() as m:
+            m.post(self.session_url, payload={'token': 'session-token', 'expireAt': 1234})
+            m.post(self.key_url, payload={'token': 'km-token'})
+            with patch('sym_api_client_python.auth.rsa_auth.jwk.construct', wraps=jwk.construct) as construct:
+                await self.auth.authenticate_async()
+
+            # Both logins used the same jwt
+            tokens = {call.kwargs['json']['token'] for calls in m.requests.values() for call in calls}
+        self.assertEqual(len(tokens), 1)
+        self.assertEqual(construct.call_count, 1)
+        self.assertEqual(self.auth.get_session_token(), 'session-token')
+        self.assertEqual(self.auth.session_token_expire_at, 1234)
+        self.assertEqual(self.auth.get_key_manager_token(), 'km-token')
+        self.assertNotEqual(self.auth.last_auth_time, 0)
+
+    @patch('sym_api_client_python.auth.async_auth.asyncio.sleep', new_callable=AsyncMock)
+    async def test_failed_login_retried_without_blocking(self, sleep):
+        with aioresponses() as m:
+            m.post(self.session_url, status=503)
+            m.post(self.session_url, payload={'token': 'session-token'})
+            m.post(self.key_url, payload={'token': 'km-token'})
+            await self.auth.authenticate_async()
+        self.assertEqual(self.auth.get_session_token(), 'session-token')
+        sleep.assert_awaited_once()
+
+    @patch('sym_api_client_python.auth.async_auth.asyncio.sleep', new_callable=AsyncMock)
+    async def test_max_retries(self, sleep):
+        with aioresponses() as m:
+            m.post(self.session_url, status=503, repeat=True)
+            m.post(self.key_url, payload={'token': 'km-token'})
+            with self.assertRaises(MaxRetryException):
+                await self.auth.authenticate_async()
+
+    @patch('sym_api_client_python.auth.async_auth.asyncio.sleep', new_callable=AsyncMock)
+    async def test_reauth_within_wait_time_is_delayed(self, sleep):
+        self.auth.last_auth_time = int(round(time.time() * 1000))
+
+        async def let_time_pass(_):
+            self.auth.last_auth_time -= 30000
+        sleep.side_effect = let_time_pass
+
+        with aioresponses() as m:
+            m.post(self.session_url, payload={'token': 'session-token'})
+            m.post(self.key_url, payload={'token': 'km-token'})
+            await self.auth.authenticate_async()
+        sleep.assert_awaited_once()
@@ -1,8 +1,12 @@
 import json
 import os
+import re
 import unittest
+from unittest.async_case import IsolatedAsyncioTestCase
 from unittest.mock import patch
 
+from aioresponses import aioresponses
+
 from sym_api_client_python.auth.rsa_auth import SymBotRSAAuth
 from sym_api_client_python.clients.sym_bot_client import SymBotClient
 from sym_api_client_python.configure.configure import SymConfig
@@ -82,6 +86,60 @@ class TestDataFeedClientV2(unittest.TestCase):
         mock_request.assert_called_with('DELETE', url_call)
 
 
+class TestDataFeedClientV2Async(IsolatedAsyncioTestCase):
+    def setUp(self):
+        configure = SymConfig(get_path_relative_to_resources_folder('./bot-config.json'))
+        configure.load_config()
+        configure.data['datafeedVersion'] = 'v2'
+
+        self.bot_client = SymBotClient(SymBotRSAAuth(configure), configure)
+        self.datafeed_client = self.bot_client.get_datafeed_client()
+        self.agent_url = configure.data['agentUrl']
+
+    async def asyncTearDown(self):
+        await self.bot_client.close_async_sessions()
+
+    async def test_create_datafeed_async(self):
+        with aioresponses() as m:
+            m.post(self.agent_url + '/agent/v5/datafeeds', status=201,
+                   payload=load_json('create_datafeed_v2.json'))
+            datafeed_id = await self.datafeed_client.create_datafeed_async()
+
+        self.assertEqual(datafeed_id, '21449143d35a86461e254d28697214b4_f')
+
+    async def test_list_datafeed_async(self):
+        expected = load_json('list_datafeed_v2.json')
+        with aioresponses() as m:
+            m.get(self.agent_url + '/agent/v5/datafeeds', status=200, payload=expected)
+            datafeed_ids = await self.datafeed_client.list_datafeed_id_async()
+
+        self.assertEqual(datafeed_ids, expected)
+
+    async def test_read_datafeed_async_sends_and_stores_ack_id(self):
+        expected = load_json('read_datafeed_v2.json')
+        url = self.agent_url + '/agent/v5/datafeeds/test_datafeed_id/read'
+        with aioresponses() as m:
+            m.post(url, status=200, payload=expected)
+            events = await self.datafeed_client.read_datafeed_async('test_datafeed_id', 'test_ack_id')
+            request = list(m.requests.values())[0][0]
+
+        self.assertEqual(events, expected['events'])
+        self.assertEqual(self.datafeed_client.get_ack_id(), expected['ackId'])
+        self.assertEqual(request.kwargs['json'], {'ackId': 'test_ack_id'})
+
+    async def test_delete_datafeed_async(self):
+        with aioresponses() as m:
+            m.delete(re.compile('.*/agent/v5/datafeeds/test_datafeed_id$'), status=204)
+            await self.datafeed_client.delete_datafeed_async('test_datafeed_id')
+            self.assertEqual(len(m.requests), 1)
+
+
+def load_json(filename):
+    path = get_path_relative_to_resources_folder('./response_content/datafeed_v2/' + filename)
+    with open(path) as json_file:
+        return json.load(json_file)
+
+
 def get_path_relative_to_resources_folder(path_relative_to_resources):
     path_to_resources = os.path.join(os.path.dirname(__file__), '../../resources/', path_relative_to_resources)
     return os.path.normpath(path_to_resources)
@@ -124,6 +182,9 @@ class MockResponse:
             with open(os.path.realpath(path)) as json_file:
                 self.data = json.load(json_file)
         self.text = json.dumps(self.data)
+        # The client decodes the bytes of the body
+        self.content = self.text.encode('utf-8')
+        self.headers = {'Content-Type': 'application/json'}
 
     def get_json(self):
         return self.data
@@ -0,0 +1,68 @@
+from unittest.async_case import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock
+
+from sym_api_client_python.clients.async_session_pool import AsyncSessionPool
+from sym_api_client_python.clients.sym_bot_client import SymBotClient
+from sym_api_client_python.configure.configure import SymConfig
+from tests.util.resource_util import get_resource_filepath
+
+
+class TestAsyncSessionPool(IsolatedAsyncioTestCase):
+
+    async def test_sessions_of_the_same_host_share_a_connector(self):
+        pool = AsyncSessionPool(limit=20, limit_per_host=5, keepalive_timeout=30, ttl_dns_cache=60)
+        pod = pool.get_session('pod', 'https://pod.symphony.com:443/pod', {})
+        agent = pool.get_session('agent', 'https://pod.symphony.com:443', {})
+        other = pool.get_session('km', 'https://km.symphony.com:8444', {})
+
+        self.assertIs(pod.connector, agent.connector)
+        self.assertIsNot(pod.connector, other.connector)
+        self.assertIs(pool.get_session('pod', 'https://pod.symphony.com:443/pod', {}), pod)
+
+        stats = {stat.host: stat for stat in pool.get_stats()}
+        self.assertEqual(stats['pod.symphony.com:443'].limit, 20)
+        self.assertEqual(stats['pod.symphony.com:443'].limit_per_host, 5)
+        self.assertEqual(stats['pod.symphony.com:443'].acquired, 0)
+
+        await pool.close()
+        self.assertTrue(pod.closed)
+        self.assertEqual(pool.get_stats(), [])
+
+    async def test_from_config(self):
+        config = SymConfig(get_resource_filepath('./bot-config.json'))
+        config.load_config()
+        config.data['asyncConnectionLimitPerHost'] = 8
+        config.data['asyncDnsCacheTtl'] = 300
+
+        pool = AsyncSessionPool.from_config(config)
+
+        self.assertEqual(pool.limit, 100)
+        self.assertEqual(pool.limit_per_host, 8)
+        self.assertEqual(pool.keepalive_timeout, 15)
+        self.assertEqual(pool.ttl_dns_cache, 300)
+
+    async def test_reauth_updates_headers_of_existing_sessions(self):
+        config = SymConfig(get_resource_filepath('./bot-config.json'))
+        config.load_config()
+        auth = MagicMock()
+        auth.get_session_token.return_value = 'session-1'
+        auth.get_key_manager_token.return_value = 'km-1'
+        client = SymBotClient(auth, config)
+
+        pod_session = client.get_async_pod_session()
+        agent_session = client.get_async_agent_session()
+
+        auth.get_session_token.return_value = 'session-2'
+        auth.get_key_manager_token.return_value = 'km-2'
+        client.reauth_client()
+
+        self.assertIs(client.get_async_pod_session(), pod_session)
+        self.assertIs(client.get_async_agent_session(), agent_session)
+        self.assertEqual(pod_session.headers['sessionToken'], 'session-2')
+        self.assertEqual(agent_session.headers['sessionToken'], 'session-2')
+        self.assertEqual(agent_session.headers['keyManagerToken'], 'km-2')
+        self.assertEqual(agent_session.headers['cache-control'], 'no-cache')
+
+        await client.close_async_sessions()
+        self.assertTrue(pod_session.closed)
+        self.assertIsNone(client.async_pod_session)
@@ -0,0 +1,100 @@
+import re
+import time
+import unittest
+from unittest.async_case import IsolatedAsyncioTestCase
+
+import requests_mock
+from aioresponses import aioresponses
+
+from sym_api_client_python.clients.bulk_sender import BulkSender, TokenBucket
+from sym_api_client_python.clients.retry_policy import RetryPolicy
+from sym_api_client_python.clients.sym_bot_client import SymBotClient
+from sym_api_client_python.configure.configure import SymConfig
+from sym_api_client_python.exceptions.APIClientErrorException import APIClientErrorException
+from tests.clients.test_json_codec import StubAuth
+from tests.clients.test_user_cache import FakeClock
+from tests.util.resource_util import get_resource_filepath
+
+MESSAGE = dict(message='<messageML>Alert</messageML>')
+NO_BACKOFF = RetryPolicy(max_attempts=3, initial_backoff=0, retry_statuses=(429, 500, 502, 503, 504))
+
+
+def make_bot_client():
+    config = SymConfig(get_resource_filepath('./bot-config.json'))
+    config.load_config()
+    return SymBotClient(StubAuth(), config)
+
+
+def message_url(bot_client, stream_id):
+    return bot_client.get_sym_config().data['agentUrl'] + '/agent/v4/stream/{}/message/create'.format(stream_id)
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(10, burst=2, clock=clock)
+        self.assertEqual([bucket.reserve() for _ in range(4)], [0, 0, 0.1, 0.2])
+        clock.now = 1.0
+        # Refilled up to the burst only
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0, 0, 0.1])
+
+    def test_rate_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(0)
+
+
+class TestBulkSender(unittest.TestCase):
+
+    def test_results_in_order_with_retries_and_errors(self):
+        bot_client = make_bot_client()
+        bulk_sender = BulkSender(bot_client, rate=1000, max_concurrency=4, retry_policy=NO_BACKOFF)
+        with requests_mock.Mocker() as m:
+            for stream_id in ('a', 'c', 'd'):
+                m.post(message_url(bot_client, stream_id), json={'messageId': stream_id})
+            m.post(message_url(bot_client, 'b'), [{'status_code': 503}, {'status_code': 502},
+                                                  {'json': {'messageId': 'b'}}])
+            m.post(message_url(bot_client, 'e'), status_code=400, json={'message': 'Bad stream'})
+            results = bulk_sender.broadcast(['a', 'b', 'c', 'd', 'e'], MESSAGE)
+
+        self.assertEqual([result.stream_id for result in results], ['a', 'b', 'c', 'd', 'e'])
+        self.assertEqual([result.response and result.response['messageId'] for result in results],
+                         ['a', 'b', 'c', 'd', None])
+        self.assertIsInstance(results[4].error, APIClientErrorException)
+        self.assertEqual(m.call_count, 7)
+
+    def test_rate_limit(self):
+        bot_client = make_bot_client()
+        bulk_sender = BulkSender(bot_client, rate=100, burst=1, max_concurrency=5)
+        with requests_mock.Mocker() as m:
+            m.post(requests_mock.ANY, json={})
+            started = time.monotonic()
+            results = bulk_sender.send([(str(i), MESSAGE) for i in range(6)])
+            elapsed = time.monotonic() - started
+        self.assertTrue(all(result.error is None for result in results))
+        self.assertGreaterEqual(elapsed, 0.045)
+
+    def test_from_config(self):
+        bot_client = make_bot_client()
+        bot_client.get_sym_config().data.update(bulkSendRate=20, bulkSendConcurrency=3)
+        bulk_sender = bot_client.get_bulk_sender()
+        self.assertEqual((bulk_sender.token_bucket.rate, bulk_sender.token_bucket.burst), (20, 20))
+        self.assertEqual(bulk_sender.max_concurrency, 3)
+
+
+class TestBulkSenderAsync(IsolatedAsyncioTestCase):
+
+    async def test_send_async(self):
+        bot_client = make_bot_client()
+        bulk_sender = BulkSender(bot_client, rate=1000, max_concurrency=2, retry_policy=NO_BACKOFF)
+        with aioresponses() as m:
+            m.post(message_url(bot_client, 'a'), payload={'messageId': 'a'})
+            m.post(message_url(bot_client, 'b'), status=429)
+            m.post(message_url(bot_client, 'b'), payload={'messageId': 'b'})
+            m.post(re.compile(r'.*/stream/c/message/create'), status=500, repeat=True)
+            results = await bulk_sender.send_async([('a', MESSAGE), ('b', MESSAGE), ('c', MESSAGE)])
+        await bot_client.close_async_sessions()
+
+        self.assertEqual([result.response and result.response['messageId'] for result in results], ['a', 'b', None])
+        self.assertIsNotNone(results[2].error)
+        self.assertEqual(await bulk_sender.send_async([]), [])
@@ -0,0 +1,86 @@
+import json
+import os
+import socket
+import tempfile
+import unittest
+
+import requests
+
+from sym_api_client_python.clients.connection_pool import IDEMPOTENT_METHODS, merge_pool_config, mount_http_adapter
+from sym_api_client_python.clients.sym_bot_client import SymBotClient
+from sym_api_client_python.configure.configure import SymConfig
+from tests.util.resource_util import get_resource_filepath
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        with open(get_resource_filepath('./bot-config.json')) as config_file:
+            self.config_json = json.load(config_file)
+
+    def load_config(self, **overrides):
+        self.config_json.update(overrides)
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as config_file:
+            json.dump(self.config_json, config_file)
+        self.addCleanup(os.remove, config_file.name)
+        config = SymConfig(config_file.name)
+        config.load_config()
+        return config
+
+    def test_defaults_match_requests(self):
+        config = self.load_config()
+        self.assertEqual(config.data['podConnectionPool'], merge_pool_config())
+        self.assertEqual(config.data['agentConnectionPool']['poolMaxsize'], 10)
+        self.assertEqual(config.data['keyManagerConnectionPool']['maxRetries'], 0)
+
+    def test_specific_pool_overrides_shared_pool(self):
+        config = self.load_config(connectionPool={'poolMaxsize': 50, 'maxRetries': 3},
+                                  agentConnectionPool={'poolMaxsize': 100, 'poolBlock': True})
+
+        self.assertEqual(config.data['podConnectionPool']['poolMaxsize'], 50)
+        self.assertEqual(config.data['agentConnectionPool']['poolMaxsize'], 100)
+        self.assertTrue(config.data['agentConnectionPool']['poolBlock'])
+        self.assertEqual(config.data['agentConnectionPool']['maxRetries'], 3)
+        self.assertEqual(config.data['keyManagerConnectionPool']['poolMaxsize'], 50)
+
+    def test_sessions_mount_sized_adapters(self):
+        config = self.load_config(agentConnectionPool={'poolMaxsize': 64, 'maxRetries': 2,
+                                                       'backoffFactor': 0.5})
+        client = SymBotClient(FakeAuth(), config)
+
+        adapter = client.get_agent_session().get_adapter(config.data['agentUrl'] + '/agent/v4/datafeed')
+        self.assertEqual(adapter._pool_maxsize, 64)
+        self.assertEqual(adapter.max_retries.total, 2)
+        self.assertEqual(adapter.max_retries.backoff_factor, 0.5)
+        self.assertIn(429, adapter.max_retries.status_forcelist)
+        self.assertFalse(adapter.max_retries.raise_on_status)
+
+        retry = adapter.max_retries
+        allowed = getattr(retry, 'allowed_methods', None) or getattr(retry, 'method_whitelist')
+        self.assertEqual(allowed, IDEMPOTENT_METHODS)
+
+        pod_adapter = client.get_pod_session().get_adapter(config.data['podUrl'] + '/pod/v2/user')
+        self.assertEqual(pod_adapter._pool_maxsize, 10)
+
+    def test_default_read_timeout_raises_read_timeout(self):
+        # Accepts the connection but never answers
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen(1)
+        self.addCleanup(server.close)
+        url = 'http://127.0.0.1:{}'.format(server.getsockname()[1])
+
+        session = requests.Session()
+        self.addCleanup(session.close)
+        mount_http_adapter(session, url, merge_pool_config())
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            session.get(url + '/pod/v2/sessioninfo', timeout=0.1)
+
+
+class FakeAuth:
+
+    def get_session_token(self):
+        return 'session-token'
+
+    def get_key_manager_token(self):
+        return 'km-token'
@@ -0,0 +1,127 @@
+import asyncio
+import base64
+import hashlib
+import os
+import random
+import re
+import tempfile
+import unittest
+from unittest.async_case import IsolatedAsyncioTestCase
+
+import requests_mock
+from aioresponses import aioresponses
+
+from sym_api_client_python.clients.download import AttachmentDecoder, AttachmentDownload
+from sym_api_client_python.clients.sym_bot_client import SymBotClient
+from sym_api_client_python.configure.configure import SymConfig
+from sym_api_client_python.exceptions.AttachmentIntegrityException import AttachmentIntegrityException
+from tests.clients.test_json_codec import StubAuth
+from tests.util.resource_util import get_resource_filepath
+
+CONTENT = bytes(range(256)) * 800
+BODY = base64.b64encode(CONTENT)
+CHECKSUM = hashlib.sha256(CONTENT).hexdigest()
+
+
+def make_bot_client():
+    config = SymConfig(get_resource_filepath('./bot-config.json'))
+    config.load_config()
+    return SymBotClient(StubAuth(), config)
+
+
+class TestAttachmentDecoder(unittest.TestCase):
+
+    def test_chunks_of_any_size(self):
+        rng = random.Random(1)
+        for body in (BODY, base64.encodebytes(CONTENT), b'"' + BODY + b'"', b'', base64.b64encode(b'a')):
+            decoder = AttachmentDecoder()
+            decoded = []
+            position = 0
+            while position < len(body):
+                size = rng.randint(1, 70)
+                decoded.append(decoder.feed(body[position:position + size]))
+                position += size
+            decoded.append(decoder.close())
+            self.assertEqual(base64.b64encode(b''.join(decoded)), base64.b64encode(base64.b64decode(body.strip(b'"'))))
+
+    def test_verify(self):
+        decoder = AttachmentDecoder(expected_size=len(CONTENT), expected_checksum=CHECKSUM.upper())
+        decoder.feed(BODY)
+        decoder.close()
+        self.assertEqual(decoder.verify(), AttachmentDownload(len(CONTENT), CHECKSUM))
+
+        for kwargs in ({'expected_size': len(CONTENT) + 1}, {'expected_checksum': '0' * 64}):
+            with self.subTest(**kwargs):
+                decoder = AttachmentDecoder(**kwargs)
+                decoder.feed(BODY)
+                with self.assertRaises(AttachmentIntegrityException):
+                    decoder.verify()
+
+    def test_truncated_body(self):
+        decoder = AttachmentDecoder()
+        decoder.feed(BODY[:-2])
+        with self.assertRaises(AttachmentIntegrityException):
+            decoder.close()
+
+    def test_characters_outside_of_the_alphabet(self):
+        for body in (b'QUJD*REVG', BODY[:100] + b'-' + BODY[100:], b'QUJD\x00REVG'):
+            with self.subTest(body=body[:12]):
+                decoder = AttachmentDecoder()
+                with self.assertRaises(AttachmentIntegrityException):
+                    decoder.feed(body)
+                    decoder.close()
+
+
+class TestDownloadMsgAttachment(unittest.TestCase):
+
+    def setUp(self):
+        self.bot_client = make_bot_client()
+        self.url = self.bot_client.get_sym_config().data['agentUrl'] + '/agent/v1/stream/stream_id/attachment'
+
+    def test_download_to_path(self):
+        with tempfile.TemporaryDirectory() as directory, requests_mock.Mocker() as m:
+            m.get(self.url, content=BODY)
+            path = os.path.join(directory, 'attachment.bin')
+            result = self.bot_client.get_message_client().download_msg_attachment(
+                'stream_id', 'msg_id', 'file_id', path, expected_size=len(CONTENT), expected_checksum=CHECKSUM)
+            self.assertEqual(result, AttachmentDownload(len(CONTENT), CHECKSUM))
+            with open(path, 'rb') as file:
+                self.assertEqual(file.read(), CONTENT)
+            self.assertEqual(m.last_request.qs, {'messageid': ['msg_id'], 'fileid': ['file_id']})
+
+    def test_failed_download_leaves_no_file(self):
+        with tempfile.TemporaryDirectory() as directory, requests_mock.Mocker() as m:
+            m.get(self.url, content=BODY)
+            path = os.path.join(directory, 'attachment.bin')
+            with self.assertRaises(AttachmentIntegrityException):
+                self.bot_client.get_message_client().download_msg_attachment(
+                    'stream_id', 'msg_id', 'file_id', path, expected_size=1)
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_iter_msg_attachment(self):
+        with requests_mock.Mocker() as m:
+            m.get(self.url, content=BODY)
+            chunks = list(self.bot_client.get_message_client().iter_msg_attachment('stream_id', 'msg_id', 'file_id'))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b''.join(chunks), CONTENT)
+
+
+class TestDownloadMsgAttachmentAsync(IsolatedAsyncioTestCase):
+
+    async def test_download_and_iter(self):
+        bot_client = make_bot_client()
+        message_client = bot_client.get_message_client()
+        url = re.compile(r'.*/agent/v1/stream/stream_id/attachment\?.*')
+        with tempfile.TemporaryDirectory() as directory, aioresponses() as m:
+            m.get(url, body=BODY)
+            m.get(url, body=BODY)
+            path = os.path.join(directory, 'attachment.bin')
+            result = await message_client.download_msg_attachment_async(
+                'stream_id', 'msg_id', 'file_id', path, expected_checksum=CHECKSUM)
+            self.assertEqual(result, AttachmentDownload(len(CONTENT), CHECKSUM))
+            with open(path, 'rb') as file:
+                self.assertEqual(file.read(), CONTENT)
+
+            chunks = [chunk async for chunk in message_client.iter_msg_attachment_async('stream_id', 'msg_id', 'file_id')]
+            self.assertEqual(b''.join(chunks), CONTENT)
+        await bot_client.close_async_sessions()
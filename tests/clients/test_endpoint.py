@@ -0,0 +1,105 @@
+import asyncio
+import re
+import unittest
+from unittest.async_case import IsolatedAsyncioTestCase
+
+import requests_mock
+from aioresponses import aioresponses
+
+from sym_api_client_python.clients.admin_client import AdminClient
+from sym_api_client_python.clients.api_client import APIClient
+from sym_api_client_python.clients.connections_client import ConnectionsClient
+from sym_api_client_python.clients.endpoint import RestCall, endpoint, rest_call
+from sym_api_client_python.clients.health_check_client import HealthCheckClient
+from sym_api_client_python.clients.presence_client import PresenceClient
+from sym_api_client_python.clients.signals_client import SignalsClient
+from sym_api_client_python.clients.stream_client import StreamClient
+from sym_api_client_python.clients.sym_bot_client import SymBotClient
+from sym_api_client_python.clients.user_client import UserClient
+from sym_api_client_python.configure.configure import SymConfig
+from tests.clients.test_json_codec import StubAuth
+from tests.util.resource_util import get_resource_filepath
+
+CLIENTS = [AdminClient, ConnectionsClient, HealthCheckClient, PresenceClient, SignalsClient, StreamClient, UserClient]
+
+
+class StubClient(APIClient):
+
+    def __init__(self, bot_client):
+        self.bot_client = bot_client
+
+    @endpoint
+    def get_thing(self, thing_id, full=False):
+        return rest_call('GET', '/pod/v1/thing/{}'.format(thing_id), params={'full': full})
+
+    @endpoint
+    def get_other_thing(self):
+        return rest_call('GET', '/pod/v1/other')
+
+    async def get_other_thing_async(self):
+        return 'explicit'
+
+
+def make_bot_client():
+    config = SymConfig(get_resource_filepath('./bot-config.json'))
+    config.load_config()
+    return SymBotClient(StubAuth(), config)
+
+
+class TestEndpoint(unittest.TestCase):
+
+    def test_every_endpoint_has_an_async_version(self):
+        for cls in CLIENTS:
+            endpoints = [name for name, value in vars(cls).items() if hasattr(value, 'build') and not name.endswith('_async')]
+            self.assertTrue(endpoints, cls.__name__)
+            for name in endpoints:
+                with self.subTest(endpoint=cls.__name__ + '.' + name):
+                    self.assertTrue(asyncio.iscoroutinefunction(getattr(cls, name + '_async')))
+
+    def test_build(self):
+        self.assertEqual(StubClient.get_thing.build(None, 'a', full=True),
+                         RestCall('GET', '/pod/v1/thing/a', {'params': {'full': True}}))
+
+    def test_explicit_async_version_is_kept(self):
+        self.assertEqual(asyncio.run(StubClient(None).get_other_thing_async()), 'explicit')
+
+
+class TestEndpointAsync(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.bot_client = make_bot_client()
+        self.pod_url = self.bot_client.get_sym_config().data['podUrl']
+
+    async def asyncTearDown(self):
+        await self.bot_client.close_async_sessions()
+
+    async def test_sync_and_async_make_the_same_call(self):
+        stream_client = self.bot_client.get_stream_client()
+        url = self.pod_url + '/pod/v3/room/stream_id/info'
+        with requests_mock.Mocker() as m:
+            m.get(url, json={'roomAttributes': {'name': 'room'}})
+            sync_result = stream_client.get_room_info('stream_id')
+        with aioresponses() as m:
+            m.get(url, payload={'roomAttributes': {'name': 'room'}})
+            async_result = await stream_client.get_room_info_async('stream_id')
+        self.assertEqual(async_result, sync_result)
+
+    async def test_boolean_and_none_params(self):
+        client = StubClient(self.bot_client)
+        with aioresponses() as m:
+            m.get(re.compile(r'.*/pod/v1/thing/a\?full=false$'), payload={'id': 'a'})
+            self.assertEqual(await client.get_thing_async('a'), {'id': 'a'})
+        user_client = self.bot_client.get_user_client()
+        with aioresponses() as m:
+            m.post(re.compile(r'.*/pod/v1/user/search\?.*local=true'), payload={'users': []})
+            self.assertEqual(await user_client.search_users_async('name', local=True), {'users': []})
+
+    async def test_ensure_all_services_up_async(self):
+        health_check_client = self.bot_client.get_health_check_client()
+        url = re.compile(r'.*/agent/v2/HealthCheck.*')
+        health_check = {'podConnectivity': True, 'keyManagerConnectivity': True, 'encryptDecryptSuccess': True,
+                        'agentServiceUser': True, 'ceServiceUser': False}
+        with aioresponses() as m:
+            m.get(url, payload=health_check)
+            with self.assertRaisesRegex(RuntimeError, 'ceServiceUser'):
+                await health_check_client.ensure_all_services_up_async()
@@ -0,0 +1,160 @@
+import asyncio
+import gzip
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from unittest.async_case import IsolatedAsyncioTestCase
+
+from sym_api_client_python.clients.history_exporter import ExportResult, HistoryExporter, _Output
+from sym_api_client_python.exceptions.ServerErrorException import ServerErrorException
+
+
+def make_message(stream_id, index):
+    return {'messageId': '{}-{}'.format(stream_id, index), 'stream': {'streamId': stream_id}, 'timestamp': index}
+
+
+class StubMessageClient:
+    """Serves message_counts[stream_id] messages per stream, raising the errors of errors[stream_id]
+    on the page starting at that skip"""
+
+    def __init__(self, message_counts, errors=None):
+        self.message_counts = message_counts
+        self.errors = errors or {}
+        self.calls = []
+
+    async def get_msg_from_stream_async(self, stream_id, since, skip=0, limit=50):
+        await asyncio.sleep(0)
+        self.calls.append((stream_id, since, skip, limit))
+        error = self.errors.get(stream_id, {}).pop(skip, None)
+        if error is not None:
+            raise error
+        count = self.message_counts[stream_id]
+        # An empty page is returned as [] by a 204
+        return [make_message(stream_id, index) for index in range(skip, min(skip + limit, count))]
+
+
+class StubBotClient:
+
+    def __init__(self, message_client):
+        self.message_client = message_client
+
+    def get_message_client(self):
+        return self.message_client
+
+    def get_json_codec(self):
+        return json
+
+
+def read_lines(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as file:
+        return [json.loads(line)['messageId'] for line in file]
+
+
+def expected_ids(message_counts):
+    return sorted('{}-{}'.format(stream_id, index) for stream_id, count in message_counts.items() for index in range(count))
+
+
+class TestHistoryExporter(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    async def test_export(self):
+        message_counts = {'a': 25, 'b': 10, 'c': 0, 'd': 7}
+        for output in ('history.ndjson', 'history.ndjson.gz'):
+            with self.subTest(output=output):
+                message_client = StubMessageClient(message_counts)
+                exporter = HistoryExporter(StubBotClient(message_client), max_concurrency=2, rate=1000, page_size=10)
+                result = await exporter.export_async(list(message_counts), 1000, self.path(output))
+
+                self.assertEqual(result, ExportResult(4, 42, 7, {}))
+                self.assertEqual(sorted(read_lines(self.path(output))), expected_ids(message_counts))
+                self.assertEqual(sorted(call[2] for call in message_client.calls if call[0] == 'a'), [0, 10, 20])
+                self.assertTrue(all(call[1] == 1000 for call in message_client.calls))
+
+    async def test_output_is_written_off_the_event_loop(self):
+        threads = set()
+        write_lines = _Output.write_lines
+
+        def recording_write_lines(output, lines):
+            threads.add(threading.current_thread())
+            write_lines(output, lines)
+
+        exporter = HistoryExporter(StubBotClient(StubMessageClient({'a': 25, 'b': 10})), rate=1000, page_size=10)
+        with mock.patch.object(_Output, 'write_lines', recording_write_lines):
+            result = await exporter.export_async(['a', 'b'], 1000, self.path('history.ndjson.gz'),
+                                                 checkpoint_path=self.path('checkpoint.json'))
+
+        self.assertEqual(result.messages, 35)
+        self.assertTrue(threads)
+        self.assertNotIn(threading.current_thread(), threads)
+
+    async def test_resume_from_checkpoint(self):
+        message_counts = {'a': 25, 'b': 10, 'c': 30}
+        for output in ('history.ndjson', 'history.ndjson.gz'):
+            with self.subTest(output=output):
+                checkpoint_path = self.path(output + '.checkpoint')
+                message_client = StubMessageClient(message_counts, errors={'c': {20: ServerErrorException('503')}})
+                exporter = HistoryExporter(StubBotClient(message_client), max_concurrency=3, rate=1000, page_size=10,
+                                           checkpoint_interval=0)
+                result = await exporter.export_async(list(message_counts), 1000, self.path(output), checkpoint_path)
+                self.assertEqual((result.streams, result.messages), (2, 55))
+                self.assertIsInstance(result.failed['c'], ServerErrorException)
+
+                with open(checkpoint_path) as file:
+                    checkpoint = json.load(file)
+                self.assertEqual(checkpoint['streams']['c'], {'skip': 20, 'done': False})
+                self.assertTrue(checkpoint['streams']['a']['done'])
+
+                # Written after the last checkpoint, dropped by the next run
+                with open(self.path(output), 'ab') as file:
+                    file.write(b'partial line')
+
+                message_client.calls = []
+                result = await exporter.export_async(list(message_counts), 1000, self.path(output), checkpoint_path)
+                self.assertEqual(result, ExportResult(1, 10, 2, {}))
+                self.assertEqual(message_client.calls, [('c', 1000, 20, 10), ('c', 1000, 30, 10)])
+                self.assertEqual(sorted(read_lines(self.path(output))), expected_ids(message_counts))
+                os.remove(checkpoint_path)
+
+    async def test_unsafe_resume_is_refused(self):
+        message_counts = {'a': 25, 'c': 30}
+        output_path = self.path('history.ndjson')
+        checkpoint_path = self.path('checkpoint.json')
+        message_client = StubMessageClient(message_counts, errors={'c': {20: ServerErrorException('503')}})
+        exporter = HistoryExporter(StubBotClient(message_client), rate=1000, page_size=10)
+        await exporter.export_async(list(message_counts), 1000, output_path, checkpoint_path)
+        with open(output_path) as file:
+            lines = file.readlines()
+        message_client.calls = []
+
+        with self.assertRaisesRegex(ValueError, 'since 1000, not 2000'):
+            await exporter.export_async(list(message_counts), 2000, output_path, checkpoint_path)
+
+        with open(output_path, 'w') as file:
+            file.writelines(lines[:-1])
+        with self.assertRaisesRegex(ValueError, 'Cannot resume'):
+            await exporter.export_async(list(message_counts), 1000, output_path, checkpoint_path)
+
+        os.remove(output_path)
+        with self.assertRaisesRegex(ValueError, 'has 0 bytes'):
+            await exporter.export_async(list(message_counts), 1000, output_path, checkpoint_path)
+        self.assertEqual(message_client.calls, [])
+
+
+class TestHistoryExporterConfig(unittest.TestCase):
+
+    def test_from_config(self):
+        class Config:
+            data = {'historyExportConcurrency': 4, 'historyExportRate': 5, 'historyExportPageSize': 100}
+
+        exporter = HistoryExporter.from_config(None, Config())
+        self.assertEqual((exporter.max_concurrency, exporter.token_bucket.rate, exporter.page_size), (4, 5, 100))
@@ -0,0 +1,88 @@
+import unittest
+from unittest.async_case import IsolatedAsyncioTestCase
+
+import requests_mock
+from aioresponses import aioresponses
+
+from sym_api_client_python.clients import json_codec
+from sym_api_client_python.clients.json_codec import JsonCodec, OrjsonCodec, get_charset, get_json_codec
+from sym_api_client_python.clients.sym_bot_client import SymBotClient
+from sym_api_client_python.configure.configure import SymConfig
+from tests.util.resource_util import get_resource_filepath
+
+USERS = '/pod/v3/users'
+BODY = '{"users": [{"id": 1, "displayName": "Renée"}]}'
+
+
+def get_codecs():
+    codecs = [JsonCodec()]
+    if json_codec.orjson is not None:
+        codecs.append(OrjsonCodec())
+    return codecs
+
+
+class TestJsonCodec(unittest.TestCase):
+
+    def test_decodes_bytes_with_the_charset_of_the_content_type(self):
+        for codec in get_codecs():
+            with self.subTest(codec=codec.name):
+                expected = {'users': [{'id': 1, 'displayName': 'Renée'}]}
+                self.assertEqual(codec.decode(BODY.encode('utf-8')), expected)
+                self.assertEqual(codec.decode(BODY.encode('utf-8'), 'application/json; charset=UTF-8'), expected)
+                self.assertEqual(codec.decode(BODY.encode('latin-1'), 'application/json;charset="ISO-8859-1"'),
+                                 expected)
+                with self.assertRaises(ValueError):
+                    codec.decode(b'<html>Bad gateway</html>', 'text/html')
+
+    def test_get_charset(self):
+        self.assertEqual(get_charset('application/json; charset=utf-8'), 'utf-8')
+        self.assertEqual(get_charset('text/plain; Charset="latin-1"; format=flowed'), 'latin-1')
+        self.assertIsNone(get_charset('application/json'))
+        self.assertIsNone(get_charset(None))
+
+    def test_get_json_codec(self):
+        self.assertIsInstance(get_json_codec('json'), JsonCodec)
+        self.assertIs(get_json_codec('json'), get_json_codec('json'))
+        expected = 'orjson' if json_codec.orjson is not None else 'json'
+        self.assertEqual(get_json_codec().name, expected)
+        with self.assertRaises(ValueError):
+            get_json_codec('yaml')
+
+
+class TestSymBotClientDecoding(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.config = SymConfig(get_resource_filepath('./bot-config.json'))
+        self.config.load_config()
+        self.url = self.config.data['podUrl'] + USERS
+
+    def test_config_selects_the_codec(self):
+        self.config.data['jsonCodec'] = 'json'
+        self.assertIs(type(SymBotClient(None, self.config).get_json_codec()), JsonCodec)
+
+    def test_sync_responses(self):
+        client = SymBotClient(StubAuth(), self.config, json_codec=JsonCodec())
+        with requests_mock.Mocker() as m:
+            m.get(self.url, content=BODY.encode('latin-1'),
+                  headers={'Content-Type': 'application/json; charset=ISO-8859-1'})
+            self.assertEqual(client.execute_rest_call('GET', USERS)['users'][0]['displayName'], 'Renée')
+            m.get(self.url, text='not json')
+            self.assertEqual(client.execute_rest_call('GET', USERS), 'not json')
+
+    async def test_async_responses(self):
+        client = SymBotClient(StubAuth(), self.config)
+        with aioresponses() as m:
+            m.get(self.url, body=BODY.encode('utf-8'), content_type='application/json')
+            m.get(self.url, body='not json', content_type='text/plain')
+            self.assertEqual((await client.execute_rest_call_async('GET', USERS))['users'][0]['id'], 1)
+            self.assertEqual(await client.execute_rest_call_async('GET', USERS), 'not json')
+        await client.close_async_sessions()
+
+
+class StubAuth:
+
+    def get_session_token(self):
+        return 'session-token'
+
+    def get_key_manager_token(self):
+        return 'km-token'
@@ -0,0 +1,93 @@
+import json
+import unittest
+from unittest.async_case import IsolatedAsyncioTestCase
+
+import requests_mock
+from aioresponses import aioresponses
+
+from sym_api_client_python.clients.datafeed_client_v2 import DataFeedClientV2
+from sym_api_client_python.clients.json_stream import JsonArrayStreamParser
+from sym_api_client_python.clients.sym_bot_client import SymBotClient
+from sym_api_client_python.configure.configure import SymConfig
+from tests.clients.test_json_codec import StubAuth
+from tests.util.resource_util import get_resource_filepath
+
+EVENTS = [
+    {'id': 'event-{}'.format(index), 'type': 'MESSAGESENT', 'timestamp': 1565879149167 + index,
+     'payload': {'messageSent': {'message': {'message': '<p>Déployé "v{}" ]}}</p>'.format(index),
+                                             'score': -2.5e-3, 'count': index, 'flags': [True, None]}}}}
+    for index in range(20)
+]
+
+
+def parse_in_chunks(body, size):
+    parser = JsonArrayStreamParser('events')
+    events = []
+    for start in range(0, len(body), size):
+        events += parser.feed(body[start:start + size])
+    return events, parser.close()
+
+
+class TestJsonArrayStreamParser(unittest.TestCase):
+
+    def test_any_split_of_the_body(self):
+        bodies = [
+            {'events': EVENTS, 'ackId': 'ack-1'},
+            {'ackId': 'ack-1', 'events': EVENTS + [12, 'last'], 'count': 12345},
+        ]
+        for payload in bodies:
+            for indent in (None, 2):
+                body = json.dumps(payload, ensure_ascii=False, indent=indent).encode('utf-8')
+                members = {key: value for key, value in payload.items() if key != 'events'}
+                for size in (1, 2, 3, 7, 64, len(body)):
+                    with self.subTest(keys=list(payload), indent=indent, size=size):
+                        self.assertEqual(parse_in_chunks(body, size), (payload['events'], members))
+
+    def test_events_are_returned_as_soon_as_complete(self):
+        parser = JsonArrayStreamParser('events')
+        self.assertEqual(parser.feed(b'{"events": [{"id": 1}, {"id"'), [{'id': 1}])
+        self.assertEqual(parser.feed(b': 2}, 3'), [{'id': 2}])
+        self.assertEqual(parser.feed(b'4]'), [34])
+        self.assertEqual(parser.feed(b', "ackId": null}'), [])
+        self.assertEqual(parser.close(), {'ackId': None})
+
+    def test_invalid_bodies(self):
+        for body in (b'{"events": [{"id": 1}', b'[{"id": 1}]', b'{"events": [1] "ackId": 2}', b'{"events": [1]} x'):
+            with self.subTest(body=body):
+                with self.assertRaises(ValueError):
+                    parse_in_chunks(body, 4)
+
+
+class TestStreamingDatafeedReads(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.config = SymConfig(get_resource_filepath('./bot-config.json'))
+        self.config.load_config()
+        self.bot_client = SymBotClient(StubAuth(), self.config)
+        self.url = self.config.data['agentUrl'] + '/agent/v5/datafeeds/df-id/read'
+        self.body = json.dumps({'events': EVENTS, 'ackId': 'ack-2'}).encode('utf-8')
+
+    def test_iter_datafeed(self):
+        datafeed_client = DataFeedClientV2(self.bot_client)
+        with requests_mock.Mocker() as m:
+            m.post(self.url, content=self.body)
+            events = datafeed_client.iter_datafeed('df-id', 'ack-1')
+            self.assertEqual(next(events), EVENTS[0])
+            self.assertEqual(datafeed_client.get_ack_id(), '')
+            self.assertEqual(list(events), EVENTS[1:])
+            self.assertEqual(m.last_request.json(), {'ackId': 'ack-1'})
+            self.assertEqual(datafeed_client.get_ack_id(), 'ack-2')
+
+            m.post(self.url, status_code=204)
+            self.assertEqual(list(datafeed_client.iter_datafeed('df-id', 'ack-2')), [])
+            self.assertEqual(datafeed_client.get_ack_id(), 'ack-2')
+
+    async def test_iter_datafeed_async(self):
+        datafeed_client = DataFeedClientV2(self.bot_client)
+        with aioresponses() as m:
+            m.post(self.url, body=self.body, content_type='application/json')
+            m.post(self.url, status=204)
+            self.assertEqual([event async for event in datafeed_client.iter_datafeed_async('df-id')], EVENTS)
+            self.assertEqual(datafeed_client.get_ack_id(), 'ack-2')
+            self.assertEqual([event async for event in datafeed_client.iter_datafeed_async('df-id')], [])
+        await self.bot_client.close_async_sessions()
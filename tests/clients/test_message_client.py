@@ -1,8 +1,18 @@
+import asyncio
+import io
 import os
 import unittest
 from io import IOBase
 
+import requests_mock
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+
 from sym_api_client_python.clients.message_client import open_file
+from sym_api_client_python.clients.sym_bot_client import SymBotClient
+from sym_api_client_python.clients.upload import UploadProgress
+from sym_api_client_python.configure.configure import SymConfig
+from tests.clients.test_json_codec import StubAuth
+from tests.util.resource_util import get_resource_filepath
 
 
 def get_path_to_file():
@@ -23,3 +33,84 @@ class TestMessageClient(unittest.TestCase):
         with open(path) as file:
             with open_file(file) as opened_file:
                 self.assertEqual(file, opened_file)
+
+
+class StubWriter:
+
+    def __init__(self):
+        self.chunks = []
+
+    async def write(self, chunk):
+        self.chunks.append(bytes(chunk))
+
+
+class TestSendMsgWithAttachments(unittest.TestCase):
+
+    def setUp(self):
+        config = SymConfig(get_resource_filepath('./bot-config.json'))
+        config.load_config()
+        self.bot_client = SymBotClient(StubAuth(), config)
+        self.url = config.data['agentUrl'] + '/agent/v4/stream/stream_id/message/create'
+
+    def test_attachments_are_streamed_with_progress(self):
+        progress = []
+        sent = []
+
+        def read_body(request, context):
+            self.assertIsInstance(request.body, MultipartEncoder)
+            # Nothing is read until the request body is sent
+            self.assertEqual(progress, [])
+            sent.append(request.body.read())
+            return {'messageId': 'msg_id'}
+
+        with requests_mock.Mocker() as m:
+            m.post(self.url, json=read_body)
+            result = self.bot_client.get_message_client().send_msg_with_attachments(
+                'stream_id', '<messageML>Files</messageML>',
+                [('a.bin', io.BytesIO(b'a' * 100000)), ('config.json', get_path_to_file()), ('c.txt', b'ccc')],
+                progress=lambda sent, total: progress.append((sent, total)))
+        content = sent[0]
+
+        total = 100000 + os.path.getsize(get_path_to_file()) + 3
+        self.assertEqual(result, {'messageId': 'msg_id'})
+        self.assertEqual(content.count(b'name="attachment"'), 3)
+        self.assertIn(b'<messageML>Files</messageML>', content)
+        self.assertIn(b'filename="config.json"', content)
+        self.assertEqual(progress[-1], (total, total))
+
+    def test_async_multipart_form_is_chunked(self):
+        async def chunks():
+            yield b'abc'
+            yield b'def'
+
+        progress = []
+        parts = self.bot_client.get_message_client()._data_and_headers_for_attachments(
+            'stream_id', '<messageML>Files</messageML>', [('a.bin', io.BytesIO(b'a' * 100000)), ('b.txt', chunks())],
+            progress=lambda sent, total: progress.append((sent, total)), aio=True)
+        writer = StubWriter()
+        asyncio.run(parts['data'].write(writer))
+        content = b''.join(writer.chunks)
+
+        # The size isn't known up front, the form is sent with chunked transfer encoding
+        self.assertIsNone(parts['data'].size)
+        self.assertIn(b'<messageML>Files</messageML>', content)
+        self.assertIn(b'a' * 100000 + b'\r\n', content)
+        self.assertIn(b'filename="b.txt"\r\n\r\nabcdef\r\n', content)
+        self.assertEqual(progress, [(65536, None), (100000, None), (100003, None), (100006, None)])
+        self.assertTrue(all(len(chunk) <= 65536 for chunk in writer.chunks))
+
+    def test_unknown_size_needs_async(self):
+        with self.assertRaises(ValueError):
+            UploadProgress().wrap(NonSeekable(b'abc'))
+
+
+class NonSeekable(io.RawIOBase):
+
+    def __init__(self, data):
+        self.data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self.data.readinto(buffer)
@@ -0,0 +1,109 @@
+import asyncio
+import time
+import unittest
+from unittest.async_case import IsolatedAsyncioTestCase
+
+import requests_mock
+
+from sym_api_client_python.clients.endpoint import rest_call
+from sym_api_client_python.clients.paginator import Paginator
+from sym_api_client_python.clients.sym_bot_client import SymBotClient
+from sym_api_client_python.configure.configure import SymConfig
+from tests.clients.test_json_codec import StubAuth
+from tests.util.resource_util import get_resource_filepath
+
+
+def build_page(skip, limit):
+    return rest_call('GET', '/path', params={'skip': skip, 'limit': limit})
+
+
+class StubBotClient:
+    """Serves total items, as a list or under items_key, and records the calls"""
+
+    def __init__(self, total, items_key=None):
+        self.total = total
+        self.items_key = items_key
+        self.calls = []
+
+    def execute_rest_call(self, method, path, params=None, json=None):
+        self.calls.append((params['skip'], params['limit']))
+        items = list(range(params['skip'], min(params['skip'] + params['limit'], self.total)))
+        if not items:
+            return []
+        return {self.items_key: items} if self.items_key else items
+
+    async def execute_rest_call_async(self, method, path, **kwargs):
+        await asyncio.sleep(0)
+        return self.execute_rest_call(method, path, **kwargs)
+
+
+class TestPaginator(unittest.TestCase):
+
+    def test_pages(self):
+        for total, calls in [(25, [(0, 10), (10, 10), (20, 10)]), (20, [(0, 10), (10, 10), (20, 10)]), (0, [(0, 10)])]:
+            with self.subTest(total=total):
+                bot_client = StubBotClient(total, items_key='streams')
+                items = list(Paginator(bot_client, build_page, items_key='streams', page_size=10))
+                self.assertEqual(items, list(range(total)))
+                self.assertEqual(bot_client.calls, calls)
+
+    def test_max_items(self):
+        bot_client = StubBotClient(100)
+        self.assertEqual(list(Paginator(bot_client, build_page, page_size=10, max_items=25)), list(range(25)))
+        self.assertEqual(bot_client.calls, [(0, 10), (10, 10), (20, 5)])
+
+    def test_has_more(self):
+        bot_client = StubBotClient(100)
+        bot_client.execute_rest_call = lambda method, path, params, json=None: {'data': [1, 2], 'hasMore': False}
+        self.assertEqual(list(Paginator(bot_client, build_page, items_key='data', page_size=2)), [1, 2])
+
+    def test_next_page_is_fetched_while_the_current_one_is_consumed(self):
+        bot_client = StubBotClient(30)
+        items = iter(Paginator(bot_client, build_page, page_size=10))
+        self.assertEqual(next(items), 0)
+        for _ in range(500):
+            if len(bot_client.calls) == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(bot_client.calls, [(0, 10), (10, 10)])
+        self.assertEqual(sum(1 for _ in items), 29)
+
+    def test_without_prefetch(self):
+        bot_client = StubBotClient(30)
+        items = iter(Paginator(bot_client, build_page, page_size=10, prefetch=False))
+        self.assertEqual([next(items) for _ in range(10)], list(range(10)))
+        self.assertEqual(bot_client.calls, [(0, 10)])
+
+
+class TestPaginatorAsync(IsolatedAsyncioTestCase):
+
+    async def test_pages(self):
+        bot_client = StubBotClient(25, items_key='rooms')
+        items = [item async for item in Paginator(bot_client, build_page, items_key='rooms', page_size=10)]
+        self.assertEqual(items, list(range(25)))
+        self.assertEqual(bot_client.calls, [(0, 10), (10, 10), (20, 10)])
+
+    async def test_break_cancels_the_prefetch(self):
+        bot_client = StubBotClient(100)
+        items = Paginator(bot_client, build_page, page_size=10).__aiter__()
+        self.assertEqual(await items.__anext__(), 0)
+        await items.aclose()
+        await asyncio.sleep(0.01)
+        self.assertEqual(bot_client.calls, [(0, 10)])
+
+
+class TestClientPagination(unittest.TestCase):
+
+    def test_iter_streams_enterprise_v2(self):
+        config = SymConfig(get_resource_filepath('./bot-config.json'))
+        config.load_config()
+        stream_client = SymBotClient(StubAuth(), config).get_stream_client()
+        url = config.data['podUrl'] + '/pod/v2/admin/streams/list'
+        with requests_mock.Mocker() as m:
+            m.post(url, [{'json': {'count': 3, 'streams': [{'id': 'a'}, {'id': 'b'}]}},
+                         {'json': {'count': 3, 'streams': [{'id': 'c'}]}}])
+            streams = list(stream_client.iter_streams_enterprise_v2(page_size=2, streamTypes=[{'type': 'ROOM'}]))
+            self.assertEqual([stream['id'] for stream in streams], ['a', 'b', 'c'])
+            self.assertEqual([request.qs for request in m.request_history],
+                             [{'skip': ['0'], 'limit': ['2']}, {'skip': ['2'], 'limit': ['2']}])
+            self.assertEqual(m.last_request.json(), {'streamTypes': [{'type': 'ROOM'}]})
@@ -0,0 +1,163 @@
+import unittest
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from unittest.async_case import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import requests_mock
+from aioresponses import aioresponses
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+
+from sym_api_client_python.clients.retry_policy import RetryPolicy, is_replayable, parse_retry_after
+from sym_api_client_python.clients.sym_bot_client import SymBotClient
+from sym_api_client_python.configure.configure import SymConfig
+from sym_api_client_python.exceptions.ServerErrorException import ServerErrorException
+from sym_api_client_python.exceptions.UnauthorizedException import UnauthorizedException
+from tests.util.resource_util import get_resource_filepath
+
+SESSION_INFO = '/pod/v2/sessioninfo'
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_backoff_is_jittered_and_capped(self):
+        policy = RetryPolicy(initial_backoff=1, max_backoff=5, multiplier=2)
+        for attempt, ceiling in [(1, 1), (2, 2), (3, 4), (4, 5), (10, 5)]:
+            delays = [policy.get_delay(attempt) for _ in range(200)]
+            self.assertTrue(all(0 <= delay <= ceiling for delay in delays))
+            # Full jitter spreads the retries over the whole interval
+            self.assertGreater(max(delays) - min(delays), ceiling / 2)
+
+    def test_retry_after_takes_precedence(self):
+        policy = RetryPolicy(initial_backoff=1, max_backoff=10)
+        self.assertEqual(policy.get_delay(1, {'Retry-After': '3'}), 3)
+        self.assertEqual(policy.get_delay(1, {'Retry-After': '120'}), 10)
+        self.assertLessEqual(policy.get_delay(1, {'Retry-After': 'soon'}), 1)
+
+        policy = RetryPolicy(initial_backoff=1, respect_retry_after=False)
+        self.assertLessEqual(policy.get_delay(1, {'Retry-After': '3'}), 1)
+
+    def test_parse_retry_after(self):
+        self.assertIsNone(parse_retry_after(None))
+        self.assertEqual(parse_retry_after('2.5'), 2.5)
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+        self.assertAlmostEqual(parse_retry_after(format_datetime(retry_at, usegmt=True)), 30, delta=2)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0)
+
+    def test_attempts_are_bounded(self):
+        policy = RetryPolicy(max_attempts=3, retry_statuses=[503])
+        self.assertTrue(policy.should_retry_status(503, 2))
+        self.assertFalse(policy.should_retry_status(503, 3))
+        self.assertFalse(policy.should_retry_status(500, 1))
+        self.assertTrue(policy.should_retry_exception(UnauthorizedException(), 1))
+        self.assertFalse(policy.should_retry_exception(ValueError(), 1))
+
+    def test_from_config(self):
+        config = load_config()
+        config.data['retryPolicy'] = {'maxAttempts': 2, 'retryStatuses': [502]}
+        policy = RetryPolicy.from_config(config)
+        self.assertEqual(policy.max_attempts, 2)
+        self.assertEqual(policy.retry_statuses, {502})
+        self.assertEqual(policy.initial_backoff, 0.5)
+
+    def test_streamed_bodies_are_not_replayable(self):
+        self.assertTrue(is_replayable({'json': {'a': 1}}))
+        self.assertTrue(is_replayable({'files': {'message': '<messageML/>'}}))
+        self.assertFalse(is_replayable({'data': MultipartEncoder(fields={'a': 'b'})}))
+        with open(get_resource_filepath('./bot-config.json'), 'rb') as file:
+            self.assertFalse(is_replayable({'files': {'attachment': ('a.json', file, 'file')}}))
+
+
+class TestExecuteRestCallRetry(unittest.TestCase):
+
+    def setUp(self):
+        self.config = load_config()
+        self.auth = FakeAuth()
+        self.client = SymBotClient(self.auth, self.config, retry_policy=RetryPolicy(
+            max_attempts=3, initial_backoff=0))
+        self.url = self.config.data['podUrl'] + SESSION_INFO
+
+    def test_returns_result_of_retry_after_401(self):
+        with requests_mock.Mocker() as m:
+            m.get(self.url, [{'status_code': 401, 'json': {'message': 'expired'}},
+                             {'status_code': 200, 'json': {'id': 1}}])
+            self.assertEqual(self.client.execute_rest_call('GET', SESSION_INFO), {'id': 1})
+        self.assertEqual(self.auth.authentications, 1)
+
+    def test_retries_503_with_retry_after(self):
+        with requests_mock.Mocker() as m, \
+                patch('sym_api_client_python.clients.sym_bot_client.time.sleep') as sleep:
+            m.get(self.url, [{'status_code': 503, 'headers': {'Retry-After': '0.2'}},
+                             {'status_code': 200, 'json': {'id': 1}}])
+            self.assertEqual(self.client.execute_rest_call('GET', SESSION_INFO), {'id': 1})
+        sleep.assert_called_once_with(0.2)
+
+    def test_raises_once_attempts_are_exhausted(self):
+        with requests_mock.Mocker() as m:
+            m.get(self.url, status_code=503, json={'message': 'unavailable'})
+            with self.assertRaises(ServerErrorException):
+                self.client.execute_rest_call('GET', SESSION_INFO)
+            self.assertEqual(m.call_count, 3)
+
+            m.get(self.url, status_code=401, json={'message': 'expired'})
+            with self.assertRaises(UnauthorizedException):
+                self.client.execute_rest_call('GET', SESSION_INFO)
+        self.assertEqual(self.auth.authentications, 3)
+
+    def test_streamed_body_is_not_retried(self):
+        url = self.config.data['agentUrl'] + '/agent/v4/stream/sid/message/create'
+        with requests_mock.Mocker() as m:
+            m.post(url, status_code=503, json={'message': 'unavailable'})
+            with self.assertRaises(ServerErrorException):
+                self.client.execute_rest_call('POST', '/agent/v4/stream/sid/message/create',
+                                              data=MultipartEncoder(fields={'message': 'hi'}))
+            self.assertEqual(m.call_count, 1)
+
+
+class TestExecuteRestCallAsyncRetry(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.config = load_config()
+        self.auth = FakeAuth()
+        self.client = SymBotClient(self.auth, self.config, retry_policy=RetryPolicy(
+            max_attempts=3, initial_backoff=0))
+        self.url = self.config.data['podUrl'] + SESSION_INFO
+
+    async def asyncTearDown(self):
+        await self.client.close_async_sessions()
+
+    async def test_returns_result_of_retry(self):
+        with aioresponses() as m:
+            m.get(self.url, status=401, payload={'message': 'expired'})
+            m.get(self.url, status=429, headers={'Retry-After': '0'})
+            m.get(self.url, status=200, payload={'id': 1})
+            self.assertEqual(await self.client.execute_rest_call_async('GET', SESSION_INFO), {'id': 1})
+        self.assertEqual(self.auth.authentications, 1)
+
+    async def test_raises_once_attempts_are_exhausted(self):
+        with aioresponses() as m:
+            for _ in range(3):
+                m.get(self.url, status=503, payload={'message': 'unavailable'})
+            with self.assertRaises(ServerErrorException):
+                await self.client.execute_rest_call_async('GET', SESSION_INFO)
+
+
+def load_config():
+    config = SymConfig(get_resource_filepath('./bot-config.json'))
+    config.load_config()
+    return config
+
+
+class FakeAuth:
+
+    def __init__(self):
+        self.authentications = 0
+
+    def authenticate(self):
+        self.authentications += 1
+
+    def get_session_token(self):
+        return 'session-token'
+
+    def get_key_manager_token(self):
+        return 'km-token'
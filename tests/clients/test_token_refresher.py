@@ -0,0 +1,216 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.async_case import IsolatedAsyncioTestCase
+
+import requests_mock
+from aioresponses import CallbackResult, aioresponses
+
+from sym_api_client_python.clients.retry_policy import RetryPolicy
+from sym_api_client_python.clients.sym_bot_client import SymBotClient
+from sym_api_client_python.clients.token_refresher import TokenRefresher
+from sym_api_client_python.configure.configure import SymConfig
+from tests.util.resource_util import get_resource_filepath
+
+SESSION_INFO = '/pod/v2/sessioninfo'
+
+
+class TestTokenRefresher(unittest.TestCase):
+
+    def test_concurrent_callers_share_one_refresh(self):
+        release = threading.Event()
+        calls = []
+
+        def refresh_tokens():
+            calls.append(threading.current_thread().name)
+            release.wait(5)
+
+        refresher = TokenRefresher(refresh_tokens)
+        with ThreadPoolExecutor(8) as executor:
+            futures = [executor.submit(refresher.refresh, 0) for _ in range(8)]
+            time.sleep(0.1)
+            release.set()
+            self.assertEqual([future.result() for future in futures], [1] * 8)
+        self.assertEqual(len(calls), 1)
+
+    def test_stale_generation_does_not_refresh_again(self):
+        calls = []
+        refresher = TokenRefresher(lambda: calls.append(1))
+        self.assertEqual(refresher.refresh(0), 1)
+        self.assertEqual(refresher.refresh(0), 1)
+        self.assertEqual(len(calls), 1)
+        # Without a generation, or with the current one, the tokens are always refreshed
+        self.assertEqual(refresher.refresh(), 2)
+        self.assertEqual(refresher.refresh(2), 3)
+
+    def test_failure_is_shared_and_not_cached(self):
+        outcomes = [RuntimeError('auth down'), None]
+
+        def refresh_tokens():
+            outcome = outcomes.pop(0)
+            if outcome:
+                raise outcome
+
+        refresher = TokenRefresher(refresh_tokens)
+        with self.assertRaises(RuntimeError):
+            refresher.refresh(0)
+        self.assertEqual(refresher.generation, 0)
+        self.assertEqual(refresher.refresh(0), 1)
+
+
+class TestTokenRefresherAsync(IsolatedAsyncioTestCase):
+
+    async def test_concurrent_tasks_share_one_refresh_off_the_loop(self):
+        calls = []
+
+        def refresh_tokens():
+            calls.append(threading.current_thread())
+            time.sleep(0.2)
+
+        refresher = TokenRefresher(refresh_tokens)
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while not calls or ticks < 5:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        results = await asyncio.gather(tick(), *[refresher.refresh_async(0) for _ in range(20)])
+        self.assertEqual(results[1:], [1] * 20)
+        self.assertEqual(len(calls), 1)
+        self.assertIsNot(calls[0], threading.current_thread())
+        # The loop kept running while the tokens were refreshed
+        self.assertGreaterEqual(ticks, 5)
+
+
+class TestTokenRefresherSyncOnLoopThread(unittest.TestCase):
+
+    def test_sync_refresh_during_async_refresh_does_not_deadlock(self):
+        calls = []
+
+        async def refresh_tokens_async():
+            calls.append('async')
+            await asyncio.sleep(0.05)
+
+        refresher = TokenRefresher(lambda: calls.append('sync'), refresh_tokens_async)
+        results = []
+
+        async def scenario():
+            task = asyncio.ensure_future(refresher.refresh_async(0))
+            await asyncio.sleep(0)
+            # A sync call of an async listener, on the thread of the loop running the refresh
+            results.append(refresher.refresh(0))
+            results.append(await task)
+
+        thread = threading.Thread(target=asyncio.run, args=(scenario(),), daemon=True)
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive(), 'refresh() blocked the event loop')
+        self.assertEqual(sorted(calls), ['async', 'sync'])
+        self.assertEqual(sorted(results), [1, 2])
+
+
+class TestSymBotClientReauth(unittest.TestCase):
+
+    def setUp(self):
+        config = SymConfig(get_resource_filepath('./bot-config.json'))
+        config.load_config()
+        self.auth = SlowAuth()
+        self.client = SymBotClient(self.auth, config, retry_policy=RetryPolicy(initial_backoff=0))
+        self.url = config.data['podUrl'] + SESSION_INFO
+
+    def test_burst_of_401_triggers_one_authentication(self):
+        with requests_mock.Mocker() as m:
+            m.get(self.url, json=self.auth.respond_sync)
+            self.client.get_pod_session()
+            with ThreadPoolExecutor(8) as executor:
+                results = list(executor.map(
+                    lambda _: self.client.execute_rest_call('GET', SESSION_INFO), range(8)))
+        self.assertEqual(results, [{'id': 1}] * 8)
+        self.assertEqual(self.auth.authentications, 1)
+
+
+class TestSymBotClientReauthAsync(IsolatedAsyncioTestCase):
+
+    async def test_burst_of_401_triggers_one_authentication(self):
+        config = SymConfig(get_resource_filepath('./bot-config.json'))
+        config.load_config()
+        auth = SlowAuth()
+        client = SymBotClient(auth, config, retry_policy=RetryPolicy(initial_backoff=0))
+        url = config.data['podUrl'] + SESSION_INFO
+
+        with aioresponses() as m:
+            m.get(url, callback=auth.respond_async, repeat=True)
+            results = await asyncio.gather(
+                *[client.execute_rest_call_async('GET', SESSION_INFO) for _ in range(8)])
+        await client.close_async_sessions()
+
+        self.assertEqual(results, [{'id': 1}] * 8)
+        self.assertEqual(auth.authentications, 1)
+
+
+class SlowAuth:
+    """Issues 'token-n' on the n-th authentication, which takes a while"""
+
+    def __init__(self):
+        self.authentications = 0
+
+    def authenticate(self):
+        time.sleep(0.1)
+        self.authentications += 1
+
+    def get_session_token(self):
+        return 'token-{}'.format(self.authentications)
+
+    def get_key_manager_token(self):
+        return 'km-token'
+
+    def respond_sync(self, request, context):
+        if request.headers['sessionToken'] == 'token-0':
+            context.status_code = 401
+            return {'message': 'expired'}
+        return {'id': 1}
+
+    def respond_async(self, url, **kwargs):
+        # aioresponses doesn't see the default headers of the session, go by the tokens issued
+        if self.authentications == 0:
+            return CallbackResult(status=401, payload={'message': 'expired'})
+        return CallbackResult(payload={'id': 1})
+
+
+class TestSymBotClientAsyncAuth(IsolatedAsyncioTestCase):
+
+    async def test_async_path_uses_authenticate_async(self):
+        config = SymConfig(get_resource_filepath('./bot-config.json'))
+        config.load_config()
+        auth = AsyncAuth()
+        client = SymBotClient(auth, config, retry_policy=RetryPolicy(initial_backoff=0))
+        url = config.data['podUrl'] + SESSION_INFO
+
+        with aioresponses() as m:
+            m.get(url, callback=auth.respond_async, repeat=True)
+            results = await asyncio.gather(
+                *[client.execute_rest_call_async('GET', SESSION_INFO) for _ in range(4)])
+        await client.close_async_sessions()
+
+        self.assertEqual(results, [{'id': 1}] * 4)
+        self.assertEqual(auth.authentications, 1)
+        self.assertTrue(auth.closed)
+
+
+class AsyncAuth(SlowAuth):
+
+    closed = False
+
+    def authenticate(self):
+        raise AssertionError('The async path must not authenticate synchronously')
+
+    async def authenticate_async(self):
+        await asyncio.sleep(0.1)
+        self.authentications += 1
+
+    async def close_async_auth_session(self):
+        self.closed = True
@@ -0,0 +1,119 @@
+import asyncio
+import time
+import unittest
+from unittest.async_case import IsolatedAsyncioTestCase
+
+from sym_api_client_python.clients.sym_bot_client import SymBotClient
+from sym_api_client_python.clients.token_renewer import TokenRenewer
+from sym_api_client_python.configure.configure import SymConfig
+from tests.util.resource_util import get_resource_filepath
+
+
+class TestTokenRenewerDelay(unittest.TestCase):
+
+    def setUp(self):
+        self.auth = CountingAuth()
+        self.client = SymBotClient(self.auth, load_config())
+
+    def test_renews_straight_away_when_never_authenticated(self):
+        self.assertEqual(TokenRenewer(self.client).get_delay(), 0)
+
+    def test_assumed_lifetime(self):
+        self.auth.last_auth_time = 1000 * 1000
+        renewer = TokenRenewer(self.client, token_lifetime=100, renewal_ratio=0.8)
+        self.assertEqual(renewer.get_delay(now=1000), 80)
+        self.assertEqual(renewer.get_delay(now=1050), 30)
+        self.assertEqual(renewer.get_delay(now=1200), 0)
+
+    def test_expire_at_of_the_earliest_token(self):
+        self.auth.last_auth_time = 1000 * 1000
+        self.auth.session_token_expire_at = 2000 * 1000
+        self.auth.key_manager_token_expire_at = 1500 * 1000
+        renewer = TokenRenewer(self.client, token_lifetime=100, renewal_ratio=0.5)
+        self.assertEqual(renewer.get_delay(now=1000), 250)
+
+    def test_from_config(self):
+        self.client.config.data['authTokenLifetime'] = 7200
+        renewer = TokenRenewer.from_config(self.client)
+        self.assertEqual(renewer.token_lifetime, 7200)
+        self.assertEqual(renewer.renewal_ratio, 0.8)
+        self.assertIs(self.client.get_token_renewer(), self.client.get_token_renewer())
+
+
+class TestTokenRenewerThread(unittest.TestCase):
+
+    def test_renews_sessions_until_stopped(self):
+        auth = CountingAuth()
+        auth.authenticate()
+        client = SymBotClient(auth, load_config())
+        session = client.get_pod_session()
+
+        renewer = TokenRenewer(client, token_lifetime=0.1, renewal_ratio=0.5)
+        renewer.start()
+        time.sleep(0.3)
+        renewer.stop()
+        renewals = renewer.renewals
+
+        self.assertFalse(renewer.running)
+        self.assertGreaterEqual(renewals, 2)
+        self.assertEqual(session.headers['sessionToken'], auth.get_session_token())
+        time.sleep(0.1)
+        self.assertEqual(renewer.renewals, renewals)
+
+    def test_failed_renewal_is_retried(self):
+        auth = CountingAuth(failures=1)
+        client = SymBotClient(auth, load_config())
+
+        renewer = TokenRenewer(client, retry_interval=0.05)
+        renewer.start()
+        time.sleep(0.2)
+        renewer.stop()
+
+        self.assertGreaterEqual(renewer.renewals, 1)
+
+
+class TestTokenRenewerTask(IsolatedAsyncioTestCase):
+
+    async def test_renews_async_sessions(self):
+        auth = CountingAuth()
+        auth.authenticate()
+        client = SymBotClient(auth, load_config())
+        session = client.get_async_agent_session()
+
+        renewer = client.get_token_renewer()
+        renewer.token_lifetime = 0.1
+        renewer.start_async()
+        self.assertTrue(renewer.running)
+        await asyncio.sleep(0.2)
+        await client.close_async_sessions()
+
+        self.assertFalse(renewer.running)
+        self.assertGreaterEqual(renewer.renewals, 1)
+        self.assertEqual(session.headers['sessionToken'], auth.get_session_token())
+
+
+def load_config():
+    config = SymConfig(get_resource_filepath('./bot-config.json'))
+    config.load_config()
+    return config
+
+
+class CountingAuth:
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.authentications = 0
+        self.last_auth_time = 0
+
+    def authenticate(self):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('auth down')
+        self.authentications += 1
+        self.last_auth_time = int(round(time.time() * 1000))
+
+    def get_session_token(self):
+        return 'token-{}'.format(self.authentications)
+
+    def get_key_manager_token(self):
+        return 'km-token-{}'.format(self.authentications)
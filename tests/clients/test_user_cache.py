@@ -0,0 +1,134 @@
+import unittest
+from urllib.parse import parse_qs, urlparse
+
+import requests_mock
+
+from sym_api_client_python.clients.sym_bot_client import SymBotClient
+from sym_api_client_python.clients.user_cache import UserCache, UserCacheStats
+from sym_api_client_python.configure.configure import SymConfig
+from tests.clients.test_json_codec import StubAuth
+from tests.util.resource_util import get_resource_filepath
+
+
+def make_user(user_id):
+    return {'id': user_id, 'emailAddress': 'User{}@example.com'.format(user_id),
+            'username': 'user{}'.format(user_id), 'displayName': 'User {}'.format(user_id)}
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestUserCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = UserCache(max_size=2, ttl_sec=10, clock=self.clock)
+
+    def test_lookups_by_id_email_and_username(self):
+        self.cache.put(make_user(1))
+        self.assertEqual(self.cache.get(1)['id'], 1)
+        self.assertEqual(self.cache.get_by_email('user1@example.com')['id'], 1)
+        self.assertEqual(self.cache.get_by_username('user1')['id'], 1)
+        self.assertIsNone(self.cache.get(2))
+        self.assertEqual(self.cache.get_stats(), UserCacheStats(size=1, pending=0, hits=3, misses=1,
+                                                                expired=0, evictions=0))
+
+    def test_ttl_and_lru_eviction(self):
+        self.cache.put(make_user(1))
+        self.cache.put(make_user(2))
+        self.cache.get(1)
+        self.cache.put(make_user(3))
+        self.assertIsNone(self.cache.get(2))
+        self.assertIsNone(self.cache.get_by_username('user2'))
+
+        self.clock.now = 10
+        self.assertIsNone(self.cache.get(1))
+        stats = self.cache.get_stats()
+        self.assertEqual((stats.size, stats.evictions, stats.expired), (1, 1, 1))
+
+    def test_invalidate(self):
+        self.cache.put(make_user(1))
+        self.cache.put(make_user(2))
+        self.cache.invalidate(email='USER1@example.com')
+        self.cache.invalidate(2)
+        self.assertEqual(self.cache.get_stats().size, 0)
+
+    def test_users_of_events_are_partial_and_pending(self):
+        self.cache = UserCache(max_size=10, ttl_sec=10, clock=self.clock)
+        self.cache.put(make_user(1))
+        self.cache.observe_events([
+            {'initiator': {'user': {'userId': 1, 'displayName': 'Ignored'}}},
+            {'initiator': {'user': {'userId': 7, 'email': 'seven@example.com'}},
+             'payload': {'userJoinedRoom': {'affectedUser': {'userId': 8}}}},
+            None,
+        ])
+        self.assertEqual(self.cache.get(1)['displayName'], 'User 1')
+        self.assertIsNone(self.cache.get(8))
+        self.assertEqual(self.cache.get(8, partial=True), {'id': 8})
+        self.assertEqual(self.cache.get_by_email('seven@example.com', partial=True)['id'], 7)
+        self.assertEqual(self.cache.take_pending(5, exclude=(8,)), [7])
+        self.assertEqual(self.cache.get_stats().pending, 0)
+
+
+class TestUserClientCaching(unittest.TestCase):
+
+    def setUp(self):
+        config = SymConfig(get_resource_filepath('./bot-config.json'))
+        config.load_config()
+        config.data['userCacheSize'] = 100
+        config.data['userCacheBatchSize'] = 3
+        self.bot_client = SymBotClient(StubAuth(), config)
+        self.user_client = self.bot_client.get_user_client()
+        self.pod_url = config.data['podUrl']
+
+    def test_misses_are_fetched_in_batches_with_the_users_of_events(self):
+        self.bot_client.get_user_cache().observe_events([
+            {'initiator': {'user': {'userId': user_id}}} for user_id in (2, 3, 4)])
+        with requests_mock.Mocker() as m:
+            m.get(self.pod_url + '/pod/v3/users', json=self.list_users)
+
+            self.assertEqual(self.user_client.get_user_from_id(1)['id'], 1)
+            self.assertEqual(self.user_client.get_user_from_id(2)['displayName'], 'User 2')
+            self.assertEqual(self.user_client.get_user_from_email('user3@example.com')['id'], 3)
+            self.assertEqual(m.call_count, 1)
+            self.assertEqual(parse_qs(urlparse(m.last_request.url).query)['uid'], ['1,2,3'])
+
+            users = self.user_client.get_users_from_id_list([1, 5, 6, 7, 8])
+            self.assertEqual([user['id'] for user in users['users']], [1, 5, 6, 7, 8])
+            self.assertEqual(m.call_count, 3)
+
+        self.assertEqual(self.bot_client.get_user_cache().get_stats().pending, 1)
+
+    def test_unknown_users_fall_back_to_v2(self):
+        with requests_mock.Mocker() as m:
+            m.get(self.pod_url + '/pod/v3/users', json={'users': [], 'errors': [{'error': 'invalid.id', 'id': 9}]})
+            m.get(self.pod_url + '/pod/v2/user', json=make_user(9))
+            self.assertEqual(self.user_client.get_user_from_id(9)['id'], 9)
+            self.assertEqual(self.user_client.get_user_from_user_name('user9')['id'], 9)
+            self.assertEqual(m.call_count, 2)
+
+    def test_local_lookups_bypass_the_cache(self):
+        self.bot_client.get_user_cache().put(make_user(1))
+        with requests_mock.Mocker() as m:
+            m.get(self.pod_url + '/pod/v3/users', json={'users': [], 'errors': []})
+            m.get(self.pod_url + '/pod/v2/user', status_code=204)
+            self.assertEqual(self.user_client.get_user_from_id(1)['id'], 1)
+            self.assertEqual(m.call_count, 0)
+
+            # User 1 of another pod isn't a local user
+            self.assertFalse(self.user_client.get_user_from_id(1, local=True))
+            self.assertFalse(self.user_client.get_user_from_email('user1@example.com', local=True))
+            self.assertEqual(self.user_client.get_users_from_id_list([1], local=True)['users'], [])
+            self.assertEqual(m.call_count, 3)
+            self.assertTrue(all(request.qs['local'] == ['true'] for request in m.request_history))
+
+    @staticmethod
+    def list_users(request, context):
+        user_ids = parse_qs(urlparse(request.url).query)['uid'][0].split(',')
+        return {'users': [make_user(int(user_id)) for user_id in user_ids], 'errors': []}
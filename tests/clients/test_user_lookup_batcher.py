@@ -0,0 +1,149 @@
+import asyncio
+import re
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.async_case import IsolatedAsyncioTestCase
+
+from aioresponses import aioresponses
+
+from sym_api_client_python.clients.sym_bot_client import SymBotClient
+from sym_api_client_python.clients.user_cache import UserCache
+from sym_api_client_python.clients.user_lookup_batcher import BatcherStats, UserLookupBatcher
+from sym_api_client_python.configure.configure import SymConfig
+from tests.clients.test_json_codec import StubAuth
+from tests.clients.test_user_cache import make_user
+from tests.util.resource_util import get_resource_filepath
+
+
+class StubUserClient:
+    """Returns the users asked for, except those of id 0 and unknown@example.com"""
+
+    def __init__(self, user_cache=None, error=None):
+        self.bot_client = self
+        self.user_cache = user_cache
+        self.error = error
+        self.calls = []
+
+    def get_user_cache(self):
+        return self.user_cache
+
+    def get_users_from_id_list(self, user_id_list, local=False):
+        self.calls.append(list(user_id_list))
+        if self.error is not None:
+            raise self.error
+        return {'users': [make_user(user_id) for user_id in user_id_list if user_id], 'errors': []}
+
+    def get_users_from_email_list(self, email_list, local=False):
+        self.calls.append(list(email_list))
+        users = [make_user(int(re.search(r'\d+', email).group())) for email in email_list if email != 'unknown@example.com']
+        return {'users': users, 'errors': []}
+
+    async def get_users_from_id_list_async(self, user_id_list, local=False):
+        await asyncio.sleep(0)
+        return self.get_users_from_id_list(user_id_list, local)
+
+    async def get_users_from_email_list_async(self, email_list, local=False):
+        await asyncio.sleep(0)
+        return self.get_users_from_email_list(email_list, local)
+
+
+class TestUserLookupBatcher(unittest.TestCase):
+
+    def test_concurrent_lookups_are_coalesced(self):
+        user_client = StubUserClient()
+        batcher = UserLookupBatcher(user_client, window_sec=0.2, max_batch_size=50)
+        user_ids = list(range(1, 41)) + [1, 2, 0]
+        with ThreadPoolExecutor(len(user_ids)) as executor:
+            users = list(executor.map(batcher.get_user_from_id, user_ids))
+
+        self.assertEqual([user and user['id'] for user in users], user_ids[:-1] + [None])
+        self.assertEqual(len(user_client.calls), 1)
+        self.assertEqual(sorted(user_client.calls[0]), list(range(0, 41)))
+        self.assertEqual(batcher.get_stats(), BatcherStats(lookups=43, requests=1, users_requested=41))
+
+    def test_full_batches_are_sent_without_waiting(self):
+        user_client = StubUserClient()
+        batcher = UserLookupBatcher(user_client, window_sec=5, max_batch_size=10)
+        started = time.monotonic()
+        with ThreadPoolExecutor(20) as executor:
+            users = list(executor.map(batcher.get_user_from_id, range(1, 21)))
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual([user['id'] for user in users], list(range(1, 21)))
+        self.assertEqual(sorted(len(call) for call in user_client.calls), [10, 10])
+
+    def test_errors_are_raised_to_every_caller(self):
+        user_client = StubUserClient(error=RuntimeError('rate limited'))
+        batcher = UserLookupBatcher(user_client, window_sec=0.1)
+        errors = []
+
+        def lookup(user_id):
+            try:
+                batcher.get_user_from_id(user_id)
+            except RuntimeError as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=lookup, args=(user_id,)) for user_id in range(1, 6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(errors), 5)
+        self.assertEqual(len(user_client.calls), 1)
+
+    def test_cached_users_are_not_looked_up(self):
+        user_cache = UserCache()
+        user_cache.put(make_user(3))
+        user_client = StubUserClient(user_cache)
+        self.assertEqual(UserLookupBatcher(user_client).get_user_from_id(3)['id'], 3)
+        self.assertEqual(user_client.calls, [])
+
+
+class TestUserLookupBatcherAsync(IsolatedAsyncioTestCase):
+
+    async def test_concurrent_lookups_are_coalesced(self):
+        user_client = StubUserClient()
+        batcher = UserLookupBatcher(user_client, window_sec=0.05, max_batch_size=3)
+        users = await asyncio.gather(
+            *[batcher.get_user_from_id_async(user_id) for user_id in (1, 2, 3, 4, 4, 0)],
+            *[batcher.get_user_from_email_async(email) for email in ('User5@example.com', 'unknown@example.com')])
+
+        self.assertEqual([user and user['id'] for user in users], [1, 2, 3, 4, 4, None, 5, None])
+        self.assertEqual(user_client.calls, [[1, 2, 3], [4, 0], ['user5@example.com', 'unknown@example.com']])
+
+    async def test_cancelled_leader_does_not_leave_its_batch_stuck(self):
+        for fetch_delay in (0, 0.5):
+            with self.subTest(cancelled_while='fetching' if fetch_delay else 'waiting'):
+                user_client = StubUserClient()
+                fetch = user_client.get_users_from_id_list_async
+
+                async def slow_fetch(user_id_list, local=False):
+                    await asyncio.sleep(fetch_delay)
+                    return await fetch(user_id_list, local)
+
+                user_client.get_users_from_id_list_async = slow_fetch
+                batcher = UserLookupBatcher(user_client, window_sec=0.1, max_batch_size=10)
+                leader = asyncio.ensure_future(batcher.get_user_from_id_async(1))
+                await asyncio.sleep(0)
+                follower = asyncio.ensure_future(batcher.get_user_from_id_async(2))
+                await asyncio.sleep(0.05 if not fetch_delay else 0.2)
+                leader.cancel()
+
+                with self.assertRaises(asyncio.CancelledError):
+                    await asyncio.wait_for(follower, 1)
+                # The next lookups open a new batch
+                user = await asyncio.wait_for(batcher.get_user_from_id_async(3), 1)
+                self.assertEqual(user['id'], 3)
+
+    async def test_user_client_async_lookups(self):
+        config = SymConfig(get_resource_filepath('./bot-config.json'))
+        config.load_config()
+        bot_client = SymBotClient(StubAuth(), config)
+        batcher = bot_client.get_user_lookup_batcher()
+        url = re.compile(r'.*/pod/v3/users\?.*uid=1(,|%2C)2')
+        with aioresponses() as m:
+            m.get(url, payload={'users': [make_user(1), make_user(2)], 'errors': []})
+            users = await asyncio.gather(batcher.get_user_from_id_async(1), batcher.get_user_from_id_async(2))
+        self.assertEqual([user['id'] for user in users], [1, 2])
+        await bot_client.close_async_sessions()
@@ -0,0 +1,145 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from sym_api_client_python.clients.sym_bot_client import SymBotClient
+from sym_api_client_python.configure.configure import SymConfig
+from sym_api_client_python.services.datafeed_event_service_v1 import DataFeedEventServiceV1
+from sym_api_client_python.services.datafeed_pipeline import DatafeedPipeline
+from tests.util.resource_util import get_resource_filepath
+
+
+class TestDatafeedPipeline(unittest.TestCase):
+
+    def test_shutdown_drains_queued_batches(self):
+        handled = []
+        pipeline = DatafeedPipeline(handled.append, workers=1, queue_size=2)
+        pipeline.start()
+        for i in range(10):
+            pipeline.submit([i])
+        pipeline.shutdown()
+
+        self.assertEqual(handled, [[i] for i in range(10)])
+        self.assertFalse(pipeline.running)
+        stats = pipeline.get_stats()
+        self.assertEqual(stats.batches_queued, 10)
+        self.assertEqual(stats.batches_handled, 10)
+        self.assertEqual(stats.events_handled, 10)
+        self.assertEqual(stats.queue_depth, 0)
+
+    def test_reader_blocks_when_queue_is_full(self):
+        release = threading.Event()
+        pipeline = DatafeedPipeline(lambda events: release.wait(), workers=1, queue_size=1)
+        pipeline.start()
+        # The first batch is taken by the worker, the second fills the queue
+        pipeline.submit([1])
+        pipeline.submit([2])
+
+        reader = threading.Thread(target=pipeline.submit, args=([3],))
+        reader.start()
+        reader.join(0.1)
+        self.assertTrue(reader.is_alive())
+
+        release.set()
+        reader.join()
+        pipeline.shutdown()
+        stats = pipeline.get_stats()
+        self.assertGreaterEqual(stats.blocked_puts, 1)
+        self.assertGreater(stats.blocked_time_sec, 0)
+
+    def test_restart_after_shutdown_without_waiting(self):
+        release = threading.Event()
+        handled = []
+
+        def handle_batch(events):
+            release.wait()
+            handled.append(events)
+
+        pipeline = DatafeedPipeline(handle_batch, workers=1, queue_size=1)
+        pipeline.start()
+        pipeline.submit([1])
+        stopping_worker = pipeline._threads[0]
+        pipeline.shutdown(wait=False)
+        self.assertFalse(pipeline.running)
+
+        pipeline.start()
+        self.assertTrue(pipeline.running)
+        release.set()
+        for i in range(2, 6):
+            pipeline.submit([i])
+        pipeline.shutdown()
+        self.assertEqual(sorted(handled), [[i] for i in range(1, 6)])
+        stopping_worker.join(1)
+        self.assertFalse(stopping_worker.is_alive())
+
+    def test_failing_handler_does_not_stop_workers(self):
+        handled = []
+
+        def handle(events):
+            if events == ['bad']:
+                raise ValueError('listener failure')
+            handled.append(events)
+
+        pipeline = DatafeedPipeline(handle, workers=2, queue_size=4)
+        pipeline.start()
+        pipeline.submit(['bad'])
+        pipeline.submit(['good'])
+        pipeline.shutdown()
+
+        self.assertEqual(handled, [['good']])
+        self.assertEqual(pipeline.get_stats().handler_errors, 1)
+
+    def test_invalid_sizes(self):
+        with self.assertRaises(ValueError):
+            DatafeedPipeline(print, workers=0)
+        with self.assertRaises(ValueError):
+            DatafeedPipeline(print, queue_size=0)
+
+
+class TestPipelinedDatafeedEventService(unittest.TestCase):
+
+    def setUp(self):
+        self.config = SymConfig(get_resource_filepath('./bot-config.json'))
+        self.config.load_config()
+        self.config.data['reuseDatafeedID'] = False
+        self.client = SymBotClient(None, self.config)
+        self.client.get_bot_user_info = MagicMock(return_value={'id': 456})
+
+    def test_events_read_before_stop_are_all_handled(self):
+        service = DataFeedEventServiceV1(self.client, pipeline_workers=2, pipeline_queue_size=1)
+        service.datafeed_id = 'datafeed-id'
+        reads = iter([[make_event(i)] for i in range(5)])
+
+        def read_datafeed(datafeed_id):
+            events = next(reads, None)
+            if events is None:
+                service.deactivate_datafeed()
+            return events
+
+        handled = []
+        lock = threading.Lock()
+
+        def handle_event(event):
+            with lock:
+                handled.append(event['id'])
+
+        service.datafeed_client = MagicMock()
+        service.datafeed_client.read_datafeed.side_effect = read_datafeed
+        service.handle_event = handle_event
+        # Events nobody listens to are dropped before being handled
+        service.add_im_listener(MagicMock())
+
+        service.read_datafeed()
+
+        self.assertEqual(sorted(handled), list(range(5)))
+        self.assertFalse(service.pipeline.running)
+        self.assertEqual(service.get_pipeline_stats().events_handled, 5)
+
+    def test_pipeline_disabled_by_default(self):
+        service = DataFeedEventServiceV1(self.client)
+        self.assertEqual(service.pipeline_workers, 0)
+        self.assertIsNone(service.get_pipeline_stats())
+
+
+def make_event(event_id):
+    return {'id': event_id, 'type': 'MESSAGESENT', 'initiator': {'user': {'userId': 123}}}
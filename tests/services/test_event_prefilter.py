@@ -0,0 +1,103 @@
+import unittest
+from unittest.mock import MagicMock
+
+from sym_api_client_python.clients.sym_bot_client import SymBotClient
+from sym_api_client_python.configure.configure import SymConfig
+from sym_api_client_python.services.datafeed_event_service_v1 import DataFeedEventServiceV1
+from sym_api_client_python.services.event_prefilter import EventPrefilter
+from tests.util.resource_util import get_resource_filepath
+
+BOT_ID = 456
+
+
+def make_event(event_id, event_type='MESSAGESENT', user_id=123, stream_id='s1'):
+    stream = {'streamId': stream_id, 'streamType': 'IM'}
+    if event_type == 'MESSAGESENT':
+        payload = {'messageSent': {'message': {'stream': stream}}}
+    else:
+        payload = {'roomCreated': {'stream': stream}}
+    return {'id': event_id, 'type': event_type, 'initiator': {'user': {'userId': user_id}}, 'payload': payload}
+
+
+class TestEventPrefilter(unittest.TestCase):
+
+    def test_drops_bot_events_unlistened_types_and_rejected_events(self):
+        calls = []
+
+        def not_s2(event_type, stream_id, user_id):
+            calls.append((event_type, stream_id, user_id))
+            return stream_id != 's2'
+
+        prefilter = EventPrefilter(BOT_ID, ['MESSAGESENT'], [not_s2])
+        events = [make_event(1), None, make_event(2, user_id=BOT_ID), make_event(3, 'ROOMCREATED'),
+                  make_event(4, stream_id='s2'), {'id': 5, 'type': 'MESSAGESENT'}]
+
+        self.assertEqual([event['id'] for event in prefilter.filter(events)], [1, 5])
+        # Predicates are only called for the events that passed the other checks
+        self.assertEqual(calls, [('MESSAGESENT', 's1', 123), ('MESSAGESENT', 's2', 123),
+                                 ('MESSAGESENT', None, None)])
+
+    def test_all_types_accepted_without_event_types(self):
+        prefilter = EventPrefilter(BOT_ID)
+        self.assertTrue(prefilter.accept(make_event(1, 'ANYTHING')))
+        self.assertFalse(prefilter.accept(make_event(2, user_id=BOT_ID)))
+
+
+class TestServicePrefilter(unittest.TestCase):
+
+    def setUp(self):
+        config = SymConfig(get_resource_filepath('./bot-config.json'))
+        config.load_config()
+        self.client = SymBotClient(None, config)
+        self.client.get_bot_user_info = MagicMock(return_value={'id': BOT_ID})
+        self.service = DataFeedEventServiceV1(self.client)
+
+    def test_prefilter_rebuilt_when_listeners_change(self):
+        listener = MagicMock()
+        self.service.add_im_listener(listener)
+        for i in range(3):
+            self.service.handle_events([make_event(i), make_event(10 + i, user_id=BOT_ID),
+                                        make_event(20 + i, 'ROOMCREATED')])
+
+        self.assertEqual([call.args[0]['stream']['streamId'] for call in listener.on_im_message.call_args_list],
+                         ['s1'] * 3)
+        # The bot user is looked up once, not for every event
+        self.assertEqual(self.client.get_bot_user_info.call_count, 1)
+
+        room_listener = MagicMock()
+        self.service.add_room_listener(room_listener)
+        self.service.add_event_filter(lambda event_type, stream_id, user_id: event_type == 'ROOMCREATED')
+        self.service.handle_events([make_event(30), make_event(31, 'ROOMCREATED')])
+
+        self.assertEqual(listener.on_im_message.call_count, 3)
+        self.assertEqual(room_listener.on_room_created.call_count, 1)
+
+    def test_listened_event_types(self):
+        self.assertEqual(self.service._get_listened_event_types(), [])
+        self.service.add_connection_listener(MagicMock())
+        self.assertEqual(self.service._get_listened_event_types(),
+                         ['CONNECTIONACCEPTED', 'CONNECTIONREQUESTED'])
+
+    def test_listeners_appended_directly(self):
+        listener = MagicMock()
+        self.service.handle_events([make_event(1, 'ROOMCREATED')])
+        self.service.room_listeners.append(listener)
+        self.service.handle_events([make_event(2, 'ROOMCREATED')])
+        self.assertEqual(listener.on_room_created.call_count, 1)
+
+    def test_types_routed_to_other_handlers_are_listened_to(self):
+        handled = []
+
+        class RoutingService(DataFeedEventServiceV1):
+
+            def __init__(self, sym_bot_client):
+                super().__init__(sym_bot_client)
+                self.routing_dict['MESSAGESENT'] = handled.append
+
+            def room_created_handler(self, payload):
+                handled.append(payload)
+
+        service = RoutingService(self.client)
+        self.assertEqual(service._get_listened_event_types(), ['MESSAGESENT', 'ROOMCREATED'])
+        service.handle_events([make_event(1), make_event(2, 'ROOMCREATED'), make_event(3, 'USERJOINEDROOM')])
+        self.assertEqual([event['id'] for event in handled], [1, 2])
@@ -0,0 +1,200 @@
+import asyncio
+from functools import partial
+from unittest.async_case import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock
+
+from sym_api_client_python.clients.sym_bot_client import SymBotClient
+from sym_api_client_python.configure.configure import SymConfig
+from sym_api_client_python.datafeed_event_service import AsyncDataFeedEventService
+from sym_api_client_python.listeners.im_listener import IMListener
+from sym_api_client_python.services.abstract_datafeed_event_service import get_event_stream_id
+from sym_api_client_python.services.stream_ordered_dispatcher import StreamOrderedDispatcher
+from tests.util.resource_util import get_resource_filepath
+
+
+class TestStreamOrderedDispatcher(IsolatedAsyncioTestCase):
+
+    async def test_jobs_of_a_stream_run_in_order(self):
+        dispatcher = StreamOrderedDispatcher(max_concurrency=4)
+        dispatcher.start()
+        handled = []
+
+        async def job(key, i):
+            # Later jobs finish faster, so they would overtake without ordering
+            await asyncio.sleep(0.01 * (5 - i))
+            handled.append((key, i))
+
+        for i in range(5):
+            for key in ('a', 'b'):
+                await dispatcher.submit(key, partial(job, key, i))
+        await dispatcher.join()
+        dispatcher.close()
+
+        self.assertEqual([i for key, i in handled if key == 'a'], list(range(5)))
+        self.assertEqual([i for key, i in handled if key == 'b'], list(range(5)))
+
+    async def test_concurrency_is_capped(self):
+        dispatcher = StreamOrderedDispatcher(max_concurrency=3)
+        dispatcher.start()
+        running = []
+        peak = []
+
+        async def job():
+            running.append(1)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.pop()
+
+        for key in range(20):
+            await dispatcher.submit(key, job)
+        await dispatcher.join()
+        dispatcher.close()
+
+        self.assertEqual(max(peak), 3)
+        self.assertEqual(dispatcher.get_stats().active_streams, 0)
+
+    async def test_submit_blocks_when_stream_queue_is_full(self):
+        dispatcher = StreamOrderedDispatcher(max_concurrency=1, max_stream_queue_size=1)
+        dispatcher.start()
+        release = asyncio.Event()
+
+        async def job():
+            await release.wait()
+
+        await dispatcher.submit('a', job)
+        await asyncio.sleep(0)  # first job starts running
+        await dispatcher.submit('a', job)  # waits in the queue
+
+        blocked = asyncio.ensure_future(dispatcher.submit('a', job))
+        await asyncio.sleep(0.01)
+        self.assertFalse(blocked.done())
+
+        release.set()
+        await blocked
+        await dispatcher.join()
+        dispatcher.close()
+
+    async def test_callback_receives_failed_future(self):
+        dispatcher = StreamOrderedDispatcher(max_concurrency=1)
+        dispatcher.start()
+        failures = []
+
+        async def job():
+            raise ValueError('listener failure')
+
+        await dispatcher.submit('a', job, lambda future: failures.append(future.exception()))
+        await dispatcher.join()
+        dispatcher.close()
+
+        self.assertIsInstance(failures[0], ValueError)
+
+    async def test_close_serves_the_jobs_already_submitted(self):
+        dispatcher = StreamOrderedDispatcher(max_concurrency=2)
+        dispatcher.start()
+        handled = []
+
+        async def job(i):
+            await asyncio.sleep(0)
+            handled.append(i)
+
+        for i in range(3):
+            await dispatcher.submit('a', partial(job, i))
+        dispatcher.close()
+        await asyncio.wait_for(dispatcher.join(), 1)
+
+        self.assertEqual(handled, [0, 1, 2])
+        self.assertEqual(dispatcher.get_stats(), (0, 0, 0, 2))
+
+    async def test_restart_after_close(self):
+        dispatcher = StreamOrderedDispatcher(max_concurrency=2)
+        handled = []
+        release = asyncio.Event()
+
+        async def job(i):
+            await release.wait()
+            handled.append(i)
+
+        for restart_while_busy in (True, False):
+            with self.subTest(restart_while_busy=restart_while_busy):
+                handled.clear()
+                release.clear()
+                dispatcher.start()
+                await dispatcher.submit('a', partial(job, 0))
+                await dispatcher.submit('a', partial(job, 1))
+                dispatcher.close()
+                if not restart_while_busy:
+                    release.set()
+                    await asyncio.wait_for(dispatcher.join(), 1)
+                    await asyncio.sleep(0)
+
+                dispatcher.start()
+                await dispatcher.submit('a', partial(job, 2))
+                release.set()
+                await asyncio.wait_for(dispatcher.join(), 1)
+                self.assertEqual(handled, [0, 1, 2])
+                self.assertEqual(len([worker for worker in dispatcher._workers if not worker.done()]), 2)
+        dispatcher.close()
+
+    def test_get_event_stream_id(self):
+        message_sent = {'payload': {'messageSent': {'message': {'stream': {'streamId': 's1'}}}}}
+        room_created = {'payload': {'roomCreated': {'stream': {'streamId': 's2'}}}}
+        connection = {'payload': {'connectionRequested': {'toUser': {'userId': 1}}}}
+
+        self.assertEqual(get_event_stream_id(message_sent), 's1')
+        self.assertEqual(get_event_stream_id(room_created), 's2')
+        self.assertIsNone(get_event_stream_id(connection))
+        self.assertIsNone(get_event_stream_id({}))
+
+
+class TestOrderedAsyncDataFeedEventService(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.config = SymConfig(get_resource_filepath('./bot-config.json'))
+        self.config.load_config()
+        self.client = SymBotClient(None, self.config)
+        self.client.get_bot_user_info = MagicMock(return_value={'id': 456})
+        self.client.close_async_sessions = MagicMock(side_effect=asyncio.sleep)
+
+    async def test_messages_of_a_stream_are_handled_in_order(self):
+        service = AsyncDataFeedEventService(self.client, ordered_dispatch=True, max_concurrency=2)
+        events = [make_message_event(i, stream_id) for i in range(4) for stream_id in ('s1', 's2')]
+        reads = iter([events])
+
+        async def read_datafeed_async(datafeed_id):
+            await asyncio.sleep(0)
+            return next(reads, [])
+
+        service.datafeed_client = MagicMock()
+        service.datafeed_client.read_datafeed_async.side_effect = read_datafeed_async
+
+        listener = SlowIMListener(service, expected=len(events))
+        service.add_im_listener(listener)
+
+        await asyncio.wait_for(asyncio.gather(service.read_datafeed(), service.handle_events()), 5)
+
+        for stream_id in ('s1', 's2'):
+            self.assertEqual([i for s, i in listener.handled if s == stream_id], list(range(4)))
+
+
+def make_message_event(i, stream_id):
+    return {'type': 'MESSAGESENT', 'timestamp': 0, 'messageId': '{}-{}'.format(stream_id, i),
+            'payload': {'messageSent': {'message': {'index': i, 'stream': {'streamId': stream_id,
+                                                                           'streamType': 'IM'}}}},
+            'initiator': {'user': {'userId': 123}}}
+
+
+class SlowIMListener(IMListener):
+
+    def __init__(self, service, expected):
+        self.service = service
+        self.expected = expected
+        self.handled = []
+
+    async def on_im_message(self, message):
+        await asyncio.sleep(0.001 * (4 - message['index']))
+        self.handled.append((message['stream']['streamId'], message['index']))
+        if len(self.handled) == self.expected:
+            asyncio.ensure_future(self.service.deactivate_datafeed())
+
+    async def on_im_created(self, stream):
+        pass
@@ -0,0 +1,118 @@
+import json
+import re
+import unittest
+from unittest.async_case import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock
+
+from sym_api_client_python.clients.sym_bot_client import SymBotClient
+from sym_api_client_python.configure.configure import SymConfig
+from sym_api_client_python.datafeed_event_service import AsyncDataFeedEventService
+from sym_api_client_python.processors.command_router import CommandRouter
+from tests.util.resource_util import get_resource_filepath
+
+BOT_ID = 349026222344891
+
+
+def message(text, mentions=()):
+    """message_data of a message starting with a mention of each of the user ids of mentions"""
+    spans = ''.join('<span class="entity" data-entity-id="{}">@user{}</span> '.format(index, user_id)
+                    for index, user_id in enumerate(mentions))
+    data = {str(index): {'id': [{'type': 'com.symphony.user.userId', 'value': user_id}],
+                         'type': 'com.symphony.user.mention'}
+            for index, user_id in enumerate(mentions)}
+    return {
+        'message': '<div data-format="PresentationML" data-version="2.0"><p>{}{}</p></div>'.format(spans, text),
+        'data': json.dumps(data),
+        'stream': {'streamId': 'stream', 'streamType': 'IM'},
+    }
+
+
+class TestCommandRouter(unittest.TestCase):
+
+    def setUp(self):
+        self.router = CommandRouter(bot_user_id=BOT_ID)
+        self.calls = []
+
+    def record(self, name):
+        return lambda message_data, match: self.calls.append((name, match))
+
+    def test_longest_command_wins(self):
+        self.router.command('/deploy', self.record('deploy'))
+        self.router.command('/deploy prod', self.record('deploy prod'))
+
+        self.assertTrue(self.router.dispatch(message('/DEPLOY prod now')))
+        self.assertTrue(self.router.dispatch(message('/deploy staging')))
+        self.assertFalse(self.router.dispatch(message('deploy /deploy')))
+
+        self.assertEqual([(name, match.args) for name, match in self.calls],
+                         [('deploy prod', ['now']), ('deploy', ['staging'])])
+
+    def test_leading_bot_mention_is_skipped(self):
+        self.router.command('/help', self.record('help'))
+        self.router.command('/admin', self.record('admin'), mention_required=True)
+
+        self.router.dispatch(message('/help me', mentions=[BOT_ID]))
+        self.router.dispatch(message('/admin'))
+        self.router.dispatch(message('/admin', mentions=[1234]))
+        self.router.dispatch(message('/admin', mentions=[BOT_ID]))
+
+        self.assertEqual([(name, match.args, match.mentioned) for name, match in self.calls],
+                         [('help', ['me'], True), ('admin', [], True)])
+
+    def test_patterns_are_matched_first_in_text_then_in_order(self):
+        self.router.pattern(r'ticket (?P<ticket>[A-Z]+-\d+)', self.record('ticket'))
+        self.router.pattern(r'(?P<ticket>[A-Z]+-\d+)', self.record('any ticket'))
+        self.router.pattern(r'(\w+) \1', self.record('repeated'))
+        self.router.pattern(r'hello', self.record('hello'), flags=re.IGNORECASE)
+
+        self.router.dispatch(message('see ticket ABC-12 and XYZ-3'))
+        self.router.dispatch(message('XYZ-3 then ticket ABC-12'))
+        self.router.dispatch(message('well well'))
+        self.router.dispatch(message('HELLO there'))
+
+        self.assertEqual([(name, match.groups, match.args) for name, match in self.calls], [
+            ('ticket', {'ticket': 'ABC-12'}, ['ABC-12']),
+            ('any ticket', {'ticket': 'XYZ-3'}, ['XYZ-3']),
+            ('repeated', {}, ['well']),
+            ('hello', {}, []),
+        ])
+
+    def test_mention_and_default_handlers(self):
+        self.router.command('/help', self.record('help'))
+        self.router.mention(self.record('mention'))
+        self.router.default(self.record('default'))
+
+        self.router.dispatch(message('hi', mentions=[1234, BOT_ID]))
+        self.router.dispatch(message('hi', mentions=[1234]))
+        self.router.dispatch(message('/help', mentions=[BOT_ID]))
+
+        self.assertEqual([name for name, _ in self.calls], ['mention', 'default', 'help'])
+
+    def test_duplicate_command_is_rejected(self):
+        self.router.command('/help', self.record('help'))
+        with self.assertRaises(ValueError):
+            self.router.command('/HELP', self.record('help'))
+
+
+class TestCommandRouterInServices(IsolatedAsyncioTestCase):
+
+    async def test_async_service_awaits_handlers(self):
+        config = SymConfig(get_resource_filepath('./bot-config.json'))
+        config.load_config()
+        client = SymBotClient(None, config)
+        client.get_bot_user_info = MagicMock(return_value={'id': BOT_ID})
+        service = AsyncDataFeedEventService(client)
+
+        calls = []
+        router = CommandRouter()
+
+        @router.command('/joke')
+        async def joke(message_data, match):
+            calls.append(match.args)
+
+        service.add_command_router(router)
+        self.assertEqual(router.bot_user_id, BOT_ID)
+
+        event = {'type': 'MESSAGESENT', 'payload': {'messageSent': {'message': message('/joke please')}}}
+        await service.msg_sent_handler(event)
+        self.assertEqual(calls, [['please']])
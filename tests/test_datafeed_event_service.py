@@ -54,6 +54,59 @@ class TestDataFeedEventService(IsolatedAsyncioTestCase):
 
         self.assertIsNotNone(listener.last_message)
 
+    @mock.patch(
+        'sym_api_client_python.clients.datafeed_client.DataFeedClient',
+        new_callable=AsyncMock)
+    async def test_datafeed_v2_reuses_listed_datafeed_and_acks(self, datafeed_client_mock):
+        self.config.data['datafeedVersion'] = 'v2'
+        service = AsyncDataFeedEventService(self.client)
+        self.client.get_bot_user_info = MagicMock(return_value={'id': 456})
+
+        service.datafeed_client = datafeed_client_mock
+        datafeed_client_mock.list_datafeed_id_async.return_value = [{'id': 'listed-id'}]
+        datafeed_client_mock.get_ack_id = MagicMock(return_value='ack-1')
+        datafeed_client_mock.read_datafeed_async.side_effect = self.return_event_no_id_first_time_v2
+
+        listener = IMListenerRecorder(service)
+        service.add_im_listener(listener)
+
+        service.datafeed_id = await service._get_or_create_datafeed_id_async()
+        await asyncio.gather(service.read_datafeed(), service.handle_events())
+
+        self.assertEqual(service.datafeed_id, 'listed-id')
+        datafeed_client_mock.create_datafeed_async.assert_not_called()
+        datafeed_client_mock.read_datafeed_async.assert_called_with('listed-id', 'ack-1')
+        self.assertIsNotNone(listener.last_message)
+
+    @mock.patch(
+        'sym_api_client_python.clients.datafeed_client.DataFeedClient',
+        new_callable=AsyncMock)
+    async def test_datafeed_v2_streaming_reads(self, datafeed_client_mock):
+        self.config.data['datafeedVersion'] = 'v2'
+        service = AsyncDataFeedEventService(self.client, streaming_reads=True)
+        self.client.get_bot_user_info = MagicMock(return_value={'id': 456})
+
+        service.datafeed_client = datafeed_client_mock
+        datafeed_client_mock.get_ack_id = MagicMock(return_value='ack-1')
+        datafeed_client_mock.iter_datafeed_async = MagicMock(side_effect=self.stream_event_no_id_first_time)
+
+        listener = IMListenerRecorder(service)
+        service.add_im_listener(listener)
+
+        service.datafeed_id = 'df-id'
+        await asyncio.gather(service.read_datafeed(), service.handle_events())
+
+        datafeed_client_mock.iter_datafeed_async.assert_called_with('df-id', 'ack-1')
+        datafeed_client_mock.read_datafeed_async.assert_not_called()
+        self.assertIsNotNone(listener.last_message)
+
+    async def stream_event_no_id_first_time(self, _datafeed_id, _ack_id):
+        for event in await self.return_event_no_id_first_time(_datafeed_id):
+            yield event
+
+    async def return_event_no_id_first_time_v2(self, _datafeed_id, _ack_id):
+        return await self.return_event_no_id_first_time(_datafeed_id)
+
     async def return_event_no_id_first_time(self, _arg):
         if self.ran:
             # Give control back to handle_event coroutine
@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from sym_api_client_python.clients.sym_bot_client import SymBotClient
+from sym_api_client_python.configure.configure import SymConfig
+from sym_api_client_python.events import (Event, ElementsAction, MessageSent, RoomCreated, UserJoinedRoom,
+                                          parse_event)
+from sym_api_client_python.listeners.room_listener import RoomListener
+from sym_api_client_python.services.datafeed_event_service_v1 import DataFeedEventServiceV1
+from tests.util.resource_util import get_resource_filepath
+
+MESSAGE_SENT = {
+    'id': 'event-1', 'messageId': 'msg-1', 'timestamp': 1565879149167, 'type': 'MESSAGESENT',
+    'initiator': {'user': {'userId': 123, 'displayName': 'Reed', 'email': 'reed@symphony.com'}},
+    'payload': {'messageSent': {'message': {
+        'messageId': 'msg-1', 'timestamp': 1565879149167,
+        'message': '<div data-format="PresentationML" data-version="2.0"><p>/help me</p></div>',
+        'data': '{}',
+        'user': {'userId': 123, 'firstName': 'Reed'},
+        'stream': {'streamId': 'stream-1', 'streamType': 'ROOM'},
+    }}},
+}
+
+
+class TestEvents(unittest.TestCase):
+
+    def test_message_sent(self):
+        event = parse_event(MESSAGE_SENT)
+
+        self.assertIsInstance(event, MessageSent)
+        self.assertIs(event.raw, MESSAGE_SENT)
+        self.assertEqual((event.id, event.type, event.initiator.display_name), ('event-1', 'MESSAGESENT', 'Reed'))
+        message = event.message
+        self.assertIs(message.raw, MESSAGE_SENT['payload']['messageSent']['message'])
+        self.assertEqual((message.stream.stream_id, message.stream.stream_type), ('stream-1', 'ROOM'))
+        self.assertEqual(message.user.first_name, 'Reed')
+        self.assertEqual(message.parsed.text, ['/help', 'me'])
+        # Built once, then cached
+        self.assertIs(event.message, message)
+        self.assertIs(message.stream, message.stream)
+
+    def test_other_types(self):
+        room_created = parse_event({'type': 'ROOMCREATED', 'payload': {'roomCreated': {
+            'stream': {'streamId': 's'}, 'roomProperties': {'name': 'Release'}}}})
+        joined = parse_event({'type': 'USERJOINEDROOM', 'payload': {'userJoinedRoom': {
+            'stream': {'streamId': 's'}, 'affectedUser': {'userId': 7}}}})
+        action = parse_event({'type': 'SYMPHONYELEMENTSACTION', 'payload': {'symphonyElementsAction': {
+            'stream': {'streamId': 's'}, 'formId': 'form', 'formValues': {'action': 'submit'}}}})
+        unknown = parse_event({'type': 'SOMETHINGNEW', 'payload': {'somethingNew': {}}})
+
+        self.assertIsInstance(room_created, RoomCreated)
+        self.assertEqual(room_created.room_properties['name'], 'Release')
+        self.assertIsInstance(joined, UserJoinedRoom)
+        self.assertEqual((joined.stream.stream_id, joined.affected_user.user_id), ('s', 7))
+        self.assertIsInstance(action, ElementsAction)
+        self.assertEqual((action.form_id, action.action), ('form', 'submit'))
+        self.assertIs(type(unknown), Event)
+        self.assertEqual(unknown.data, {'somethingNew': {}})
+
+    def test_events_have_no_dict(self):
+        event = parse_event(MESSAGE_SENT)
+        for instance in (event, event.message, event.message.stream, event.initiator):
+            self.assertFalse(hasattr(instance, '__dict__'), type(instance).__name__)
+
+
+class TestTypedListeners(unittest.TestCase):
+
+    def test_listeners_opt_into_typed_events(self):
+        config = SymConfig(get_resource_filepath('./bot-config.json'))
+        config.load_config()
+        client = SymBotClient(None, config)
+        client.get_bot_user_info = MagicMock(return_value={'id': 456})
+        service = DataFeedEventServiceV1(client)
+
+        typed = [MagicMock(spec=RoomListener, typed_events=True) for _ in range(2)]
+        raw = MagicMock(spec=RoomListener)
+        for listener in typed + [raw]:
+            service.add_room_listener(listener)
+
+        with patch('sym_api_client_python.services.abstract_datafeed_event_service.parse_event',
+                   side_effect=parse_event) as parse:
+            service.handle_events([MESSAGE_SENT])
+
+        raw.on_room_msg.assert_called_once_with(MESSAGE_SENT['payload']['messageSent']['message'])
+        first, second = [listener.on_room_msg.call_args.args[0] for listener in typed]
+        self.assertIsInstance(first, MessageSent)
+        self.assertIs(first, second)
+        self.assertEqual(parse.call_count, 1)
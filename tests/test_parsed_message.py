@@ -0,0 +1,138 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from bs4 import BeautifulSoup
+
+from sym_api_client_python.processors.parsed_message import CashTag, HashTag, Mention, ParsedMessage
+from sym_api_client_python.processors.sym_message_parser import SymMessageParser
+
+MESSAGES = [
+    '<div data-format="PresentationML" data-version="2.0" class="wysiwyg"><p><span class="entity" '
+    'data-entity-id="0">@bot</span> /help <span class="entity" data-entity-id="1">#release</span></p></div>',
+    '<div data-format="PresentationML" data-version="2.0"><div>a &amp; b</div> c<br/>d<br>e '
+    '<span>x<span>y</span></span></div>',
+    '<div data-format="PresentationML" data-version="2.0"><table><tr><td>1</td><td>2</td></tr></table>'
+    '<ul><li>one</li><li>two</li></ul></div>',
+    '<div><p><span>misnested</p> text</div>',
+    '<div>left open <span>span',
+    '<div/><span/>no content',
+    '',
+]
+
+
+def beautiful_soup_results(message):
+    soup = BeautifulSoup(message, 'html.parser')
+    text = []
+    for div in soup.find_all('div'):
+        text.extend(div.text.split(' '))
+    return text, [span.text for span in soup.find_all('span')]
+
+
+class TestParsedMessage(unittest.TestCase):
+
+    def test_same_results_as_beautiful_soup(self):
+        for message in MESSAGES:
+            with self.subTest(message=message):
+                parsed = ParsedMessage({'message': message})
+                self.assertEqual((parsed.text, parsed.span_texts), beautiful_soup_results(message))
+
+    def test_entity_values(self):
+        data = {
+            '0': {'id': [{'type': 'com.symphony.user.userId', 'value': 123}], 'type': 'com.symphony.user.mention'},
+            '1': {'id': [{'type': 'org.symphonyoss.taxonomy.hashtag', 'value': 'release'}]},
+            '2': {'id': [{'type': 'org.symphonyoss.fin.security.id.ticker', 'value': 'aapl'}]},
+            '3': {'id': []},
+        }
+        parsed = ParsedMessage({'message': MESSAGES[0], 'data': json.dumps(data)})
+        self.assertEqual(parsed.mention_ids, [123])
+        self.assertEqual(parsed.hash_tag_values, ['release'])
+        self.assertEqual(parsed.cash_tag_values, ['aapl'])
+        self.assertEqual(ParsedMessage({'message': ''}).mention_ids, [])
+
+    def test_parsed_and_decoded_once(self):
+        parsed = ParsedMessage({'message': MESSAGES[0], 'data': '{}'})
+        with patch('sym_api_client_python.processors.parsed_message._PresentationMLScanner.feed') as feed, \
+                patch('sym_api_client_python.processors.parsed_message.json.loads', return_value={}) as loads:
+            parsed.text
+            parsed.span_texts
+            parsed.mention_ids
+            parsed.cash_tag_values
+        self.assertEqual(feed.call_count, 1)
+        self.assertEqual(loads.call_count, 1)
+
+
+class TestEntities(unittest.TestCase):
+
+    def setUp(self):
+        self.message = {
+            'message': '<div data-format="PresentationML" data-version="2.0"><p>Hi '
+                       '<span class="entity" data-entity-id="0">@Jane Doe</span>, '
+                       '<span class="entity" data-entity-id="1">$aapl</span> is up '
+                       '<span class="entity" data-entity-id="2">#earnings</span> '
+                       '<span class="tempo-text-color--red">red</span> '
+                       '<span class="entity" data-entity-id="9">@Unknown</span></p></div>',
+            'data': json.dumps({
+                '0': {'id': [{'type': 'com.symphony.user.userId', 'value': 349026222344902}],
+                      'type': 'com.symphony.user.mention'},
+                '1': {'id': [{'type': 'org.symphonyoss.fin.security.id.ticker', 'value': 'aapl'}],
+                      'type': 'org.symphonyoss.fin.security', 'version': '1.0'},
+                '2': {'id': [{'type': 'org.symphonyoss.taxonomy.hashtag', 'value': 'earnings'}],
+                      'type': 'org.symphonyoss.taxonomy', 'version': '1.0'},
+            }),
+        }
+
+    def test_typed_entities_with_offsets(self):
+        parsed = ParsedMessage(self.message)
+        self.assertEqual(parsed.entities, [
+            Mention(349026222344902, '@Jane Doe', 3, 12, '0'),
+            CashTag('aapl', '$aapl', 14, 19, '1'),
+            HashTag('earnings', '#earnings', 26, 35, '2'),
+        ])
+        for entity in parsed.entities:
+            self.assertEqual(parsed.plain_text[entity.start:entity.end], entity.text)
+        self.assertEqual([mention.user_id for mention in parsed.mentions], [349026222344902])
+        self.assertEqual([tag.value for tag in parsed.hash_tags], ['earnings'])
+        self.assertEqual([tag.ticker for tag in parsed.cash_tags], ['aapl'])
+
+    def test_message_parser_filters_by_type(self):
+        message_parser = SymMessageParser()
+        self.assertEqual(message_parser.get_mentions(self.message), ['@Jane Doe'])
+        self.assertEqual(message_parser.get_hash_tags(self.message), ['#earnings'])
+        self.assertEqual(message_parser.get_cash_tags(self.message), ['$aapl'])
+        self.assertEqual(len(message_parser.get_entities(self.message)), 3)
+
+
+class TestSymMessageParserCache(unittest.TestCase):
+
+    def test_one_parse_per_message(self):
+        message_parser = SymMessageParser()
+        first = {'message': MESSAGES[0], 'data': '{}'}
+        second = {'message': MESSAGES[1], 'data': '{}'}
+
+        self.assertIs(message_parser.parse(first), message_parser.parse(first))
+        self.assertEqual(message_parser.get_text(first), beautiful_soup_results(MESSAGES[0])[0])
+        self.assertEqual(message_parser.parse(second).span_texts, beautiful_soup_results(MESSAGES[1])[1])
+        self.assertIsNot(message_parser.parse(first), message_parser.parse(second))
+
+    def test_changed_and_equal_messages(self):
+        message_parser = SymMessageParser()
+        message = {'messageId': 'm1', 'message': MESSAGES[0], 'data': '{}'}
+        parsed = message_parser.parse(message)
+        self.assertIs(message_parser.parse(dict(message)), parsed)
+
+        message['message'] = MESSAGES[1]
+        self.assertEqual(message_parser.get_text(message), beautiful_soup_results(MESSAGES[1])[0])
+        message['messageId'] = 'm2'
+        self.assertIsNot(message_parser.parse(message), parsed)
+        self.assertEqual(parsed.text, beautiful_soup_results(MESSAGES[0])[0])
+
+    def test_results_are_copies(self):
+        message_parser = SymMessageParser()
+        message = {'message': MESSAGES[0]}
+        message_parser.get_text(message).clear()
+        self.assertNotEqual(message_parser.get_text(message), [])
+
+
+if __name__ == '__main__':
+    unittest.main()